@@ -0,0 +1,202 @@
+""" --- Benchmark suite ---
+        Times the hot paths of the library on the bundled APC data and writes the results to JSON:
+            import        import time of the main modules (fresh interpreter)
+            parse         single PER3 / PE0 files (smallest and largest), "fast" and "python" engines
+            catalog       every PER3 / PE0 file parsed once
+            index         preprocess + create_KDTree, engine load
+            search        search_by_range latency at several selectivities
+            map           performance_map grid computation (plot=False)
+
+        Usage (from the repository root):
+            python benchmarks/run_benchmarks.py --output baseline.json
+            python benchmarks/run_benchmarks.py --output new.json --compare baseline.json
+            python benchmarks/run_benchmarks.py --compare baseline.json --input new.json   (no run)
+
+        With --compare, every benchmark whose median time grew more than --threshold (default 20 %)
+        over the baseline is flagged and the script exits with status 1.
+        Index builds go to a temporary cache directory, so the user cache is never touched.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tempfile
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+sys.path.insert(0, str(SRC_DIR))
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+IMPORT_MODULES = ["Objects.Performance", "Objects.Geometry", "Search.SearchTree"]
+SELECTIVITIES = [0.001, 0.01, 0.1, 0.5]  # fraction of the index rows matching a search_by_range query
+
+
+def timeit(function, repeat, warmup=1):
+    """ Run times of a function (seconds): min, median and mean over "repeat" runs after the warm-up runs. """
+    for _ in range(warmup):
+        function()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return {"min_s": times[0], "median_s": times[len(times) // 2], "mean_s": sum(times) / len(times),
+            "runs": repeat}
+
+
+def import_time(module, repeat):
+    """ Import time of a module in a fresh interpreter (process start-up excluded). """
+    code = (f"import time; start = time.perf_counter(); import {module}; "
+            f"print(time.perf_counter() - start)")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(SRC_DIR), os.environ.get("PYTHONPATH", "")]))
+    times = sorted(float(subprocess.run([sys.executable, "-c", code], env=env, capture_output=True,
+                                        text=True, check=True).stdout) for _ in range(repeat))
+    return {"min_s": times[0], "median_s": times[len(times) // 2], "mean_s": sum(times) / len(times),
+            "runs": repeat}
+
+
+def file_sizes(directory, label):
+    """ (smallest, largest) data file of a directory. """
+    from Objects.ClassAPC import _get_file_index
+    files = _get_file_index(directory, label)['files']
+    names = sorted(files, key=lambda name: (os.path.getsize(files[name]), name))
+    return names[0], names[-1]
+
+
+def run_suite(repeat, only=None):
+    from Objects.Performance import Performance
+    from Objects.Geometry import Geometry
+    from Objects.ClassAPC import _get_file_index
+    import Search.SearchTree as SearchTree
+
+    results = {}
+
+    def record(name, function, runs=repeat, warmup=1):
+        if only and not any(name.startswith(prefix) for prefix in only):
+            return
+        results[name] = timeit(function, runs, warmup)
+        print(f"{name:<45} median {results[name]['median_s'] * 1e3:10.3f} ms")
+
+    # --- Import time
+    for module in IMPORT_MODULES:
+        name = f"import/{module}"
+        if not only or any(name.startswith(prefix) for prefix in only):
+            results[name] = import_time(module, repeat)
+            print(f"{name:<45} median {results[name]['median_s'] * 1e3:10.3f} ms")
+
+    # --- Single file parsing
+    perf, geo = Performance(), Geometry()
+    for label, reader, directory in (("perf", perf, perf.perfomance_path), ("geo", geo, geo.geometry_path)):
+        for size, filename in zip(("small", "large"), file_sizes(directory, label)):
+            for engine in ("fast", "python"):
+                record(f"parse/{label}/{size}/{engine}",
+                       lambda: reader.read_data(filename, engine=engine), runs=repeat * 5)
+
+    # --- Full catalog parsing
+    for label, reader, directory in (("perf", perf, perf.perfomance_path), ("geo", geo, geo.geometry_path)):
+        names = sorted(_get_file_index(directory, label)['files'])
+        record(f"catalog/{label}/fast", lambda: [reader.read_data(name, engine="fast") for name in names],
+               runs=max(1, repeat // 2))
+
+    # --- Index build and load, in a temporary cache directory
+    with tempfile.TemporaryDirectory() as cache_dir:
+        previous = os.environ.get("APC_CACHE_DIR")
+        os.environ["APC_CACHE_DIR"] = cache_dir
+        try:
+            tree = SearchTree.PropellerSearchTree(workers=1)
+
+            def build():
+                tree.preprocess(workers=1)
+                tree.create_KDTree()
+            record("index/build", build, runs=max(1, repeat // 2), warmup=0)
+            if not os.path.exists(tree.index_path):
+                build()
+
+            def load():
+                engine = SearchTree.PropellerSearchTree.load_engine(tree.index_path)
+                from scipy.spatial import KDTree
+                KDTree(engine['scaled'])
+            record("index/load", load)
+
+            # --- search_by_range latency: thrust lower bound at the (1 - selectivity) quantile
+            df = tree.df
+            engine = tree.query_engine
+            for selectivity in SELECTIVITIES:
+                thrust = float(df['maxThrust (N)'].quantile(1 - selectivity))
+                constraints = {'maxThrust (N)': (thrust, None)}
+                record(f"search/range/{selectivity:g}",
+                       lambda: engine.query(constraints, sort_by='maxFoM'), runs=repeat * 50)
+                record(f"search/range_df/{selectivity:g}",
+                       lambda: tree.search_by_range(constraints, sort_by='maxFoM'), runs=repeat * 10)
+        finally:
+            SearchTree._ENGINES.clear()
+            if previous is None:
+                os.environ.pop("APC_CACHE_DIR", None)
+            else:
+                os.environ["APC_CACHE_DIR"] = previous
+
+    # --- performance_map grid computation
+    df_prop = perf.read_data("20x10E", engine="fast")
+    record("map/grid/20x10E", lambda: perf.performance_map(df_prop, plot=False), runs=repeat * 5)
+
+    return results
+
+
+def compare(results, baseline, threshold):
+    """ Prints the median time ratio of every benchmark against the baseline; returns the regressed names. """
+    regressions = []
+    print(f"\n{'benchmark':<45} {'baseline':>12} {'current':>12} {'ratio':>8}")
+    for name in sorted(set(results) | set(baseline)):
+        if name not in results or name not in baseline:
+            print(f"{name:<45} {'only in ' + ('current' if name in results else 'baseline'):>34}")
+            continue
+        old, new = baseline[name]['median_s'], results[name]['median_s']
+        ratio = new / old if old > 0 else float('inf')
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<45} {old * 1e3:10.3f}ms {new * 1e3:10.3f}ms {ratio:8.2f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="APC Propeller Finder benchmark suite")
+    parser.add_argument("--output", help="JSON file for the results")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--input", help="compare this results JSON file instead of running the suite")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before flagging (0.2 = 20%%)")
+    parser.add_argument("--repeat", type=int, default=5, help="base number of runs per benchmark")
+    parser.add_argument("--only", nargs="*", help="benchmark name prefixes to run (ex: parse search)")
+    args = parser.parse_args(argv)
+
+    if args.input:
+        with open(args.input) as file:
+            report = json.load(file)
+    else:
+        import numpy, pandas
+        report = {"meta": {"date": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                           "numpy": numpy.__version__, "pandas": pandas.__version__,
+                           "platform": platform.platform(), "cpus": os.cpu_count(), "repeat": args.repeat},
+                  "results": run_suite(args.repeat, args.only)}
+        if args.output:
+            with open(args.output, "w") as file:
+                json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(report["results"], baseline["results"], args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from Objects.ClassAPC import _normalize_code
+from Objects.OperatingPoint import regrid_blocks
+
+""" --- Blade element momentum theory (BEMT) ---
+        Thrust and power of propellers predicted from their PE0 geometry (chord and twist of each station),
+        for whole (RPM, V) grids and many propellers at once: every (prop, operating point, station) element
+        is one entry of a NumPy array and all of them are solved together.
+
+        At each element the inflow angle phi is the root of the momentum / blade element balance
+            R(phi) = Omega r (sin^2 phi - s Cn) - V (sin phi cos phi + s Ct'),   s = B c / (8 pi r F)
+        (axial and tangential induction eliminated, valid at V = 0), found by bisection on (0, pi/2).
+        Cn = Cl cos phi - Cd sin phi and Ct' = Cl sin phi + Cd cos phi; F is the Prandtl tip loss factor.
+        The blade angle is the TWIST (DEG) column (LE-TE chord line, atan(pitch / 2 pi r)).
+
+        The section model is a generic thin cambered airfoil (AIRFOIL): linear lift with stall limits,
+        parabolic drag polar with a Reynolds number scaling and the Prandtl-Glauert compressibility factor.
+        APC tables come from their own (vortex theory) code, so the agreement is that of a design-sweep
+        model, not of the tables themselves: compare_tables puts both side by side for a PER3 table.
+
+            geometry = BladeGeometry.from_catalog(Geometry().build_catalog(), ["10x7E", "20x10E"])
+            result = bemt_sweep(geometry, rpm_grid, v_grid, workers=4)   # result["Ct"]: (2,) + grid shape
+"""
+
+INCH_TO_M = 0.0254
+MPH_TO_MS = 0.44704
+RHO = 1.225                # air density [kg/m^3] (as the APC tables)
+MU = 1.789e-5              # air dynamic viscosity [Pa s]
+SPEED_OF_SOUND = 340.3     # [m/s]
+
+AIRFOIL = {"lift_slope": 5.7,           # dCl/dalpha [1/rad], incompressible
+           "alpha_zero": -4.3,          # zero lift angle to the chord line [deg]
+           "cl_max": 1.2, "cl_min": -0.5,
+           "cd_min": 0.018,             # minimum drag coefficient at re_ref
+           "cl_cd_min": 0.3,            # lift coefficient of minimum drag
+           "cd_k": 0.03,                # drag polar: cd = cd_min + cd_k (cl - cl_cd_min)^2
+           "re_ref": 1e5, "re_exponent": -0.3,
+           "cd_stall": 1.5}             # drag rise past stall: cd += cd_stall sin^2(alpha - alpha_stall)
+
+
+class BladeGeometry():
+    """
+    Station arrays of one or many propellers, resampled on n_stations per blade (root to last station):
+        r, chord (n_props, n_stations) [m], beta (n_props, n_stations) [rad], radius (n_props,) [m], blades (n_props,)
+    """
+
+    def __init__(self, prop_ids, radius, blades, r, chord, beta):
+        self.prop_ids = np.asarray(prop_ids)
+        self.radius = np.asarray(radius, dtype=np.float64)
+        self.blades = np.asarray(blades, dtype=np.float64)
+        self.r = np.atleast_2d(np.asarray(r, dtype=np.float64))
+        self.chord = np.atleast_2d(np.asarray(chord, dtype=np.float64))
+        self.beta = np.atleast_2d(np.asarray(beta, dtype=np.float64))
+
+    @classmethod
+    def from_catalog(cls, catalog, props=None, n_stations=40):
+        """
+        Geometry of catalog propellers (see Geometry.build_catalog). Each blade is resampled from its first
+        to its last station, so every propeller keeps its own root cut-out. Files without data are skipped.
+
+        INPUTS
+            catalog = GeometryCatalog
+            props = list of propeller codes (default: every propeller with station data)
+            n_stations = stations per blade
+        """
+        from Objects.Geometry import GEO_COLUMNS, GEO_SCALAR_COLUMNS
+        counts = np.diff(catalog.station_offsets)
+        if props is None:
+            files = np.flatnonzero(counts > 0)
+        else:
+            lookup = {_normalize_code(code): i for i, code in enumerate(catalog.prop_ids)}
+            missing = [prop for prop in props if _normalize_code(prop) not in lookup]
+            if missing:
+                raise ValueError(f"Propellers {missing} not found in the geometry catalog.")
+            files = np.array([lookup[_normalize_code(prop)] for prop in props], dtype=np.int64)
+            if (counts[files] == 0).any():
+                raise ValueError(f"No station data for {np.asarray(props)[counts[files] == 0].tolist()}.")
+
+        # - stations of the selected files, each blade on s = (r - r_first) / (r_last - r_first) in [0, 1]
+        rows = np.concatenate([np.arange(catalog.station_offsets[i], catalog.station_offsets[i + 1]) for i in files])
+        offsets = np.concatenate([[0], np.cumsum(counts[files])]).astype(np.int64)
+        station = catalog.stations[rows, GEO_COLUMNS.index("STATION (IN)")]
+        first = np.repeat(station[offsets[:-1]], counts[files])
+        last = np.repeat(station[offsets[1:] - 1], counts[files])
+        s = (station - first) / np.where(last > first, last - first, 1.0)
+
+        columns = [GEO_COLUMNS.index(col) for col in ("STATION (IN)", "CHORD (IN)", "TWIST (DEG)")]
+        grid = regrid_blocks(offsets, s, catalog.stations[rows][:, columns], np.linspace(0.0, 1.0, n_stations),
+                             clamp=True)
+        radius = catalog.scalars[files, GEO_SCALAR_COLUMNS.index("RADIUS")]
+        blades = catalog.scalars[files, GEO_SCALAR_COLUMNS.index("BLADES")]
+        return cls(np.asarray(catalog.prop_ids)[files], radius * INCH_TO_M, np.where(np.isnan(blades), 2, blades),
+                   grid[..., 0] * INCH_TO_M, grid[..., 1] * INCH_TO_M, np.radians(grid[..., 2]))
+
+    def subset(self, index):
+        return BladeGeometry(self.prop_ids[index], self.radius[index], self.blades[index],
+                             self.r[index], self.chord[index], self.beta[index])
+
+
+def section_coefficients(alpha, reynolds, mach, airfoil=AIRFOIL):
+    """ (Cl, Cd) of the generic section model at angle of attack alpha [rad] (arrays broadcast together). """
+    beta_pg = np.sqrt(np.maximum(1 - np.minimum(mach, 0.9) ** 2, 0.19))
+    alpha_zero = np.radians(airfoil["alpha_zero"])
+    cl_linear = airfoil["lift_slope"] / beta_pg * (alpha - alpha_zero)
+    cl = np.clip(cl_linear, airfoil["cl_min"], airfoil["cl_max"])
+
+    cd_min = airfoil["cd_min"] * (np.maximum(reynolds, 1e3) / airfoil["re_ref"]) ** airfoil["re_exponent"]
+    cd = cd_min + airfoil["cd_k"] * (cl - airfoil["cl_cd_min"]) ** 2
+    # - past stall the lift stays at its limit and the drag rises
+    stall = np.where(cl_linear > airfoil["cl_max"], alpha - (alpha_zero + airfoil["cl_max"] * beta_pg / airfoil["lift_slope"]),
+                     np.where(cl_linear < airfoil["cl_min"],
+                              alpha - (alpha_zero + airfoil["cl_min"] * beta_pg / airfoil["lift_slope"]), 0.0))
+    cd = cd + airfoil["cd_stall"] * np.sin(stall) ** 2
+    return cl, cd
+
+
+def _element_loads(phi, r, chord, beta, blades, radius, omega, v, airfoil):
+    """ Cn, Ct', tip loss factor F and relative speed W of the elements at inflow angle phi. """
+    sin_phi, cos_phi = np.sin(phi), np.cos(phi)
+    w = np.hypot(v, omega * r)   # reynolds and mach from the undisturbed speed (no iteration on them)
+    cl, cd = section_coefficients(beta - phi, RHO * w * chord / MU, w / SPEED_OF_SOUND, airfoil)
+    cn = cl * cos_phi - cd * sin_phi
+    ct = cl * sin_phi + cd * cos_phi
+    f = blades / 2 * (radius - r) / (r * np.maximum(sin_phi, 1e-6))
+    tip_loss = np.maximum(2 / np.pi * np.arccos(np.clip(np.exp(-f), 0.0, 1.0)), 1e-3)
+    return cn, ct, tip_loss
+
+
+def bemt_solve(geometry, rpm, v, airfoil=AIRFOIL, n_iterations=40):
+    """
+    BEMT thrust and power of every propeller of "geometry" at the operating points (rpm, v).
+    Returns a dictionary of arrays of shape (n_props,) + broadcast(rpm, v).shape:
+        "Ct", "Cp" (APC definitions, n in rev/s and D in m), "Thrust (N)", "PWR (W)", "Torque (N-m)", "Pe", "J"
+
+    INPUTS
+        geometry = BladeGeometry
+        rpm = RPM array (or scalar)
+        v = airspeed array [m/s] (or scalar)
+        airfoil = section model parameters (see AIRFOIL)
+        n_iterations = bisection steps on the inflow angle (40 gives ~1e-12 rad)
+    """
+    rpm, v = np.broadcast_arrays(np.asarray(rpm, dtype=np.float64), np.asarray(v, dtype=np.float64))
+    shape = rpm.shape
+
+    # - (props, points, stations) element arrays
+    omega = (rpm.ravel() * 2 * np.pi / 60)[None, :, None]
+    speed = v.ravel()[None, :, None]
+    r, chord, beta = geometry.r[:, None, :], geometry.chord[:, None, :], geometry.beta[:, None, :]
+    blades, radius = geometry.blades[:, None, None], geometry.radius[:, None, None]
+
+    def residual(phi):
+        cn, ct, tip_loss = _element_loads(phi, r, chord, beta, blades, radius, omega, speed, airfoil)
+        solidity = blades * chord / (8 * np.pi * r * tip_loss)
+        return omega * r * (np.sin(phi) ** 2 - solidity * cn) - speed * (np.sin(phi) * np.cos(phi) + solidity * ct)
+
+    # - bisection of every element at once: R < 0 near phi = 0, R > 0 at phi = pi/2
+    low = np.full(np.broadcast_shapes(r.shape, omega.shape), 1e-6)
+    high = np.full(low.shape, np.pi / 2)
+    for _ in range(n_iterations):
+        mid = 0.5 * (low + high)
+        positive = residual(mid) > 0
+        high = np.where(positive, mid, high)
+        low = np.where(positive, low, mid)
+    phi = 0.5 * (low + high)
+
+    # - element loads and spanwise integration (trapezoid over the stations)
+    cn, ct, tip_loss = _element_loads(phi, r, chord, beta, blades, radius, omega, speed, airfoil)
+    solidity = blades * chord / (8 * np.pi * r * tip_loss)
+    w = omega * r / (np.cos(phi) + solidity * ct / np.sin(phi))
+    dT = 0.5 * RHO * w ** 2 * blades * chord * cn
+    dQ = 0.5 * RHO * w ** 2 * blades * chord * ct * r
+    thrust = np.trapezoid(dT, r, axis=-1)
+    torque = np.trapezoid(dQ, r, axis=-1)
+
+    n = omega[..., 0] / (2 * np.pi)
+    diameter = 2 * radius[..., 0]
+    power = torque * omega[..., 0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        results = {"Ct": thrust / (RHO * n ** 2 * diameter ** 4),
+                   "Cp": power / (RHO * n ** 3 * diameter ** 5),
+                   "Thrust (N)": thrust, "PWR (W)": power, "Torque (N-m)": torque,
+                   "Pe": np.where(power > 0, thrust * speed[..., 0] / power, np.nan),
+                   "J": speed[..., 0] / (n * diameter)}
+    n_props = len(geometry.radius)
+    return {name: np.broadcast_to(value, (n_props, rpm.size)).reshape((n_props,) + shape)
+            for name, value in results.items()}
+
+
+def _solve_chunk(job):
+    """ bemt_solve of a chunk of propellers. Module level function so it can run in worker processes. """
+    geometry, rpm, v, airfoil, n_iterations = job
+    return bemt_solve(geometry, rpm, v, airfoil, n_iterations)
+
+
+def bemt_sweep(geometry, rpm, v, airfoil=AIRFOIL, n_iterations=40, chunk_props=16, workers=1):
+    """
+    bemt_solve over many propellers, split in chunks of chunk_props propellers (bounded memory),
+    optionally solved in a process pool. Same output as bemt_solve.
+
+    INPUTS
+        geometry, rpm, v, airfoil, n_iterations = see bemt_solve
+        chunk_props = propellers solved together
+        workers = processes (1 = no process pool, None = number of CPUs)
+    """
+    n_props = len(geometry.radius)
+    jobs = [(geometry.subset(slice(p0, p0 + chunk_props)), rpm, v, airfoil, n_iterations)
+            for p0 in range(0, n_props, chunk_props)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) == 1:
+        parts = [_solve_chunk(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(_solve_chunk, jobs))
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+
+def compare_tables(geometry, perf_df, airfoil=AIRFOIL):
+    """
+    BEMT prediction at the points of a PER3 table (Performance.read_data dataframe) of the single propeller
+    of "geometry". Returns the table columns RPM, V (mph), J, Ct, Cp, Pe with the BEMT values beside them
+    ("Ct BEMT", "Cp BEMT", "Pe BEMT").
+    """
+    if len(geometry.radius) != 1:
+        raise ValueError("compare_tables takes the geometry of a single propeller.")
+    rpm = perf_df["RPM"].to_numpy(dtype=np.float64)
+    result = bemt_solve(geometry, rpm, perf_df["V (mph)"].to_numpy(dtype=np.float64) * MPH_TO_MS, airfoil)
+    df = perf_df[["RPM", "V (mph)", "J (Adv_Ratio)", "Ct", "Cp", "Pe"]].reset_index(drop=True)
+    for name in ("Ct", "Cp", "Pe"):
+        df[f"{name} BEMT"] = result[name][0]
+    return df
@@ -0,0 +1,487 @@
+import os
+import time
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+from Objects.ClassAPC import get_cache_dir, _get_file_index, _code_from_filename, _normalize_code
+from Objects.Instrumentation import stage
+
+""" --- Columnar cache of the parsed PERFILES2 catalog ---
+        Every PER3 file is parsed once and stored in a single .npz in the user cache directory:
+            values          (rows, 15) float64, same columns as Performance.read_data without "RPM"
+            rpm             (rows,) int64
+            files           file names, sorted; prop_offsets (n_files + 1) row offsets of each file
+            block_prop, block_rpm, block_offsets: one entry per (file, RPM) block
+            manifest        (n_files, 2) mtime_ns and size of each source file
+
+        The store is rebuilt when a source file is added, removed or its mtime/size changes.
+        Inside a process the loaded stores re-stat their source files (one os.stat per file) at most once
+        per MANIFEST_CHECK_INTERVAL, so files edited in place are noticed too (see source_token).
+
+        PerformanceTensor is a read-only float32 copy of "values" saved as .npy and opened with
+        np.memmap, so many worker processes share it through the OS page cache.
+
+        GeometryCatalog stores the PE0-FILES_WEB geometry the same way: all station tables stacked in
+        one (rows, 13) array with per-file offsets, and one row of scalar fields per file.
+"""
+
+CATALOG_VERSION = 1
+
+# --- Loaded catalogs: {(kind, data directory): catalog}; opened tensors: {data directory: tensor}
+_CATALOGS = {}
+_TENSORS = {}
+
+# --- Serializes the (re)builds of the stores between the threads of a process
+_BUILD_LOCK = threading.RLock()
+
+# --- Source file checks: {(data directory, label): (time.monotonic() of the check, fingerprint)}
+MANIFEST_CHECK_INTERVAL = 1.0  # seconds between two stat scans of a data directory
+_SOURCE_TOKENS = {}
+
+
+def catalog_manifest(directory, label="perf"):
+    """ Returns the sorted data file names of a directory ("perf" or "geo"), their paths and an array of (mtime_ns, size). """
+    files = _get_file_index(directory, label)['files']
+    names = sorted(files)
+    paths = [files[name] for name in names]
+    stats = [os.stat(path) for path in paths]
+    manifest = np.array([(st.st_mtime_ns, st.st_size) for st in stats], dtype=np.int64).reshape(-1, 2)
+    return names, paths, manifest
+
+
+def catalog_cache_path(directory, kind="catalog"):
+    """ Cache file of a data directory (one per directory, so several checkouts can share the cache). """
+    key = hashlib.sha1(str(directory).encode()).hexdigest()[:12]
+    filename = {"catalog": f"perf_catalog_{key}.npz",
+                "tensor": f"perf_tensor_{key}.f32.npy",
+                "tensor_index": f"perf_tensor_{key}_index.npz",
+                "search_metadata": f"search_metadata_{key}.npz",
+                "search_index": f"search_index_{key}.npz",
+                "geometry": f"geo_catalog_{key}.npz",
+                "surrogate": f"perf_surrogate_{key}.npz"}[kind]
+    return get_cache_dir() / filename
+
+
+def temp_path(path):
+    """
+    Temporary file name next to "path", unique per process and thread (written, then os.replace'd).
+    The directory of "path" is created if needed: stores are only written through here.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def catalog_fingerprint(directory, label="perf"):
+    """ Hash of the data file names, mtimes and sizes of a directory. Changes when APC data is updated. """
+    files, _, manifest = catalog_manifest(directory, label)
+    return _fingerprint(files, manifest)
+
+
+def _fingerprint(files, manifest):
+    digest = hashlib.sha1("\n".join(files).encode())
+    digest.update(manifest.tobytes())
+    return digest.hexdigest()
+
+
+def source_token(directory, label="perf", force=False):
+    """
+    Fingerprint of the data files of a directory, used by the in-process caches (catalogs, tensor,
+    search engine) to notice added, removed or edited files, including files edited in place (which keep
+    the directory mtime). The files are stat'ed at most once per MANIFEST_CHECK_INTERVAL (or when force
+    is True); in between the last fingerprint is returned.
+    """
+    key = (str(directory), label)
+    now = time.monotonic()
+    checked = _SOURCE_TOKENS.get(key)
+    if not force and checked is not None and now - checked[0] < MANIFEST_CHECK_INTERVAL:
+        return checked[1]
+    token = catalog_fingerprint(directory, label)
+    _SOURCE_TOKENS[key] = (now, token)
+    return token
+
+
+def file_digests(paths):
+    """ Content hash (blake2b, 32 hex characters) of each file, to tell edited files from touched ones. """
+    digests = []
+    for path in paths:
+        with open(path, 'rb') as file:
+            digests.append(hashlib.blake2b(file.read(), digest_size=16).hexdigest())
+    return np.array(digests, dtype='<U32')
+
+
+def _same_manifest(stored_files, stored_manifest, files, manifest):
+    """ True if a store was built from exactly these files, mtimes and sizes. """
+    return (stored_files.tolist() == list(files)
+            and stored_manifest.shape == manifest.shape
+            and bool((stored_manifest == manifest).all()))
+
+
+class _ArrayStore():
+    """ Catalog saved as the named arrays of one .npz file (ARRAYS), with the manifest of its source files. """
+
+    ARRAYS = ()
+    KIND = None   # catalog_cache_path kind
+    LABEL = None  # data file label ("perf" or "geo")
+
+    def save(self, path):
+        """ Writes the catalog atomically (other processes never see a partial file). """
+        tmp_path = temp_path(path)
+        with open(tmp_path, 'wb') as file:
+            np.savez(file, version=CATALOG_VERSION, **{name: getattr(self, name) for name in self.ARRAYS})
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """ Reads a saved catalog. Returns None if the file is unreadable or from another version. """
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data["version"]) != CATALOG_VERSION:
+                    return None
+                return cls(**{name: data[name] for name in cls.ARRAYS})
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def is_current(self, files, manifest):
+        """ True if the catalog was built from exactly these files, mtimes and sizes. """
+        return _same_manifest(self.files, self.manifest, files, manifest)
+
+    def is_file_current(self, path):
+        """ True if the data file at "path" is in the catalog with its current mtime and size (one os.stat). """
+        name = os.path.basename(path)
+        i = int(np.searchsorted(self.files, name))
+        if i == len(self.files) or self.files[i] != name:
+            return False
+        st = os.stat(path)
+        return bool(self.manifest[i, 0] == st.st_mtime_ns and self.manifest[i, 1] == st.st_size)
+
+
+class PerformanceCatalog(_ArrayStore):
+    """
+    Parsed PERFILES2 catalog held as contiguous arrays.
+    read() rebuilds the same dataframe as Performance.read_data from a slice of the arrays.
+    """
+
+    ARRAYS = ("files", "manifest", "prop_offsets", "rpm", "values",
+              "block_prop", "block_rpm", "block_offsets")
+    KIND = "catalog"
+    LABEL = "perf"
+
+    def __init__(self, files, manifest, prop_offsets, rpm, values, block_prop, block_rpm, block_offsets):
+        self.files = np.asarray(files, dtype=str)
+        self.manifest = manifest
+        self.prop_offsets = prop_offsets
+        self.rpm = rpm
+        self.values = values
+        self.block_prop = block_prop
+        self.block_rpm = block_rpm
+        self.block_offsets = block_offsets
+        self.index = {name: i for i, name in enumerate(self.files.tolist())}
+        self.source_token = None
+
+    @classmethod
+    def build(cls, paths, manifest, parser):
+        """
+        Parses every file with "parser" (path -> read_data dataframe).
+        Files without data are kept with zero rows, so read() raises like the parser does.
+        """
+        rpm, values, counts = [], [], []
+        for path in paths:
+            try:
+                perf_df = parser(path)
+            except ValueError:
+                counts.append(0)
+                continue
+            rpm.append(perf_df["RPM"].to_numpy(dtype=np.int64))
+            values.append(perf_df.iloc[:, 1:].to_numpy(dtype=np.float64))
+            counts.append(len(perf_df))
+
+        rpm = np.concatenate(rpm) if rpm else np.zeros(0, dtype=np.int64)
+        values = np.concatenate(values) if values else np.zeros((0, 15))
+        prop_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+        # - (file, RPM) blocks: a new block starts at each file start or RPM change
+        row_prop = np.repeat(np.arange(len(counts)), counts)
+        starts = np.flatnonzero(np.concatenate([[True], (np.diff(rpm) != 0) | (np.diff(row_prop) != 0)])) \
+            if len(rpm) else np.zeros(0, dtype=np.int64)
+        block_offsets = np.concatenate([starts, [len(rpm)]]).astype(np.int64)
+
+        return cls([path.name for path in paths], manifest, prop_offsets, rpm, values,
+                   row_prop[starts], rpm[starts], block_offsets)
+
+    def prop_rows(self, filename):
+        """ (start, stop) rows of a file in the arrays. """
+        i = self.index.get(filename)
+        if i is None:
+            raise ValueError(f"Propeller file '{filename}' is not in the catalog.")
+        return self.prop_offsets[i], self.prop_offsets[i + 1]
+
+    def read(self, filename):
+        """ Same dataframe as Performance.read_data for a PER3 file name. Example "PER3_20x10E.dat" """
+        start, stop = self.prop_rows(filename)
+        if start == stop:
+            raise ValueError("Error in finding data.")
+
+        from Objects.Performance import PERF_COLUMNS
+        perf_df = pd.DataFrame(self.values[start:stop].copy(), columns=PERF_COLUMNS)
+        perf_df.insert(0, "RPM", self.rpm[start:stop].copy())
+        return perf_df
+
+    def iter_props(self):
+        """ Yields (file name, rpm, values) for every file, as views of the arrays. """
+        for i, name in enumerate(self.files.tolist()):
+            start, stop = self.prop_offsets[i], self.prop_offsets[i + 1]
+            yield name, self.rpm[start:stop], self.values[start:stop]
+
+
+def get_catalog(directory, parser, build=True, cache_path=None, store=PerformanceCatalog, path=None):
+    """
+    Returns the catalog of a data directory (PerformanceCatalog of PERFILES2 or GeometryCatalog of
+    PE0-FILES_WEB, given by "store"), loading it once per process.
+    The source manifest is checked on the first load and again whenever source_token changes
+    (at most MANIFEST_CHECK_INTERVAL later than the files); a missing or outdated store is (re)built
+    with "parser". With "path" (a data file about to be read) that file is also checked on every call.
+    If build is False and no store exists yet, returns None.
+    """
+    key = (store.KIND, str(directory))
+    catalog = _CATALOGS.get(key)
+    token = source_token(directory, store.LABEL)
+    if catalog is not None and catalog.source_token == token:
+        if path is None or catalog.is_file_current(path):
+            return catalog
+        token = source_token(directory, store.LABEL, force=True)
+
+    cache_path = catalog_cache_path(directory, store.KIND) if cache_path is None else cache_path
+    if not build and not os.path.exists(cache_path):
+        return None
+
+    with _BUILD_LOCK:
+        # - another thread may have refreshed the catalog while this one waited
+        catalog = _CATALOGS.get(key)
+        if catalog is not None and catalog.source_token == token \
+                and (path is None or catalog.is_file_current(path)):
+            return catalog
+
+        files, paths, manifest = catalog_manifest(directory, store.LABEL)
+        with stage(f"{store.KIND}.load"):
+            catalog = store.load(cache_path) if os.path.exists(cache_path) else None
+        if catalog is None or not catalog.is_current(files, manifest):
+            with stage(f"{store.KIND}.build"):
+                catalog = store.build(paths, manifest, parser)
+                catalog.save(cache_path)
+
+        catalog.source_token = _fingerprint(files, manifest)
+        _SOURCE_TOKENS[(str(directory), store.LABEL)] = (time.monotonic(), catalog.source_token)
+        _CATALOGS[key] = catalog
+        return catalog
+
+
+class GeometryCatalog(_ArrayStore):
+    """
+    Parsed PE0-FILES_WEB catalog held as contiguous arrays:
+        stations        (rows, 13) float64, same columns as the first Geometry.read_data dataframe
+        station_offsets (n_files + 1) row offsets of each file
+        scalars         (n_files, n_fields) float64 numeric fields of the second dataframe (NaN if missing)
+        airfoils        (n_files, 2) airfoil names
+    read() rebuilds the same dataframes as Geometry.read_data.
+    """
+
+    ARRAYS = ("files", "manifest", "station_offsets", "stations", "scalars", "airfoils")
+    KIND = "geometry"
+    LABEL = "geo"
+
+    def __init__(self, files, manifest, station_offsets, stations, scalars, airfoils):
+        self.files = np.asarray(files, dtype=str)
+        self.manifest = manifest
+        self.station_offsets = station_offsets
+        self.stations = stations
+        self.scalars = scalars
+        self.airfoils = np.asarray(airfoils, dtype=str)
+        self.index = {name: i for i, name in enumerate(self.files.tolist())}
+        self.prop_ids = [_code_from_filename(name, "geo") for name in self.files.tolist()]
+        self.source_token = None
+
+    @classmethod
+    def build(cls, paths, manifest, parser):
+        """
+        Parses every file with "parser" (path -> Geometry.read_data dataframes).
+        Files without data are kept with zero stations, so read() raises like the parser does.
+        """
+        from Objects.Geometry import GEO_COLUMNS, GEO_SCALAR_COLUMNS
+        stations, counts = [], []
+        scalars = np.full((len(paths), len(GEO_SCALAR_COLUMNS)), np.nan)
+        airfoils = np.full((len(paths), 2), "", dtype=object)
+        for i, path in enumerate(paths):
+            try:
+                geo_df, geo_generaldf = parser(path)
+            except ValueError:
+                counts.append(0)
+                continue
+            stations.append(geo_df[GEO_COLUMNS].to_numpy(dtype=np.float64))
+            counts.append(len(geo_df))
+            general = geo_generaldf.iloc[0]
+            scalars[i] = [general.get(col, np.nan) for col in GEO_SCALAR_COLUMNS]
+            airfoils[i] = [general.get("AIRFOIL_1", ""), general.get("AIRFOIL_2", "")]
+
+        stations = np.concatenate(stations) if stations else np.zeros((0, len(GEO_COLUMNS)))
+        station_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return cls([path.name for path in paths], manifest, station_offsets, stations, scalars,
+                   airfoils.astype(str))
+
+    def prop_rows(self, filename):
+        """ (start, stop) station rows of a file in the arrays. """
+        i = self.index.get(filename)
+        if i is None:
+            raise ValueError(f"Propeller file '{filename}' is not in the catalog.")
+        return self.station_offsets[i], self.station_offsets[i + 1]
+
+    def read(self, filename):
+        """ Same dataframes as Geometry.read_data for a PE0 file name. Example "20x10E-PERF.PE0" """
+        start, stop = self.prop_rows(filename)
+        if start == stop:
+            raise ValueError("Error in finding geometry data.")
+
+        from Objects.Geometry import GEO_COLUMNS, GEO_SCALAR_COLUMNS, GEO_GENERAL_COLUMNS
+        i = self.index[filename]
+        general = dict(zip(GEO_SCALAR_COLUMNS, self.scalars[i].tolist()))
+        general["AIRFOIL_1"], general["AIRFOIL_2"] = self.airfoils[i].tolist()
+        geo_df = pd.DataFrame(self.stations[start:stop].copy(), columns=GEO_COLUMNS)
+        geo_generaldf = pd.DataFrame([{col: general[col] for col in GEO_GENERAL_COLUMNS}])
+        return geo_df, geo_generaldf
+
+    def resampled(self, n_points=50, columns=None):
+        """
+        Station tables of every propeller interpolated on a common normalized radius grid r/R, covered by
+        every propeller (largest first station to smallest last station, as some tables stop just short of R).
+        Returns (r/R grid, array (n_files, n_points, n_columns)); files without data are NaN.
+
+        INPUTS
+            n_points = stations of the common grid
+            columns = list of station columns (default: all GEO_COLUMNS)
+        """
+        from Objects.Geometry import GEO_COLUMNS, GEO_SCALAR_COLUMNS
+        from Objects.OperatingPoint import regrid_blocks
+        columns = GEO_COLUMNS if columns is None else columns
+        radius = np.repeat(self.scalars[:, GEO_SCALAR_COLUMNS.index("RADIUS")], np.diff(self.station_offsets))
+        r_R = self.stations[:, GEO_COLUMNS.index("STATION (IN)")] / radius
+
+        has_data = np.diff(self.station_offsets) > 0
+        out = np.full((len(self.files), n_points, len(columns)), np.nan)
+        if not has_data.any():
+            return np.linspace(0.0, 1.0, n_points), out
+
+        # - files without stations hold no rows, so the offsets of the others stay contiguous
+        offsets = np.concatenate([self.station_offsets[:-1][has_data], self.station_offsets[-1:]])
+        grid = np.linspace(r_R[offsets[:-1]].max(), r_R[offsets[1:] - 1].min(), n_points)
+        out[has_data] = regrid_blocks(offsets, r_R, self.stations[:, [GEO_COLUMNS.index(c) for c in columns]], grid)
+        return grid, out
+
+
+class PerformanceTensor():
+    """
+    Memory-mapped (rows, 15) float32 table of the whole catalog, columns as Performance.read_data
+    without "RPM", plus the (prop_id, RPM) -> (start, stop) row index.
+    view() returns zero-copy NumPy views of the mapped file.
+    """
+
+    def __init__(self, data, files, manifest, block_prop, block_rpm, block_offsets):
+        self.data = data
+        self.files = np.asarray(files, dtype=str)
+        self.manifest = manifest
+        self.block_prop = block_prop
+        self.block_rpm = block_rpm
+        self.block_offsets = block_offsets
+        self.prop_ids = [_code_from_filename(name, "perf") for name in self.files.tolist()]
+        self.prop_index = {_normalize_code(prop_id): i for i, prop_id in enumerate(self.prop_ids)}
+        # - blocks of prop i are block_prop_offsets[i]:block_prop_offsets[i + 1]
+        self.block_prop_offsets = np.searchsorted(block_prop, np.arange(len(self.files) + 1))
+
+    @staticmethod
+    def save(catalog, data_path, index_path):
+        """ Writes the float32 table and its index from a PerformanceCatalog (atomically). """
+        for path, writer in ((data_path, lambda file: np.save(file, catalog.values.astype(np.float32))),
+                             (index_path, lambda file: np.savez(
+                                 file, version=CATALOG_VERSION, files=catalog.files, manifest=catalog.manifest,
+                                 block_prop=catalog.block_prop, block_rpm=catalog.block_rpm,
+                                 block_offsets=catalog.block_offsets))):
+            tmp_path = temp_path(path)
+            with open(tmp_path, 'wb') as file:
+                writer(file)
+            os.replace(tmp_path, path)
+
+    @classmethod
+    def open(cls, data_path, index_path):
+        """ Maps a saved table. Returns None if it is missing, unreadable or from another version. """
+        try:
+            with np.load(index_path, allow_pickle=False) as index:
+                if int(index["version"]) != CATALOG_VERSION:
+                    return None
+                arrays = {name: index[name] for name in
+                          ("files", "manifest", "block_prop", "block_rpm", "block_offsets")}
+            data = np.load(data_path, mmap_mode='r')
+        except (OSError, KeyError, ValueError):
+            return None
+        return cls(data, **arrays)
+
+    def is_current(self, files, manifest):
+        """ True if the table was built from exactly these files, mtimes and sizes. """
+        return _same_manifest(self.files, self.manifest, files, manifest)
+
+    def _prop(self, prop):
+        i = self.prop_index.get(_normalize_code(prop))
+        if i is None:
+            raise ValueError(f"Propeller '{prop}' is not in the catalog.")
+        return i
+
+    def rpms(self, prop):
+        """ Available RPM values of a propeller. Example rpms("20x10E") """
+        i = self._prop(prop)
+        return self.block_rpm[self.block_prop_offsets[i]:self.block_prop_offsets[i + 1]]
+
+    def rows(self, prop, rpm=None):
+        """ (start, stop) rows of a propeller, or of one of its RPM blocks. """
+        i = self._prop(prop)
+        b0, b1 = self.block_prop_offsets[i], self.block_prop_offsets[i + 1]
+        if b0 == b1:
+            raise ValueError("Error in finding data.")
+        if rpm is None:
+            return self.block_offsets[b0], self.block_offsets[b1]
+        k = b0 + np.searchsorted(self.block_rpm[b0:b1], rpm)
+        if k == b1 or self.block_rpm[k] != rpm:
+            raise ValueError("RPM not present in data range. \n "
+                             f"The available RPM for this prop are: {self.block_rpm[b0:b1]}")
+        return self.block_offsets[k], self.block_offsets[k + 1]
+
+    def view(self, prop, rpm=None):
+        """ Zero-copy (rows, 15) float32 view of a propeller, or of one RPM block. """
+        start, stop = self.rows(prop, rpm)
+        return self.data[start:stop]
+
+
+def open_tensor(directory, parser):
+    """
+    Returns the memory-mapped table of a PERFILES2 directory, mapping it once per process.
+    It is (re)built from the catalog when missing or when the source files changed (see source_token).
+    """
+    key = str(directory)
+    tensor = _TENSORS.get(key)
+    token = source_token(directory)
+    if tensor is not None and tensor.source_token == token:
+        return tensor
+
+    with _BUILD_LOCK:
+        tensor = _TENSORS.get(key)
+        if tensor is not None and tensor.source_token == token:
+            return tensor
+
+        data_path = catalog_cache_path(directory, "tensor")
+        index_path = catalog_cache_path(directory, "tensor_index")
+        files, _, manifest = catalog_manifest(directory)
+        tensor = PerformanceTensor.open(data_path, index_path)
+        if tensor is None or not tensor.is_current(files, manifest):
+            PerformanceTensor.save(get_catalog(directory, parser), data_path, index_path)
+            tensor = PerformanceTensor.open(data_path, index_path)
+
+        tensor.source_token = _fingerprint(files, manifest)
+        _TENSORS[key] = tensor
+        return tensor
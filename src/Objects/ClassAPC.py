@@ -1,17 +1,122 @@
 
+import os
+import difflib
 from pathlib import Path
 from abc import ABC, abstractmethod
+from Objects.Instrumentation import timed, cache_hit, cache_miss
 
 """ --- Summary of methods 
     1) searchPropeller: verifica se a dada hélice está presente no caminho dado. Retorna o diretório do arquivo.
+       Usa um indice de nomes de arquivo por diretorio (construido uma vez por processo), aceitando
+       codigos com ponto. ex: 18x4.5
 
     A implementar:
         1) metodo para desligar print (**kwargs print=Boolean)
-        2) poder ter ponto no codigo da helice. ex: 18x4.5
-        3) executar Xfoil e Qprop para obter Ct e Cq (criacao de uma classe generica propeller e subclasse APC) 
+        2) executar Xfoil e Qprop para obter Ct e Cq (criacao de uma classe generica propeller e subclasse APC) 
 
 """
 
+def get_cache_dir():
+    """
+    Per-user directory for built data (catalog cache, search index). APC_CACHE_DIR overrides it.
+    It is not created here, only when a store is saved (see Catalog.temp_path): reading never writes to HOME.
+    """
+    path = os.environ.get("APC_CACHE_DIR")
+    if not path:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        path = os.path.join(base, "apc-propeller-finder")
+    return Path(path)
+
+
+# --- Process-wide filename index: {(directory, label): index}, rebuilt when the directory mtime changes
+_FILE_INDEX = {}
+
+
+class PropellerNotFoundError(ValueError):
+    """
+    Raised when a propeller code has no matching data file.
+    The closest known codes are stored in "suggestions" and shown in the message.
+    """
+
+    def __init__(self, code, suggestions=()):
+        self.code = code
+        self.suggestions = list(suggestions)
+        message = f"Propeller '{code}' not found. Verify propeller code."
+        if self.suggestions:
+            message += f" Did you mean: {', '.join(self.suggestions)}?"
+        super().__init__(message)
+
+
+def _code_from_filename(filename, label):
+    """ Returns the propeller code of a data file name ("PER3_10x45MR.dat" -> "10x45MR"), or None. """
+    if label == "perf" and filename.startswith("PER3_") and filename.endswith(".dat"):
+        return filename[len("PER3_"):-len(".dat")]
+    if label == "geo" and filename.endswith("-PERF.PE0"):
+        return filename[:-len("-PERF.PE0")]
+    return None
+
+
+def _normalize_code(code):
+    """ Alias key of a propeller code: no file decorations, dots or spaces, lower case. "10.5x4.5" -> "105x45" """
+    code = str(code).strip()
+    if code.startswith("PER3_"):
+        code = code[len("PER3_"):]
+    for suffix in (".dat", "-PERF.PE0"):
+        if code.endswith(suffix):
+            code = code[:-len(suffix)]
+    return code.replace(".", "").replace(" ", "").lower()
+
+
+def _read_titles(titles_path):
+    """ Reads PER2_TITLEDAT.DAT into {propeller code: title}. Example {"105x45": "10.5x4.5"} """
+    titles = {}
+    if titles_path is None or not os.path.isfile(titles_path):
+        return titles
+    with open(titles_path, 'r') as file:
+        for line in file:
+            values = line.split()
+            if len(values) == 2 and values[0].startswith("PER3_"):
+                titles[_code_from_filename(values[0], "perf")] = values[1]
+    return titles
+
+
+def _build_file_index(directory, label, titles_path, mtime):
+    files = {}    # file name -> path
+    aliases = {}  # normalized code -> file name
+    codes = {}    # normalized code -> propeller code (used in suggestions)
+
+    for root, _, filenames in os.walk(directory):
+        for filename in filenames:
+            code = _code_from_filename(filename, label)
+            if code is None or filename in files:
+                continue
+            files[filename] = Path(root) / filename
+            aliases.setdefault(_normalize_code(code), filename)
+            codes.setdefault(_normalize_code(code), code)
+
+    # - APC titles may differ from the dotless file code. Example: "8x3.7SFR" -> PER3_8x37SFR-PC.dat
+    for code, title in _read_titles(titles_path).items():
+        filename = aliases.get(_normalize_code(code))
+        if filename is not None:
+            aliases.setdefault(_normalize_code(title), filename)
+
+    return {'mtime': mtime, 'files': files, 'aliases': aliases, 'codes': codes}
+
+
+def _get_file_index(directory, label, titles_path=None):
+    """ Returns the filename index of a data directory, building it on first use or when the directory changed. """
+    mtime = os.stat(directory).st_mtime_ns
+    key = (str(directory), label)
+    index = _FILE_INDEX.get(key)
+    if index is None or index['mtime'] != mtime:
+        cache_miss("file_index")
+        index = _build_file_index(directory, label, titles_path, mtime)
+        _FILE_INDEX[key] = index
+    else:
+        cache_hit("file_index")
+    return index
+
+
 class APC_propeller():
     """
     APC Propellers database, containing the geometry and perfomance. 
@@ -34,19 +139,27 @@ class APC_propeller():
             / "APC - Perfomance Data"
             / "PERFILES2"
         )
+        self.titles_path = (
+            BASE_DIR
+            / "APC - Propeller Finder"
+            / "APC - Perfomance Data"
+            / "PER2_TITLEDAT.DAT"
+        )
         self.propeller = None # Propeller name
         self.code = None
         self.directory = None
 
+    @timed("searchPropeller")
     def searchPropeller(self, propeller, label, verbose=False):
         """
         Enters the code of a certain propeller defined by "Diameter x Pitch(Type)" (in inches).
 
         Inputs:
-            propeller = prop code/name. Example "20x10E", "9x10".
+            propeller = prop code/name. Example "20x10E", "9x10", "10.5x4.5".
             label = "geo" for searching in geometry data, "perf for perfomance data
         Output:
             Propeller file directory.
+            Raises PropellerNotFoundError (a ValueError) with the closest codes if not found.
 
         Types of propellers:
             E = Eletric
@@ -61,50 +174,35 @@ class APC_propeller():
             W = Wide
 
         """
-        self.code = str(propeller)
+        self.code = str(propeller).strip()
 
         if label == "geo":
-            geometry_path = Path(self.geometry_path)
+            directory = self.geometry_path
             #verifies if propeller enter code is correct
-            if "-PERF.PE0" in self.code:
-
-                # Procura pelo arquivo nos subdiretórios
-                arquivos_encontrados = list(geometry_path.rglob(self.code))
-
-                if arquivos_encontrados:
-                    if verbose:
-                        print(f"Propeller '{self.code}' found in: {arquivos_encontrados[0]}")
-                    return arquivos_encontrados[0]
-                else:
-                    raise ValueError(f"Propeller '{self.code}' not found. Verify propeller code.")
-
-            else:
-                self.code = propeller + "-PERF.PE0" # atualiza input
-                propeller = self.code
-                return self.searchPropeller(propeller, label, verbose) #chamada recursiva onde os inputs ja foram atualizados
-        
+            if "-PERF.PE0" not in self.code:
+                self.code = self.code + "-PERF.PE0" # atualiza input
+
         elif label == "perf":
-            perf_path = Path(self.perfomance_path)
+            directory = self.perfomance_path
             #verifies if propeller enter code is correct
-            if "PER3_" in self.code:
-
-                # Procura pelo arquivo nos subdiretórios
-                arquivos_encontrados = list(perf_path.rglob(self.code))
-
-                if arquivos_encontrados:
-                    if verbose:
-                        print(f"Propeller '{self.code}' found in: {arquivos_encontrados[0]}")
-                    return arquivos_encontrados[0]
-                else:
-                    raise ValueError(f"Propeller '{self.code}' not found. Verify propeller code.")
-
-            else:
-                self.code = "PER3_" + propeller + ".dat" # atualiza input
-                propeller = self.code
-                return self.searchPropeller(propeller, label) #chamada recursiva onde os inputs ja foram atualizados
+            if "PER3_" not in self.code:
+                self.code = "PER3_" + self.code + ".dat" # atualiza input
         else:
             raise ValueError(f"Invalid label. Verify if it refers to \'geo' or \'perf'." )
 
+        # - O(1) lookup: exact file name first, then normalized alias (ex: "10.5x4.5" -> PER3_105x45.dat)
+        index = _get_file_index(directory, label, self.titles_path)
+        filename = self.code if self.code in index['files'] else index['aliases'].get(_normalize_code(propeller))
+
+        if filename is None:
+            close = difflib.get_close_matches(_normalize_code(propeller), index['codes'].keys(), n=5, cutoff=0.6)
+            raise PropellerNotFoundError(self.code, [index['codes'][key] for key in close])
+
+        self.code = filename
+        if verbose:
+            print(f"Propeller '{self.code}' found in: {index['files'][filename]}")
+        return index['files'][filename]
+
     @abstractmethod
     def read_data(self):
         """ Must be implemented by the subclass. """
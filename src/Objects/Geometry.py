@@ -1,132 +1,254 @@
 import numpy as np
-from matplotlib import pyplot as plt
 import pandas as pd
 import re
+import io
 from Objects.ClassAPC import *
+from Objects.Catalog import get_catalog, GeometryCatalog
+from Objects.Instrumentation import timed, stage, add_bytes, cache_hit, cache_miss, is_enabled
+
+GEO_COLUMNS = ["STATION (IN)", "CHORD (IN)",
+               "PITCH (QUOTED)", "PITCH (LE-TE)", "PITCH (PRATHER)",
+               "SWEEP (IN)", "THICKNESS RATIO",
+               "TWIST (DEG)", "MAX-THICK (IN)",
+               "CROSS-SECTION (IN**2)", "ZHIGH (IN)", "CGY (IN)", "CGZ (IN)"]  # station table columns
+
+# --- Scalar fields: (column, label in the PE0 file). Airfoil lines are "AIRFOILn: station, name"
+GEO_FIELDS = [("RADIUS", "RADIUS"), ("HUBTRA", "HUBTRA"), ("BLADES", "BLADES"),
+              # inertia and area data
+              ("TOTAL WEIGHT (LB)", "TOTAL WEIGHT (LB)"),
+              ("TOTAL WEIGHT (Kg)", "TOTAL WEIGHT (Kg)"),
+              ("TOTAL VOLUME (IN**3)", "TOTAL VOLUME (IN**3)"),
+              ("TOTAL PROJECTED AREA (IN**2)", "TOTAL PROJECTED AREA (IN**2)"),
+              ("MOMENT OF INERTIA (SNAIL-IN**2)", "MOMENT OF INERTIA (SNAIL-IN**2)"),
+              ("MOMENT OF INERTIA (Kg-M**2)", "MOMENT OF INERTIA (Kg-M**2)"),
+              ("STATIC MOMENT, ONE SIDE (IN-LB)", "STATIC MOMENT, ONE SIDE (IN-LB)"),
+              # sanity check data
+              ("DENSITY (S.G.)", "DENSITY (SPECIFIC GRAVITY, INPUT FILE)"),
+              ("DENSITY (LB/IN**3)", "DENSITY (INPUT FILE, LB/IN**3)"),
+              ("AVERAGE DENSITY (LB/IN**3)", "AVERAGE DENSITY (FROM WT & VOL ABOVE, LB/IN**3)"),
+              ("ACTIVITY FACTOR", "ACTIVITY FACTOR"),
+              ("INNER LIMIT (NORMALIZED)", "INNER LIMIT (NORMALIZED)"),
+              # natural frequency data
+              ("NATURAL FREQUENCY (RPM)", "LOWEST NATURAL BENDING FREQUENCY (IN TERMS OF RPM)"),
+              ("MODULUS (MILLION)", "BASED ON MODULUS (MILLION)"),
+              ("MATERIAL DENSITY (S.G.)", "AND, MATERIAL DENSITY (S.G.)"),
+              # airfoil sections
+              ("AIRFOIL_1TR (IN)", "AIRFOIL1"),
+              ("AIRFOIL_2TR (IN)", "AIRFOIL2")]
+GEO_SCALAR_COLUMNS = [col for col, _ in GEO_FIELDS]
+GEO_GENERAL_COLUMNS = ["RADIUS", "HUBTRA", "BLADES", "TOTAL WEIGHT (Kg)",
+                       "TOTAL VOLUME (IN**3)", "TOTAL PROJECTED AREA (IN**2)",
+                       "MOMENT OF INERTIA (Kg-M**2)",
+                       "AIRFOIL_1TR (IN)", "AIRFOIL_1",
+                       "AIRFOIL_2TR (IN)", "AIRFOIL_2"] + \
+                      [col for col in GEO_SCALAR_COLUMNS if col not in
+                       ("RADIUS", "HUBTRA", "BLADES", "TOTAL WEIGHT (Kg)", "TOTAL VOLUME (IN**3)",
+                        "TOTAL PROJECTED AREA (IN**2)", "MOMENT OF INERTIA (Kg-M**2)",
+                        "AIRFOIL_1TR (IN)", "AIRFOIL_2TR (IN)")]  # second read_data dataframe
+
+# --- Parser patterns: one combined pattern for every scalar field ("LABEL: value" or "LABEL = value")
+_FIELD_COLUMN = {label: col for col, label in GEO_FIELDS}
+_FIELD_PATTERN = re.compile(
+    r'^[ \t]*(' + '|'.join(re.escape(label) for _, label in sorted(GEO_FIELDS, key=lambda f: -len(f[1]))) + r')'
+    r'[ \t]*[:=][ \t]*([-+]?(?:NaN|[\d.][-+\d.Ee]*))(?:,[ \t]*([A-Za-z0-9\-_.]+))?', re.M | re.I)  # some files hold -NaN
+_STATION_PATTERN = re.compile(r'^[ \t]*STATION', re.M)
+_BLANK_LINE_PATTERN = re.compile(r'\n[ \t\r]*(?:\n|$)')
 
 class Geometry(APC_propeller):
 
     def __init__(self):
         super().__init__()
 
-    def read_data(self, prop):
+    @timed("geo.read_data")
+    def read_data(self, prop, engine="auto"):
         """
         Method for reading APC Geometry files and saving the data.
         Returns an dataframe containing all respective data.
 
         Inputs:
             prop = propeller name/code. Example "20x10E".
+            engine = "auto" (default) reads from the geometry catalog cache if it was built (see build_catalog),
+                     otherwise (or if the cache directory cannot be used) parses the file as "fast".
+                     The file is stat'ed on every call, so a file edited in place is read again.
+                     "cache" reads from the catalog cache, building it if needed.
+                     "fast" parses the file in one pass (one combined pattern for the scalar fields and
+                     np.loadtxt for the station table), "python" reads the file line by line.
         Outputs:
-            dataframe containing all data in file, except:  MOMENT OF INERTIA (SNAIL-IN**2),
-                 STATIC MOMENT, ONE SIDE (IN-LB),  SANITY CHECK DATA and NATURAL FREQUENCY DATA
+            dataframe containing the station table (GEO_COLUMNS) and
+            dataframe with the scalar data (GEO_GENERAL_COLUMNS): radius, hub transition, blades,
+                inertia and area data, sanity check data, natural frequency data and airfoil sections
         """
 
         geo_DataPath = super().searchPropeller(propeller=prop, label='geo')
 
-        if geo_DataPath is False:
+        if geo_DataPath is None:
             raise ValueError("Error: geometry data path not found.")
 
+        if engine in ("auto", "cache"):
+            try:
+                catalog = get_catalog(self.geometry_path, self._parse_file, build=(engine == "cache"),
+                                      store=GeometryCatalog, path=geo_DataPath)
+            except OSError:
+                if engine == "cache":
+                    raise
+                catalog = None  # - unreadable or unwritable cache directory: parse the file
+            if catalog is not None:
+                cache_hit("geo.catalog")
+                return catalog.read(geo_DataPath.name)
+            cache_miss("geo.catalog")
+            engine = "fast"
+
+        return self._parse_file(geo_DataPath, engine)
+
+    def build_catalog(self):
+        """
+        Parses every PE0 file once into the geometry catalog cache (user cache directory) and returns it.
+        The catalog holds every station table stacked in one array (see Catalog.GeometryCatalog):
+            catalog = Geometry().build_catalog()
+            r_R, chord = catalog.resampled(50, ["CHORD (IN)"])  # (n_props, 50, 1) on a common r/R grid
+        """
+        return get_catalog(self.geometry_path, self._parse_file, build=True, store=GeometryCatalog)
+
+    def bemt(self, props, rpm, v, n_stations=40, workers=1):
+        """
+        Blade element momentum prediction (see BEMT.bemt_sweep) of propellers from their station data,
+        at any RPM and airspeed (inside or outside the PER3 tables).
+        Returns a dictionary of arrays (n_props,) + broadcast(rpm, v).shape: "Ct", "Cp", "Thrust (N)",
+        "PWR (W)", "Torque (N-m)", "Pe", "J".
+
+        Inputs:
+            props = list of propeller codes. Example ["20x10E", "10x7E"]
+            rpm = RPM array (or scalar)
+            v = airspeed array [mph] (as the "V (mph)" column of Performance.read_data)
+            n_stations = blade stations of the solver
+            workers = processes solving chunks of propellers (1 = no process pool)
+        """
+        from Objects.BEMT import BladeGeometry, bemt_sweep, MPH_TO_MS
+        geometry = BladeGeometry.from_catalog(self.build_catalog(), [props] if isinstance(props, str) else props,
+                                              n_stations)
+        with stage("geo.bemt"):
+            return bemt_sweep(geometry, rpm, np.asarray(v, dtype=np.float64) * MPH_TO_MS, workers=workers)
+
+    def _parse_file(self, geo_DataPath, engine="fast"):
+        """ Parses a PE0 file with the given engine ("fast" or "python"). """
+        if engine == "fast":
+            result = self._read_data_fast(geo_DataPath)
+            if result is not None:
+                return result
+            # - station table does not load as one block: fall back to the line parser
+        elif engine != "python":
+            raise ValueError(f"Invalid engine '{engine}'. Use 'auto', 'cache', 'fast' or 'python'.")
+
+        return self._read_data_python(geo_DataPath)
+
+    @staticmethod
+    def _general_df(generalprop_data):
+        """ Second read_data dataframe, GEO_GENERAL_COLUMNS (NaN for missing fields). """
+        if not generalprop_data:
+            raise ValueError("Error in finding geometry data.")
+        return pd.DataFrame({col: [generalprop_data.get(col, np.nan)] for col in GEO_GENERAL_COLUMNS})
+
+    @staticmethod
+    def _add_field(generalprop_data, label, value, airfoil):
+        column = _FIELD_COLUMN[label]
+        generalprop_data[column] = float(value)
+        if airfoil is not None:
+            generalprop_data[f"AIRFOIL_{label[-1]}"] = airfoil
+
+    @timed("geo.parse")
+    def _read_data_fast(self, geo_DataPath):
+        """
+        Single pass parser of a PE0 file: the scalar fields come from one finditer of the combined
+        pattern and the station table (header + 3 lines up to the first blank line) from one np.loadtxt.
+        Returns None if the station table has rows with a different number of columns.
+        Extra columns after the 13 of GEO_COLUMNS (ex: "PITCH (REAL)" in 8x37SFR-PC) are dropped.
+        """
+        with open(geo_DataPath, 'r') as file:
+            text = file.read()
+        add_bytes("geo", len(text))
+
+        # ---------
+        # Read station matrix data
+        # ---------
+        header = _STATION_PATTERN.search(text)
+        if header is None:
+            raise ValueError("Error in finding geometry data.")
+        start = header.start()
+        for _ in range(3):
+            start = text.index('\n', start) + 1
+        end = _BLANK_LINE_PATTERN.search(text, start - 1)
+        table = text[start:end.start() if end is not None else len(text)]
+        if not table.strip():
+            raise ValueError("Error in finding geometry data.")
+        try:
+            stations = np.loadtxt(io.StringIO(table), dtype=np.float64, ndmin=2)
+        except ValueError:
+            return None
+        if stations.shape[1] < len(GEO_COLUMNS):
+            return None
+        stations = stations[:, :len(GEO_COLUMNS)]  # some files add a "PITCH (REAL)" column
+
+        # ---------
+        # Read specific data
+        # ---------
+        generalprop_data = {}
+        for match in _FIELD_PATTERN.finditer(text, header.start()):
+            self._add_field(generalprop_data, *match.groups())
+
+        with stage("geo.dataframe"):
+            geo_df = pd.DataFrame(stations, columns=GEO_COLUMNS)
+            return geo_df, self._general_df(generalprop_data)
+
+    @timed("geo.parse_python")
+    def _read_data_python(self, geo_DataPath):
+        """ Line by line parser of a PE0 file. """
         with open(geo_DataPath, 'r') as file:
             lines = file.readlines()
+        if is_enabled():
+            add_bytes("geo", sum(map(len, lines)))
 
         # ---------
         # Read station matrix data
         # ---------
         data_start = None  # Linha onde começam os dados
-        columns_data1 = ["STATION (IN)", "CHORD (IN)", 
-                  "PITCH (QUOTED)", "PITCH (LE-TE)", "PITCH (PRATHER)",
-                  "SWEEP (IN)", "THICKNESS RATIO", 
-                  "TWIST (DEG)", "MAX-THICK (IN)", 
-                  "CROSS-SECTION (IN**2)", "ZHIGH (IN)", "CGY (IN)", "CGZ (IN)"]
+        data_end = None    # Linha vazia que termina a tabela
         data_1 = []          # Lista para armazenar os dados
+        generalprop_data = {}
 
         # Identificar onde estão os dados
         for i, line in enumerate(lines):
             line = line.strip()
 
             # Identifica a linha do cabeçalho (ex: começa com "STATION")
-            if re.match(r'^STATION', line):
-                data_start = i + 3  
+            if data_start is None:
+                if line.startswith('STATION'):
+                    data_start = i + 3
                 continue
 
             # Lê os dados numéricos após encontrar o cabeçalho e salva numa lista, que será convertida em um dataframe
-            if data_start and i >= data_start:
+            if data_end is None:
+                if i < data_start:
+                    continue
                 if not line:
-                    break  # Para leitura ao encontrar linha vazia
-                    
+                    data_end = i  # Para leitura da tabela ao encontrar linha vazia
+                    continue
                 values = line.split()
-                #print(f"{i}: {values}")
-                if len(values) == len(columns_data1):  # Confere se tem o mesmo número de colunas
-                        data_1.append([float(v) for v in values])
-
-        # ---------
-        # Read specific data
-        # ---------
-        columns_generalprop_data = ["RADIUS", "HUBTRA", "BLADES", "TOTAL WEIGHT (Kg)", 
-                                    "TOTAL VOLUME (IN**3)", "TOTAL PROJECTED AREA (IN**2)",
-                                    "MOMENT OF INERTIA (Kg-M**2)",
-                                    "AIRFOIL_1","AIRFOIL_1TR (IN)", 
-                                    "AIRFOIL_2TR (IN)", "AIRFOIL_2"]
-        generalprop_data = {}
-        for line in lines:
-            line = line.strip()
-
-            if "RADIUS:" in line:
-                match = re.search(r'RADIUS:\s*([\d.]+)', line)
-                if match:
-                    generalprop_data["RADIUS"] = float(match.group(1))
-
-            elif "HUBTRA:" in line:
-                match = re.search(r'HUBTRA:\s*([\d.]+)', line)
-                if match:
-                    generalprop_data["HUBTRA"] = float(match.group(1))
-
-            elif "BLADES:" in line:
-                match = re.search(r'BLADES:\s*(\d+)', line)
-                if match:
-                    generalprop_data["BLADES"] = float(match.group(1))
-
-            elif "TOTAL WEIGHT (Kg)" in line:
-                match = re.search(r'TOTAL WEIGHT \(Kg\)\s*=\s*([-\d.Ee]+)', line)
-                if match:
-                    generalprop_data["TOTAL WEIGHT (Kg)"] = float(match.group(1))
-
-            elif "TOTAL VOLUME (IN**3)" in line:
-                match = re.search(r'TOTAL VOLUME \(IN\*\*3\)\s*=\s*([-\d.Ee]+)', line)
-                if match:
-                    generalprop_data["TOTAL VOLUME (IN**3)"] = float(match.group(1))
-
-            elif "TOTAL PROJECTED AREA (IN**2)" in line:
-                match = re.search(r'TOTAL PROJECTED AREA \(IN\*\*2\)\s*=\s*([-\d.Ee]+)', line)
-                if match:
-                    generalprop_data["TOTAL PROJECTED AREA (IN**2)"] = float(match.group(1))
-
-            elif "MOMENT OF INERTIA (Kg-M**2)" in line:
-                match = re.search(r'MOMENT OF INERTIA \(Kg-M\*\*2\)\s*=\s*([-\d.Ee]+)', line)
-                if match:
-                    generalprop_data["MOMENT OF INERTIA (Kg-M**2)"] = float(match.group(1))
-
-            elif "AIRFOIL1:" in line:
-                match = re.search(r'AIRFOIL1:\s*([-\d.]+),\s*([A-Za-z0-9\-_.]+)', line)
-                if match:
-                    generalprop_data["AIRFOIL_1TR (IN)"] = float(match.group(1)) #Airfoil 1 transition start start station
-                    generalprop_data["AIRFOIL_1"] = match.group(2)
-
-            elif "AIRFOIL2:" in line:
-                match = re.search(r'AIRFOIL2:\s*([-\d.]+),\s*([A-Za-z0-9\-_.]+)', line)
-                if match:
-                    generalprop_data["AIRFOIL_2TR (IN)"] = float(match.group(1)) #Airfoil 2 transition start end station
-                    generalprop_data["AIRFOIL_2"] = match.group(2)
+                if len(values) >= len(GEO_COLUMNS):  # Confere se tem as colunas (algumas tabelas têm "PITCH (REAL)" a mais)
+                    data_1.append([float(v) for v in values[:len(GEO_COLUMNS)]])
+                continue
 
+            # ---------
+            # Read specific data
+            # ---------
+            match = _FIELD_PATTERN.match(line)
+            if match:
+                self._add_field(generalprop_data, *match.groups())
 
         # Se não encontrou os dados, retorna erro
-        if not data_1 or not generalprop_data:
+        if not data_1:
             raise ValueError("Error in finding geometry data.")
 
         # Criar DataFrame
-        geo_df = pd.DataFrame(data_1, columns=columns_data1)
-        geo_generaldf = pd.DataFrame([generalprop_data])
-
-        return geo_df, geo_generaldf
-
+        geo_df = pd.DataFrame(data_1, columns=GEO_COLUMNS)
 
+        return geo_df, self._general_df(generalprop_data)
@@ -0,0 +1,250 @@
+import time
+import logging
+import functools
+import threading
+
+""" --- Opt-in instrumentation ---
+        The library reports what its hot paths cost to a sink, when one is enabled:
+            time    wall time and call count of each stage (ex: "perf.read_data", "perf.parse", "search.range")
+            count   event counters
+            bytes   bytes read from the APC data files ("perf", "geo")
+            cache   hits and misses of each cache (ex: "file_index", "perf.catalog", "search.engine", "model")
+
+            from Objects import Instrumentation
+            sink = Instrumentation.enable()          # MemorySink
+            Performance().read_data("20x10E")
+            sink.summary()                           # dataframe, one line per stage
+
+        Sinks: MemorySink (in-memory collector), LoggingSink (one log record per event) and
+        PrometheusSink (MemorySink with a Prometheus text exposition dump). Any object with a
+        record(kind, name, value) method can be used.
+
+        With no sink enabled (default) every hook is a single global check. The sink is per process:
+        worker processes (preprocess, load_many backend="process") are not recorded.
+"""
+
+_SINK = None
+
+
+class _NullStage():
+    """ Stage used while instrumentation is off: does nothing. """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage():
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        sink = _SINK
+        if sink is not None:
+            sink.record("time", self.name, time.perf_counter() - self.start)
+        return False
+
+
+# --- Hooks used across the library
+
+def is_enabled():
+    """ True if a sink is enabled (guards hooks whose value is costly to compute). """
+    return _SINK is not None
+
+
+def stage(name):
+    """ Context manager timing a stage: with stage("perf.parse"): ... """
+    if _SINK is None:
+        return _NULL_STAGE
+    return _Stage(name)
+
+
+def timed(name):
+    """ Decorator timing every call of a function as the stage "name". """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _SINK is None:
+                return function(*args, **kwargs)
+            with _Stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, value=1):
+    """ Adds value to the event counter "name". """
+    if _SINK is not None:
+        _SINK.record("count", name, value)
+
+
+def add_bytes(name, value):
+    """ Adds value to the bytes read from the source "name". """
+    if _SINK is not None:
+        _SINK.record("bytes", name, value)
+
+
+def cache_hit(name):
+    """ Counts a hit of the cache "name" (the data was served without parsing or rebuilding). """
+    if _SINK is not None:
+        _SINK.record("hit", name, 1)
+
+
+def cache_miss(name):
+    """ Counts a miss of the cache "name" (the data had to be parsed or the cache rebuilt). """
+    if _SINK is not None:
+        _SINK.record("miss", name, 1)
+
+
+# --- Sink control
+
+def enable(sink=None):
+    """ Enables instrumentation with the given sink (default: a new MemorySink) and returns it. """
+    global _SINK
+    _SINK = sink if sink is not None else MemorySink()
+    return _SINK
+
+
+def disable():
+    """ Disables instrumentation. Returns the sink that was enabled (or None). """
+    global _SINK
+    sink, _SINK = _SINK, None
+    return sink
+
+
+def get_sink():
+    return _SINK
+
+
+class instrumented():
+    """
+    Enables a sink inside a with block and restores the previous one afterwards:
+        with instrumented() as sink:
+            PropellerSearchTree().search_by_range(...)
+        print(sink.summary())
+    """
+
+    def __init__(self, sink=None):
+        self.sink = sink if sink is not None else MemorySink()
+
+    def __enter__(self):
+        self.previous = get_sink()
+        enable(self.sink)
+        return self.sink
+
+    def __exit__(self, *exc):
+        global _SINK
+        _SINK = self.previous
+        return False
+
+
+# --- Sinks
+
+class MemorySink():
+    """
+    In-memory collector (thread safe).
+        times = {stage: [calls, total seconds, max seconds]}
+        counts = {name: total}, bytes = {source: total}, caches = {cache: [hits, misses]}
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.times = {}
+            self.counts = {}
+            self.bytes = {}
+            self.caches = {}
+
+    def record(self, kind, name, value):
+        with self._lock:
+            if kind == "time":
+                entry = self.times.setdefault(name, [0, 0.0, 0.0])
+                entry[0] += 1
+                entry[1] += value
+                entry[2] = max(entry[2], value)
+            elif kind == "count":
+                self.counts[name] = self.counts.get(name, 0) + value
+            elif kind == "bytes":
+                self.bytes[name] = self.bytes.get(name, 0) + value
+            elif kind in ("hit", "miss"):
+                self.caches.setdefault(name, [0, 0])[kind == "miss"] += value
+
+    def snapshot(self):
+        """ Copy of the collected data as plain dictionaries (ex: to serialize as JSON). """
+        with self._lock:
+            return {"time": {name: {"calls": calls, "total_s": total, "max_s": peak}
+                             for name, (calls, total, peak) in self.times.items()},
+                    "count": dict(self.counts),
+                    "bytes": dict(self.bytes),
+                    "cache": {name: {"hits": hits, "misses": misses} for name, (hits, misses) in self.caches.items()}}
+
+    def summary(self):
+        """ Dataframe of the stages sorted by total time: calls, total (s), mean (ms), max (ms). """
+        import pandas as pd
+        snapshot = self.snapshot()["time"]
+        df = pd.DataFrame([(name, s["calls"], s["total_s"], s["total_s"] / s["calls"] * 1e3, s["max_s"] * 1e3)
+                           for name, s in snapshot.items()],
+                          columns=["stage", "calls", "total (s)", "mean (ms)", "max (ms)"])
+        return df.sort_values("total (s)", ascending=False, ignore_index=True)
+
+
+class LoggingSink():
+    """ Writes every event to a logger (default: "apc_propeller_finder", DEBUG level). """
+
+    def __init__(self, logger=None, level=logging.DEBUG):
+        self.logger = logger if logger is not None else logging.getLogger("apc_propeller_finder")
+        self.level = level
+
+    def record(self, kind, name, value):
+        if kind == "time":
+            self.logger.log(self.level, "stage %s took %.3f ms", name, value * 1e3)
+        else:
+            self.logger.log(self.level, "%s %s %s", kind, name, value)
+
+
+class PrometheusSink(MemorySink):
+    """ MemorySink whose data can be dumped in the Prometheus text exposition format. """
+
+    def __init__(self, prefix="apc"):
+        super().__init__()
+        self.prefix = prefix
+
+    def dump(self, path=None):
+        """ Prometheus text of the collected data; also written to "path" if given. """
+        snapshot = self.snapshot()
+        p = self.prefix
+        metrics = [
+            (f"{p}_stage_seconds_total", "stage", {n: s["total_s"] for n, s in snapshot["time"].items()}),
+            (f"{p}_stage_calls_total", "stage", {n: s["calls"] for n, s in snapshot["time"].items()}),
+            (f"{p}_stage_max_seconds", "stage", {n: s["max_s"] for n, s in snapshot["time"].items()}),
+            (f"{p}_events_total", "name", snapshot["count"]),
+            (f"{p}_bytes_read_total", "source", snapshot["bytes"]),
+            (f"{p}_cache_hits_total", "cache", {n: c["hits"] for n, c in snapshot["cache"].items()}),
+            (f"{p}_cache_misses_total", "cache", {n: c["misses"] for n, c in snapshot["cache"].items()}),
+        ]
+        lines = []
+        for metric, label, values in metrics:
+            if not values:
+                continue
+            lines.append(f"# TYPE {metric} {'gauge' if metric.endswith('max_seconds') else 'counter'}")
+            lines.extend(f'{metric}{{{label}="{name}"}} {value:.9g}' for name, value in sorted(values.items()))
+        text = "\n".join(lines) + "\n"
+
+        if path is not None:
+            with open(path, "w") as file:
+                file.write(text)
+        return text
@@ -0,0 +1,124 @@
+import os
+import pandas as pd
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from Objects.ClassAPC import APC_propeller, _code_from_filename, _get_file_index
+
+""" --- Parallel loader ---
+        load_many reads many performance (PER3) or geometry (PE0) files with Performance.read_data or
+        Geometry.read_data in a thread or process pool. Files that cannot be read (ex: a PER3 file without
+        data, an unknown code) do not stop the batch: their errors are returned next to the data.
+
+            data, errors = load_many(["20x10E", "9x6E"], kind="perf", workers=8)
+            frame, errors = load_many(kind="perf", workers=32, backend="process", concat=True)
+
+        Parsing holds the GIL for most of a file, so the "process" backend is the one that scales with the
+        number of cores; "thread" avoids the process start-up and the pickling of the results.
+"""
+
+LOAD_KINDS = ("perf", "geo")
+LOAD_BACKENDS = ("thread", "process")
+
+
+def _load_one(job):
+    """ (prop, data, error) of one file. Module level function so it can run in worker processes. """
+    kind, prop, engine = job
+    if kind == "perf":
+        from Objects.Performance import Performance
+        reader = Performance()
+    else:
+        from Objects.Geometry import Geometry
+        reader = Geometry()
+
+    try:
+        return prop, reader.read_data(prop, engine=engine), None
+    except (ValueError, OSError) as error:
+        return prop, None, error
+
+
+def _refresh_catalog(kind, build):
+    """
+    Loads (and rebuilds if outdated) the catalog store once, before the pool starts, so the workers all
+    read the same up to date store: threads share it, processes load the saved file. Without this every
+    worker would rebuild an outdated store itself (each process parsing the whole catalog) and race to
+    save it. Errors are left to the readers.
+    """
+    from Objects.Catalog import get_catalog, PerformanceCatalog, GeometryCatalog
+    if kind == "perf":
+        from Objects.Performance import Performance
+        reader, store = Performance(), PerformanceCatalog
+    else:
+        from Objects.Geometry import Geometry
+        reader, store = Geometry(), GeometryCatalog
+    directory = reader.perfomance_path if kind == "perf" else reader.geometry_path
+    try:
+        get_catalog(directory, reader._parse_file, build=build, store=store)
+    except OSError:
+        pass
+
+
+def catalog_codes(kind="perf"):
+    """ Propeller codes of every data file of a kind ("perf" or "geo"), sorted by file name. """
+    if kind not in LOAD_KINDS:
+        raise ValueError(f"Invalid kind '{kind}'. Use 'perf' or 'geo'.")
+    apc = APC_propeller()
+    directory = apc.perfomance_path if kind == "perf" else apc.geometry_path
+    return [_code_from_filename(name, kind) for name in sorted(_get_file_index(directory, kind)['files'])]
+
+
+def _concat(data):
+    """ One dataframe with a prop_id column from {prop: dataframe}. """
+    frames = [df.assign(prop_id=prop) for prop, df in data.items()]
+    if not frames:
+        return pd.DataFrame()
+    frame = pd.concat(frames, ignore_index=True)
+    return frame[["prop_id"] + [col for col in frame.columns if col != "prop_id"]]
+
+
+def load_many(props=None, kind="perf", workers=None, backend="thread", concat=False, engine="auto"):
+    """
+    Reads many propeller files in parallel.
+    Outputs (data, errors):
+        data = OrderedDict {prop: read_data result} in the order of props, or with concat=True one dataframe
+               with a prop_id column ("geo": a tuple of two dataframes, station tables and scalar data)
+        errors = {prop: exception} of the files that could not be read
+
+    INPUTS
+        props = list of propeller codes/names (default: every file of the kind)
+        kind = "perf" (Performance.read_data) or "geo" (Geometry.read_data)
+        workers = number of threads or processes (default: number of CPUs; 1 = no pool)
+        backend = "thread" or "process"
+        concat = return one dataframe instead of the mapping
+        engine = read_data engine ("auto", "cache", "fast" or "python")
+    """
+    if kind not in LOAD_KINDS:
+        raise ValueError(f"Invalid kind '{kind}'. Use 'perf' or 'geo'.")
+    if backend not in LOAD_BACKENDS:
+        raise ValueError(f"Invalid backend '{backend}'. Use 'thread' or 'process'.")
+
+    props = catalog_codes(kind) if props is None else list(dict.fromkeys(props))
+    jobs = [(kind, prop, engine) for prop in props]
+    if engine in ("auto", "cache"):
+        _refresh_catalog(kind, build=(engine == "cache"))
+
+    workers = min(workers or os.cpu_count() or 1, max(len(jobs), 1))
+    if workers == 1:
+        results = list(map(_load_one, jobs))
+    elif backend == "thread":
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_load_one, jobs))
+    else:
+        chunksize = max(1, len(jobs) // (4 * workers))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_load_one, jobs, chunksize=chunksize))
+
+    data = OrderedDict((prop, result) for prop, result, error in results if error is None)
+    errors = {prop: error for prop, _, error in results if error is not None}
+
+    if concat:
+        if kind == "geo":
+            data = (_concat(OrderedDict((prop, result[0]) for prop, result in data.items())),
+                    _concat(OrderedDict((prop, result[1]) for prop, result in data.items())))
+        else:
+            data = _concat(data)
+    return data, errors
@@ -0,0 +1,203 @@
+import numpy as np
+import pandas as pd
+
+""" --- Motor-propeller matching over the whole catalog ---
+        Equilibrium of a DC motor (constant-Kv model) driving each catalog propeller: the RPM where the
+        motor shaft power equals the power the propeller absorbs at that airspeed.
+            I = (U - N / Kv) / Rm,    P_shaft = (I - I0) N / Kv,    P_in = U I
+        (N in RPM, Kv in RPM/V, U supply voltage). Between two tabulated RPM of a prop the absorbed power
+        is linear in N, so the crossing is the root of a quadratic, solved exactly for every
+        (speed, prop, motor) at once.
+
+        Two sources of propeller data:
+            "tables"  PER3 tables (PWR (W) of each RPM block, interpolated in airspeed as the OperatingPointSolver)
+            "static"  PER2_STATIC-2.DAT, static conditions only (power from its Torque (N-m) column,
+                      more precise than its PWR (Hp) column at low RPM)
+"""
+
+MOTOR_COLUMNS = ["Kv (RPM/V)", "Rm (Ohm)", "I0 (A)", "Voltage (V)", "I max (A)"]
+MATCH_QUANTITIES = ["RPM", "Thrust (N)", "PWR (W)", "Torque (N-m)", "Current (A)", "P in (W)",
+                    "Motor efficiency", "Pe", "System efficiency"]
+
+
+def motor_table(motors):
+    """
+    Motor parameters as a dataframe with a "motor" name column and MOTOR_COLUMNS.
+
+    INPUTS
+        motors = dataframe or dictionary with the MOTOR_COLUMNS (scalars or arrays), or a list of dictionaries.
+                 An optional "motor" column names them (default: 0, 1, 2...).
+                 Example {"Kv (RPM/V)": [920, 1400], "Rm (Ohm)": [0.1, 0.06], "I0 (A)": 0.5,
+                          "Voltage (V)": 11.1, "I max (A)": 30}
+    """
+    if isinstance(motors, dict):
+        sizes = [np.size(value) for value in motors.values()]
+        motors = pd.DataFrame({key: np.broadcast_to(value, (max(sizes),)) for key, value in motors.items()})
+    df = pd.DataFrame(motors).reset_index(drop=True)
+    missing = [col for col in MOTOR_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing motor parameters {missing}. Give {MOTOR_COLUMNS}.")
+    if df.empty:
+        raise ValueError("No motors given.")
+    values = df[MOTOR_COLUMNS].to_numpy(dtype=np.float64)
+    if (values[:, :2] <= 0).any() or (values[:, 2] < 0).any():
+        raise ValueError("Kv and Rm must be positive and I0 not negative.")
+    if "motor" not in df.columns:
+        df.insert(0, "motor", np.arange(len(df)))
+    return df[["motor"] + MOTOR_COLUMNS]
+
+
+class MotorMatcher():
+    """
+    Equilibrium operating points of every catalog propeller driven by one or many motors
+    (see Performance.motor_matcher).
+        matcher = Performance().motor_matcher()
+        result = matcher.solve(motors, speed=[0, 10, 20])     # (speeds, props, motors) arrays
+        matcher.best(motors, speed=15, number=5)              # highest thrust props per (motor, speed)
+    """
+
+    def __init__(self, prop_ids, rpm, at_speed, max_speed):
+        """
+        INPUTS
+            prop_ids = (n_props,) codes
+            rpm = (n_props, n_rpm) RPM of each table slot (NaN where a prop has fewer RPM blocks)
+            at_speed = function (speeds in m/s) -> (speeds, props, n_rpm, 2) float arrays of Thrust (N), PWR (W)
+            max_speed = highest airspeed of the tables [m/s]
+        """
+        self.prop_ids = np.asarray(prop_ids)
+        self.rpm = rpm
+        self._at_speed = at_speed
+        self.max_speed = max_speed
+
+    @classmethod
+    def from_solver(cls, solver):
+        """ Matcher on the PER3 tables of an OperatingPointSolver (its airspeed grid and RPM slots). """
+        return cls(solver.prop_ids, solver.rpm, lambda speed: solver._at_speed(speed)[..., :2], solver.speeds[-1])
+
+    @classmethod
+    def from_static(cls, table):
+        """ Matcher on the PER2_STATIC-2.DAT SummaryTable (static conditions: speed must be 0). """
+        df = table.df
+        prop_codes = df["prop_id"].to_numpy(dtype=str)
+        prop_ids, prop = np.unique(prop_codes, return_inverse=True)
+        counts = np.bincount(prop, minlength=len(prop_ids))
+        slot = np.arange(len(df)) - np.concatenate([[0], np.cumsum(counts)[:-1]])[prop]  # df is sorted by prop, RPM
+
+        rpm = np.full((len(prop_ids), counts.max()), np.nan)
+        data = np.full((1, len(prop_ids), counts.max(), 2), np.nan, dtype=np.float32)
+        rpm[prop, slot] = df["RPM"].to_numpy(dtype=np.float64)
+        data[0, prop, slot, 0] = df["Thrust (N)"].to_numpy()
+        data[0, prop, slot, 1] = df["Torque (N-m)"].to_numpy() * rpm[prop, slot] * 2 * np.pi / 60
+        return cls(prop_ids, rpm, lambda speed: np.broadcast_to(data, (len(speed),) + data.shape[1:]), 0.0)
+
+    def solve(self, motors, speed=0.0, chunk_size=2 ** 21):
+        """
+        Equilibrium of every (speed, prop, motor). Returns (motors dataframe, dictionary of arrays
+        (n_speeds, n_props, n_motors)) with the MATCH_QUANTITIES and "Over current" (equilibrium current above
+        I max). NaN where the equilibrium RPM is outside the tabulated RPM of the prop at that speed.
+        When the curves cross several times, the lowest RPM is taken.
+
+        INPUTS
+            motors = motor parameters (see motor_table)
+            speed = airspeed [m/s], scalar or array
+            chunk_size = (speed, prop, motor, RPM) elements solved together
+        """
+        motors = motor_table(motors)
+        kv, rm, i0, voltage, i_max = motors[MOTOR_COLUMNS].to_numpy(dtype=np.float64).T
+        speed = np.atleast_1d(np.asarray(speed, dtype=np.float64)).ravel()
+        if ((speed < 0) | (speed > self.max_speed)).any():
+            raise ValueError(f"Airspeeds must be between 0 and {self.max_speed:.3f} m/s for this data source.")
+
+        n_props, n_rpm = self.rpm.shape
+        shape = (speed.size, n_props, len(motors))
+        results = {col: np.full(shape, np.nan) for col in MATCH_QUANTITIES}
+        results["Over current"] = np.zeros(shape, dtype=bool)
+        if n_rpm < 2:
+            return motors, results
+
+        # - motor shaft power P(N) = a N - b N^2
+        a = (voltage / rm - i0) / kv
+        b = 1 / (rm * kv ** 2)
+        rpm = self.rpm[None, :, None, :]
+        step = max(1, chunk_size // (n_props * n_rpm * len(motors)))
+        for q0 in range(0, speed.size, step):
+            q1 = min(q0 + step, speed.size)
+            table = np.asarray(self._at_speed(speed[q0:q1]), dtype=np.float64)[:, :, None]  # (q, props, 1, rpm, 2)
+            power = table[..., 1]
+            g = a[:, None] * rpm - b[:, None] * rpm ** 2 - power                     # (q, props, motors, rpm)
+
+            # - first RPM interval [k, k + 1] where the motor power falls below the prop power
+            cross = (g[..., :-1] > 0) & (g[..., 1:] <= 0)
+            k = np.argmax(cross, axis=-1)[..., None]
+            found = cross.any(axis=-1)
+
+            def at(values, offset):
+                return np.take_along_axis(np.broadcast_to(values, g.shape), k + offset, axis=-1)[..., 0]
+
+            n0, n1 = at(rpm, 0), at(rpm, 1)
+            p0, p1 = at(power, 0), at(power, 1)
+            t0, t1 = at(table[..., 0], 0), at(table[..., 0], 1)
+
+            # - exact crossing of P_shaft(N) and the linear prop power: larger root of a N - b N^2 = p0 + s (N - n0)
+            slope = (p1 - p0) / (n1 - n0)
+            c = a - slope
+            discriminant = np.maximum(c ** 2 - 4 * b * (p0 - slope * n0), 0.0)
+            n = np.where(found, (c + np.sqrt(discriminant)) / (2 * b), np.nan)
+            f = (n - n0) / (n1 - n0)
+
+            thrust = t0 + f * (t1 - t0)
+            shaft = p0 + f * (p1 - p0)
+            current = (voltage - n / kv) / rm
+            p_in = voltage * current
+            with np.errstate(divide='ignore', invalid='ignore'):
+                out = {"RPM": n, "Thrust (N)": thrust, "PWR (W)": shaft,
+                       "Torque (N-m)": shaft / (n * 2 * np.pi / 60),
+                       "Current (A)": current, "P in (W)": p_in,
+                       "Motor efficiency": shaft / p_in,
+                       "Pe": np.where(shaft > 0, thrust * speed[q0:q1, None, None] / shaft, np.nan),
+                       "System efficiency": thrust * speed[q0:q1, None, None] / p_in}
+            for col, value in out.items():
+                results[col][q0:q1] = value
+            results["Over current"][q0:q1] = found & (current > i_max)
+        return motors, results
+
+    def best(self, motors, speed=0.0, number=5, sort_by="Thrust (N)", ascending=False, current_limit=True):
+        """
+        Ranked propellers for every (motor, speed). Returns a dataframe with "number" rows per (motor, speed)
+        (fewer if less props reach an equilibrium): motor, V (m/s), rank, prop_id and MATCH_QUANTITIES.
+
+        INPUTS
+            motors = motor parameters (see motor_table)
+            speed = airspeed [m/s], scalar or array
+            number = props per (motor, speed)
+            sort_by = ranking quantity (one of MATCH_QUANTITIES), highest first unless ascending
+            current_limit = drop the equilibria above the motor current limit
+        """
+        if sort_by not in MATCH_QUANTITIES:
+            raise ValueError(f"Invalid sort_by '{sort_by}'. Use one of {MATCH_QUANTITIES}.")
+        motors, results = self.solve(motors, speed)
+        speed = np.atleast_1d(np.asarray(speed, dtype=np.float64)).ravel()
+
+        # - (speed, motor) rows, props in the columns
+        score = results[sort_by] if ascending else -results[sort_by]
+        valid = ~np.isnan(score) & ~(current_limit & results["Over current"])
+        score = np.where(valid, score, np.inf).transpose(0, 2, 1).reshape(-1, len(self.prop_ids))
+
+        number = min(number, score.shape[1])
+        best = np.argpartition(score, number - 1, axis=1)[:, :number] if number < score.shape[1] \
+            else np.tile(np.arange(score.shape[1]), (score.shape[0], 1))
+        best = np.take_along_axis(best, np.argsort(np.take_along_axis(score, best, axis=1), axis=1, kind='stable'),
+                                  axis=1)
+        row = np.repeat(np.arange(score.shape[0]), number)
+        prop = best.ravel()
+        keep = np.isfinite(score[row, prop])
+        row, prop = row[keep], prop[keep]
+        q, m = np.divmod(row, len(motors))
+
+        ranked = pd.DataFrame({"motor": motors["motor"].to_numpy()[m],
+                               "V (m/s)": speed[q],
+                               "rank": np.tile(np.arange(1, number + 1), score.shape[0])[keep],
+                               "prop_id": self.prop_ids[prop]})
+        for col in MATCH_QUANTITIES + ["Over current"]:
+            ranked[col] = results[col][q, prop, m]
+        return ranked.reset_index(drop=True)
@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+""" --- Mission energy over the whole catalog ---
+        A mission profile is a list of segments (climb, cruise, loiter...), each flown at an airspeed with a
+        required thrust for a duration. For every segment the OperatingPointSolver finds, for all the props at
+        once, the RPM giving that thrust at that airspeed and the shaft power it draws; the energy is the sum of
+        power x duration over the segments.
+
+        Segments are flagged when the thrust is not reachable inside the PER3 tables of a prop (envelope)
+        or when the matching RPM is outside its PER2_RPMRANGE.DAT limits.
+"""
+
+MISSION_COLUMNS = ["V (m/s)", "Thrust (N)", "Duration (s)"]
+J_TO_WH = 1 / 3600
+
+
+def mission_profile(segments):
+    """
+    Mission segments as a dataframe with a "segment" name column and MISSION_COLUMNS.
+
+    INPUTS
+        segments = dataframe or dictionary with the MISSION_COLUMNS (arrays or scalars), or a list of dictionaries.
+                   An optional "segment" column names them (default: 0, 1, 2...).
+                   Example {"segment": ["climb", "cruise", "loiter"], "V (m/s)": [12, 20, 15],
+                            "Thrust (N)": [25, 12, 10], "Duration (s)": [60, 900, 600]}
+    """
+    if isinstance(segments, dict):
+        sizes = [np.size(value) for value in segments.values()]
+        segments = pd.DataFrame({key: np.broadcast_to(value, (max(sizes),)) for key, value in segments.items()})
+    df = pd.DataFrame(segments).reset_index(drop=True)
+    missing = [col for col in MISSION_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing mission columns {missing}. Give {MISSION_COLUMNS}.")
+    if df.empty:
+        raise ValueError("The mission has no segments.")
+    if (df[MISSION_COLUMNS].to_numpy(dtype=np.float64) < 0).any():
+        raise ValueError("Airspeed, thrust and duration must not be negative.")
+    if "segment" not in df.columns:
+        df.insert(0, "segment", np.arange(len(df)))
+    return df[["segment"] + MISSION_COLUMNS]
+
+
+def mission_energy(solver, segments, rpm_bounds=None):
+    """
+    Segment by segment solution of a mission for every prop of the solver.
+    Returns (segments dataframe, dictionary of (n_segments, n_props) arrays):
+        "RPM", "PWR (W)", "Pe", "Energy (J)"   NaN where the thrust is outside the prop tables
+        "Outside envelope"                     thrust not reachable inside the tables at that airspeed
+        "Outside RPM range"                    RPM outside the (min, max) RPM bounds of the prop
+
+    INPUTS
+        solver = OperatingPointSolver
+        segments = mission segments (see mission_profile)
+        rpm_bounds = optional (rpm_min, rpm_max) arrays (n_props,) (NaN bounds are not checked)
+    """
+    segments = mission_profile(segments)
+    speed, thrust, duration = segments[MISSION_COLUMNS].to_numpy(dtype=np.float64).T
+    solved = solver.solve(speed, thrust=thrust)
+
+    results = {"RPM": solved["RPM"], "PWR (W)": solved["PWR (W)"], "Pe": solved["Pe"],
+               "Energy (J)": solved["PWR (W)"] * duration[:, None],
+               "Outside envelope": np.isnan(solved["RPM"])}
+    outside = np.zeros(results["RPM"].shape, dtype=bool)
+    if rpm_bounds is not None:
+        rpm_min, rpm_max = rpm_bounds
+        outside = (results["RPM"] < rpm_min[None, :]) | (results["RPM"] > rpm_max[None, :])
+    results["Outside RPM range"] = outside
+    return segments, results
+
+
+def rank_mission(prop_ids, segments, results, top_k=None):
+    """
+    Ranked table of a mission_energy result, one row per prop: props flying every segment inside their
+    tables and RPM range first, by increasing energy; then the others, by fewer flagged segments and energy.
+    Energy is NaN for props with a segment outside the envelope.
+    Columns: rank, prop_id, Energy (J), Energy (Wh), Max power (W), Mean power (W), Max RPM,
+             Min Pe (segments with airspeed), Segments outside envelope, Segments outside RPM range, Feasible,
+             Worst segment (highest power).
+    """
+    duration = segments["Duration (s)"].to_numpy(dtype=np.float64)
+    envelope = results["Outside envelope"]
+    rpm_range = results["Outside RPM range"]
+    power = results["PWR (W)"]
+    inside = ~envelope.any(axis=0)
+
+    energy = np.where(inside, np.nansum(results["Energy (J)"], axis=0), np.nan)
+    total_time = duration.sum()
+    with np.errstate(invalid='ignore'):
+        max_power = np.where(inside, np.nanmax(np.where(envelope, -np.inf, power), axis=0), np.nan)
+        moving = (segments["V (m/s)"].to_numpy() > 0)[:, None] & ~envelope
+        min_pe = np.nanmin(np.where(moving, results["Pe"], np.inf), axis=0)
+        max_rpm = np.nanmax(np.where(envelope, -np.inf, results["RPM"]), axis=0)
+    worst = np.argmax(np.where(envelope, -np.inf, power), axis=0)
+
+    n_envelope = envelope.sum(axis=0)
+    n_rpm_range = rpm_range.sum(axis=0)
+    feasible = inside & (n_rpm_range == 0)
+
+    # - feasible first (by energy), then fewer flagged segments, then energy
+    order = np.lexsort((np.where(np.isnan(energy), np.inf, energy), n_envelope + n_rpm_range, ~feasible))
+    if top_k is not None:
+        order = order[:top_k]
+
+    return pd.DataFrame({"rank": np.arange(1, len(order) + 1),
+                         "prop_id": np.asarray(prop_ids)[order],
+                         "Energy (J)": energy[order],
+                         "Energy (Wh)": energy[order] * J_TO_WH,
+                         "Max power (W)": max_power[order],
+                         "Mean power (W)": energy[order] / total_time if total_time > 0 else np.nan,
+                         "Max RPM": np.where(np.isfinite(max_rpm), max_rpm, np.nan)[order],
+                         "Min Pe": np.where(np.isfinite(min_pe), min_pe, np.nan)[order],
+                         "Segments outside envelope": n_envelope[order],
+                         "Segments outside RPM range": n_rpm_range[order],
+                         "Feasible": feasible[order],
+                         "Worst segment": segments["segment"].to_numpy()[worst][order]})
@@ -0,0 +1,207 @@
+import numpy as np
+import pandas as pd
+from Objects.ClassAPC import _code_from_filename
+
+""" --- Operating-point solver over the whole PERFILES2 catalog ---
+        Every (prop, RPM) table is regridded once on a common airspeed grid, giving
+            cube   (n_speeds, n_props, n_rpm, 3) float32 with Thrust (N), PWR (W) and Pe
+            rpm    (n_props, n_rpm) RPM of each slot (NaN where a prop has fewer RPM blocks)
+        For a target (V, power) or (V, thrust) the cube is interpolated in V for every prop and RPM,
+        and the matching RPM of each prop is found by linear interpolation between the two RPM blocks
+        that bracket the target: the same bilinear (RPM, V) interpolation as Performance.performance_map.
+        Targets are solved in chunks, all props at once.
+"""
+
+MPH_TO_MS = 0.44704
+SOLVER_QUANTITIES = ["Thrust (N)", "PWR (W)", "Pe"]
+
+# --- Built solvers: {n_speeds: solver}, reused while their catalog is the loaded one
+_SOLVERS = {}
+
+
+def regrid_blocks(block_offsets, x, ys, grid, clamp=False):
+    """
+    Linear interpolation of many tables at once on a common grid (no Python loop per table).
+    Returns an array (n_blocks, len(grid), n_y); grid points outside the x range of a table are NaN,
+    or the first/last value of the table if clamp is True (as np.interp).
+
+    INPUTS
+        block_offsets = (n_blocks + 1) row offsets of each table in x and ys
+        x = (rows,) abscissa, increasing inside each table (ex: "V (mph)")
+        ys = (rows, n_y) ordinates
+        grid = (n_grid,) common abscissa
+        clamp = extend the tables with their edge values
+    """
+    n_blocks = len(block_offsets) - 1
+    starts, stops = block_offsets[:-1], block_offsets[1:]
+    block = np.repeat(np.arange(n_blocks), stops - starts)
+
+    # - per table binary search: tables are shifted apart on one sorted key
+    origin = min(x.min(), grid.min())
+    span = max(x.max(), grid.max()) - origin + 1.0
+    key = block * span + (x - origin)
+    query = np.arange(n_blocks)[:, None] * span + (grid[None, :] - origin)
+    lower = np.searchsorted(key, query, side='right') - 1
+    lower = np.clip(lower, starts[:, None], np.maximum(stops[:, None] - 2, starts[:, None]))
+    upper = np.minimum(lower + 1, stops[:, None] - 1)
+
+    dx = x[upper] - x[lower]
+    t = np.divide(grid[None, :] - x[lower], dx, out=np.zeros(dx.shape), where=dx != 0)
+    if clamp:
+        np.clip(t, 0.0, 1.0, out=t)
+    out = ys[lower] + t[..., None] * (ys[upper] - ys[lower])
+    if clamp:
+        return out
+
+    inside = (grid[None, :] >= x[starts][:, None]) & (grid[None, :] <= x[stops - 1][:, None])
+    out[~inside] = np.nan
+    return out
+
+
+class OperatingPointSolver():
+    """
+    Solves operating points (airspeed + power, or airspeed + thrust) for every catalog prop at once.
+    Built from a PerformanceCatalog (see Performance.operating_point_solver).
+    """
+
+    def __init__(self, catalog, n_speeds=256):
+        """
+        INPUTS
+            catalog = PerformanceCatalog
+            n_speeds = points of the common airspeed grid (0 to the highest tabulated airspeed), at least 2
+        """
+        if n_speeds < 2:
+            raise ValueError(f"n_speeds must be at least 2 (got {n_speeds}): the airspeed grid needs two points.")
+        self.catalog = catalog
+        self.prop_ids = np.array([_code_from_filename(name, "perf") for name in catalog.files.tolist()])
+
+        # - blocks ordered by (prop, RPM); slot = position of the block inside its prop
+        order = np.lexsort((catalog.block_rpm, catalog.block_prop))
+        block_prop = catalog.block_prop[order]
+        counts = np.bincount(block_prop, minlength=len(self.prop_ids))
+        slot = np.arange(len(order)) - np.concatenate([[0], np.cumsum(counts)[:-1]])[block_prop]
+        n_rpm = int(counts.max()) if counts.size else 0
+
+        # - table rows of the ordered blocks
+        starts = catalog.block_offsets[:-1][order]
+        stops = catalog.block_offsets[1:][order]
+        rows = np.concatenate([np.arange(a, b) for a, b in zip(starts, stops)]) if len(order) \
+            else np.zeros(0, dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(stops - starts)]).astype(np.int64)
+
+        from Objects.Performance import PERF_COLUMNS
+        columns = [PERF_COLUMNS.index(col) for col in SOLVER_QUANTITIES]
+        v_mph = catalog.values[rows, PERF_COLUMNS.index("V (mph)")]
+
+        self.speeds = np.linspace(0.0, v_mph.max() * MPH_TO_MS if v_mph.size else 0.0, n_speeds)
+        grid = regrid_blocks(offsets, v_mph * MPH_TO_MS, catalog.values[rows][:, columns], self.speeds)
+
+        self.cube = np.full((n_speeds, len(self.prop_ids), n_rpm, len(columns)), np.nan, dtype=np.float32)
+        self.cube[:, block_prop, slot] = grid.transpose(1, 0, 2)
+        self.rpm = np.full((len(self.prop_ids), n_rpm), np.nan)
+        self.rpm[block_prop, slot] = catalog.block_rpm[order]
+
+    def _at_speed(self, speed):
+        """ (targets, props, rpm, quantities) cube interpolated at each airspeed (m/s). NaN outside the grid. """
+        step = self.speeds[1] - self.speeds[0]
+        position = speed / step
+        i0 = np.clip(np.floor(position).astype(np.int64), 0, len(self.speeds) - 2)
+        t = (position - i0).astype(np.float32)[:, None, None, None]
+        out = self.cube[i0] * (1 - t) + self.cube[i0 + 1] * t
+        out[(speed < 0) | (speed > self.speeds[-1])] = np.nan
+        return out
+
+    def solve(self, speed, power=None, thrust=None, chunk_size=128):
+        """
+        Matching RPM of every prop for each target, with exactly one of power or thrust given.
+        Returns a dictionary of (n_targets, n_props) arrays: "RPM", "Thrust (N)", "PWR (W)", "Pe".
+        NaN where the target is outside the prop tables (ex: more power than the highest RPM absorbs).
+        When several RPM match, the lowest is taken.
+
+        INPUTS
+            speed = airspeed [m/s], scalar or array
+            power = shaft power [W], scalar or array
+            thrust = thrust [N], scalar or array
+        """
+        if (power is None) == (thrust is None):
+            raise ValueError("Give either power or thrust.")
+        target_col = 1 if power is not None else 0
+        speed, target = np.broadcast_arrays(np.asarray(speed, dtype=np.float64),
+                                            np.asarray(power if power is not None else thrust, dtype=np.float64))
+        speed, target = speed.ravel(), target.ravel()
+
+        n_targets, n_props = speed.size, len(self.prop_ids)
+        results = {col: np.full((n_targets, n_props), np.nan) for col in ["RPM"] + SOLVER_QUANTITIES}
+        if self.rpm.shape[1] < 2:
+            return results
+
+        for q0 in range(0, n_targets, chunk_size):
+            q1 = min(q0 + chunk_size, n_targets)
+            table = self._at_speed(speed[q0:q1])                            # (q, props, rpm, 3)
+            s = table[..., target_col] - target[q0:q1, None, None].astype(np.float32)
+
+            # - first RPM interval [k, k + 1] where the target is crossed
+            cross = (s[..., :-1] <= 0) & (s[..., 1:] > 0)
+            k = np.argmax(cross, axis=-1)[..., None]
+            found = cross.any(axis=-1)
+            s0 = np.take_along_axis(s, k, axis=-1)[..., 0]
+            s1 = np.take_along_axis(s, k + 1, axis=-1)[..., 0]
+            with np.errstate(divide='ignore', invalid='ignore'):   # props without a crossing are NaN below
+                f = s0 / (s0 - s1)
+
+            rpm0 = np.take_along_axis(np.broadcast_to(self.rpm, s.shape), k, axis=-1)[..., 0]
+            rpm1 = np.take_along_axis(np.broadcast_to(self.rpm, s.shape), k + 1, axis=-1)[..., 0]
+            results["RPM"][q0:q1] = np.where(found, rpm0 + f * (rpm1 - rpm0), np.nan)
+            for j, col in enumerate(SOLVER_QUANTITIES):
+                v0 = np.take_along_axis(table[..., j], k, axis=-1)[..., 0]
+                v1 = np.take_along_axis(table[..., j], k + 1, axis=-1)[..., 0]
+                with np.errstate(invalid='ignore'):
+                    results[col][q0:q1] = np.where(found, v0 + f * (v1 - v0), np.nan)
+
+        # - the solved quantity is the target itself (removes float32 rounding)
+        solved = SOLVER_QUANTITIES[target_col]
+        results[solved] = np.where(np.isnan(results["RPM"]), np.nan, target[:, None])
+        return results
+
+    def best(self, speed, power=None, thrust=None, number=5):
+        """
+        Ranked props for each target: highest thrust for a given power, or lowest power for a given thrust.
+        Returns a dataframe with "number" rows per target (fewer if less props reach it).
+
+        INPUTS
+            speed = airspeed [m/s], scalar or array
+            power = shaft power [W], scalar or array
+            thrust = thrust [N], scalar or array
+            number = props per target
+        """
+        results = self.solve(speed, power=power, thrust=thrust)
+        score = -results["Thrust (N)"] if power is not None else results["PWR (W)"]
+        score = np.where(np.isnan(score), np.inf, score)
+
+        number = min(number, score.shape[1])
+        best = np.argpartition(score, number - 1, axis=1)[:, :number] if number < score.shape[1] \
+            else np.tile(np.arange(score.shape[1]), (score.shape[0], 1))
+        best = np.take_along_axis(best, np.argsort(np.take_along_axis(score, best, axis=1), axis=1, kind='stable'),
+                                  axis=1)
+        target = np.repeat(np.arange(score.shape[0]), number)
+        prop = best.ravel()
+        keep = np.isfinite(score[target, prop])
+
+        speed = np.broadcast_arrays(np.asarray(speed, dtype=np.float64),
+                                    np.asarray(power if power is not None else thrust))[0].ravel()
+        ranked = pd.DataFrame({"target": target[keep],
+                               "rank": np.tile(np.arange(1, number + 1), score.shape[0])[keep],
+                               "prop_id": self.prop_ids[prop[keep]],
+                               "V (m/s)": speed[target[keep]]})
+        for col in ["RPM"] + SOLVER_QUANTITIES:
+            ranked[col] = results[col][target[keep], prop[keep]]
+        return ranked.reset_index(drop=True)
+
+
+def get_operating_point_solver(catalog, n_speeds=256):
+    """ Returns the solver of a catalog, building it once per process (and again if the catalog was rebuilt). """
+    solver = _SOLVERS.get(n_speeds)
+    if solver is None or solver.catalog is not catalog:
+        solver = OperatingPointSolver(catalog, n_speeds)
+        _SOLVERS[n_speeds] = solver
+    return solver
@@ -1,53 +1,313 @@
 import numpy as np
-from matplotlib import pyplot as plt
-import matplotlib.cm as cm
-import matplotlib.colors as mcolors
 import pandas as pd
 import re
 import os
+import io
 from Objects.ClassAPC import *
-import scienceplots
-from scipy.interpolate import RegularGridInterpolator
-
-#from sklearn.linear_model import LinearRegression
-#from sklearn.preprocessing import PolynomialFeatures
+from Objects.ClassAPC import _code_from_filename, _get_file_index, _normalize_code
+from Objects.Instrumentation import timed, stage, add_bytes, cache_hit, cache_miss, is_enabled
+from Objects.Catalog import get_catalog, open_tensor
+from Objects.OperatingPoint import get_operating_point_solver
+from Objects.Matching import MotorMatcher
+from Objects.Mission import mission_energy, rank_mission
+from Objects.PropellerModel import PropellerModel, get_model
+from Objects.Surrogate import SurrogateCatalog
 
 """ --- METHODS ---
         1) read_apc_perfomance_data: read each rpm and saves in a dataframe
 
-        To implement:
-        2) find_StaticThurst_for_Power
-        3) findProp_power(perfomancePath, Power, number)
-            perfomancePath = folder that contains APC perfomance data ".dat" archives
+        2) operating_point_solver: matching RPM of every propeller for (airspeed, power/thrust) targets
+        3) findProp_power(Power, number, V)
             Power [W]
-            number = number of closest propellers to Power
-            This function searches the highest static thrusts for cloesest given Power data
+            number = number of propellers
+            V = airspeed [m/s], 0 for static thrust
+            This function searches the highest thrusts for the given Power
+
+        To implement:
         4) DynamicThrust
             Show v_air x Thurst curve for APC given data
         5) comparePropellers
 
 """
 
+PERF_COLUMNS = ["V (mph)", "J (Adv_Ratio)", "Pe", "Ct", "Cp", 
+                "PWR (Hp)", "Torque (In-Lbf)", "Thrust (Lbf)", 
+                "PWR (W)", "Torque (N-m)", "Thrust (N)", 
+                "THR/PWR (g/W)", "Mach", "Reyn", "FOM"]  # PER3 table columns, without "RPM"
+
+def _pyplot():
+    """
+    Imports the plotting dependencies (matplotlib and the scienceplots styles) on first use,
+    so reading and searching data does not load them.
+    """
+    from matplotlib import pyplot as plt
+    import scienceplots
+    return plt
+
+# --- Propeller id in PER3 file names: [Diameter] x [Pitch] [Type]. Example PER3_27x13E.dat
+_PROP_ID_PATTERN = re.compile(r"PER3_((\d+\.?\d*)x(\d+\.?\d*)(.*?))\.dat")
+
+# --- Fast parser (engine="fast") patterns
+_RPM_PATTERN = re.compile(rb'PROP RPM =[ \t]+(\d+)')
+_HEADER_PATTERN = re.compile(rb'V[ \t]+J[ \t]+Pe[ \t]+Ct')  # must also start its line, checked in the parser
+
+def parse_prop_id(archive_filename):
+    """
+    Splits a PER3 file name into (prop id, diameter, type), without opening the file.
+    Example: "PER3_27x13E.dat" -> ("27x13E", "27", "E"). Files without a type are "Standard".
+    """
+    match = _PROP_ID_PATTERN.search(archive_filename)
+    if match:
+        prop_id = match.group(1)   # Full ID
+        diameter = match.group(2)  # Number before 'x'
+        prop_type = match.group(4) if match.group(4) else "Standard"
+        return prop_id, diameter, prop_type
+    else:
+        raise ValueError(f"ERROR in finding ID pattern. File error = {archive_filename}")
+
+
+def _catalog_filter(where):
+    """ Predicate (prop_id, diameter, prop_type) -> bool of an iter_catalog where argument (callable or dictionary). """
+    if where is None or callable(where):
+        return where
+
+    unknown = set(where) - {"prop_id", "prop_type", "D (in)"}
+    if unknown:
+        raise ValueError(f"Invalid where keys {sorted(unknown)}. Use 'prop_id', 'prop_type' or 'D (in)'.")
+    as_set = lambda val: {val} if isinstance(val, str) else set(val)
+    prop_ids = {_normalize_code(p) for p in as_set(where["prop_id"])} if "prop_id" in where else None
+    prop_types = as_set(where["prop_type"]) if "prop_type" in where else None
+    d_min, d_max = where.get("D (in)", (None, None))
+
+    def predicate(prop_id, diameter, prop_type):
+        diameter = float(diameter)
+        return ((prop_ids is None or _normalize_code(prop_id) in prop_ids)
+                and (prop_types is None or prop_type in prop_types)
+                and (d_min is None or diameter >= d_min)
+                and (d_max is None or diameter <= d_max))
+    return predicate
+
+
 class Performance(APC_propeller): 
 
     def __init__(self):
         super().__init__()
 
-    def read_data(self, prop):
+    @timed("perf.read_data")
+    def read_data(self, prop, engine="auto"):
         """
         Method for reading APC Performance files and saving the data.
         Returns an dataframe containing all respective data from each RPM.
 
         INPUTS:
             prop = propeller name/code. Example "20x10E".
+            engine = "auto" (default) reads from the catalog cache if it was built (see build_catalog),
+                     otherwise (or if the cache directory cannot be used) parses the file as "fast".
+                     The file is stat'ed on every call, so a file edited in place is read again.
+                     "cache" reads from the catalog cache, building it if needed.
+                     "fast" decodes the fixed-width tables in bulk with NumPy,
+                     "python" reads the file line by line. All return the same dataframe.
         """
         perf_DataPath = super().searchPropeller(propeller=prop, label='perf')
 
         if perf_DataPath is None:
             raise ValueError("Error: perfomance data path not found.")
 
+        if engine in ("auto", "cache"):
+            try:
+                catalog = get_catalog(self.perfomance_path, self._parse_file, build=(engine == "cache"),
+                                      path=perf_DataPath)
+            except OSError:
+                if engine == "cache":
+                    raise
+                catalog = None  # - unreadable or unwritable cache directory: parse the file
+            if catalog is not None:
+                cache_hit("perf.catalog")
+                return catalog.read(perf_DataPath.name)
+            cache_miss("perf.catalog")
+            engine = "fast"
+
+        return self._parse_file(perf_DataPath, engine)
+
+    def build_catalog(self):
+        """
+        Parses every PERFILES2 file once into the catalog cache (user cache directory) and returns it.
+        Afterwards read_data reads slices of the cache; it is rebuilt when the APC files change.
+        """
+        return get_catalog(self.perfomance_path, self._parse_file, build=True)
+
+    def open_tensor(self):
+        """
+        Memory-mapped float32 table of the whole catalog (see Catalog.PerformanceTensor).
+        Processes share it through the OS page cache and get zero-copy views without parsing:
+            tensor = Performance().open_tensor()
+            tensor.view("20x10E", rpm=5000)  # (rows, 15) columns as read_data without "RPM"
+        """
+        return open_tensor(self.perfomance_path, self._parse_file)
+
+    def iter_catalog(self, where=None, columns=None, engine="fast"):
+        """
+        Streams the PERFILES2 catalog one file at a time, yielding (prop_id, RPM, block) for every RPM block.
+        block is a (rows, n_columns) NumPy array. Only the current file is held in memory, so a full scan
+        uses the same peak memory whatever the number of files.
+        The where filter is checked on the file name (see parse_prop_id) before opening the file.
+        Files without data are skipped.
+
+            for prop_id, rpm, block in Performance().iter_catalog({"prop_type": "E"}, ["J (Adv_Ratio)", "Ct"]):
+                ...
+
+        INPUTS
+            where = None, a function (prop_id, diameter, prop_type) -> bool or a dictionary with
+                    "prop_id" (code or list), "prop_type" (type or list, ex: "E", "Standard")
+                    and "D (in)" ((min, max), None = open bound)
+            columns = list of PERF_COLUMNS to keep (default: all, in PERF_COLUMNS order)
+            engine = "fast" or "python" (see read_data)
+        """
+        predicate = _catalog_filter(where)
+        projection = None if columns is None else [PERF_COLUMNS.index(col) for col in columns]
+        files = _get_file_index(self.perfomance_path, "perf")['files']
+
+        for archive in sorted(files):
+            try:
+                prop_id, diameter, prop_type = parse_prop_id(archive)
+            except ValueError:
+                if predicate is not None:
+                    continue
+                prop_id, diameter, prop_type = _code_from_filename(archive, "perf"), None, None
+            if predicate is not None and not predicate(prop_id, diameter, prop_type):
+                continue  # - file is never opened
+
+            try:
+                rpm, values = self._parse_arrays(files[archive], engine)
+            except ValueError:
+                continue  # - no data in file
+            if projection is not None:
+                values = values[:, projection]
+            starts = np.flatnonzero(np.concatenate([[True], rpm[1:] != rpm[:-1]]))
+            for start, stop in zip(starts, np.append(starts[1:], len(rpm))):
+                yield prop_id, int(rpm[start]), values[start:stop]
+
+    def operating_point_solver(self, n_speeds=256):
+        """
+        Vectorized operating-point solver over the whole catalog (see OperatingPoint.OperatingPointSolver).
+        Built once from the catalog cache:
+            solver = Performance().operating_point_solver()
+            solver.best(speed=[0, 15], power=[500, 800], number=5)  # highest thrust props per target
+            solver.solve(speed=15, thrust=30)                         # RPM, power and Pe of every prop
+
+        INPUTS
+            n_speeds = points of the common airspeed grid
+        """
+        return get_operating_point_solver(self.build_catalog(), n_speeds)
+
+    def motor_matcher(self, source="tables", n_speeds=256):
+        """
+        Motor-propeller matching over the whole catalog (see Matching.MotorMatcher):
+            matcher = Performance().motor_matcher()
+            motors = {"Kv (RPM/V)": [920, 1400], "Rm (Ohm)": [0.1, 0.06], "I0 (A)": 0.5,
+                      "Voltage (V)": 11.1, "I max (A)": 30}
+            matcher.best(motors, speed=[0, 15], number=5)   # highest thrust props per (motor, speed)
+
+        INPUTS
+            source = "tables" (PER3 tables, any airspeed) or "static" (PER2_STATIC-2.DAT, speed 0 only)
+            n_speeds = points of the common airspeed grid ("tables")
+        """
+        if source == "tables":
+            return MotorMatcher.from_solver(self.operating_point_solver(n_speeds))
+        if source == "static":
+            from Objects.Summary import Summary
+            return MotorMatcher.from_static(Summary().read_data("STATIC-2"))
+        raise ValueError(f"Invalid source '{source}'. Use 'tables' or 'static'.")
+
+    def mission(self, segments, top_k=None, details=False, n_speeds=256):
+        """
+        Energy of a mission profile for every propeller, ranked (see Mission.rank_mission): the power of each
+        segment comes from the RPM-and-V tables (operating point solver), segments outside the tables or
+        outside the PER2_RPMRANGE.DAT limits are flagged.
+            segments = {"segment": ["climb", "cruise", "loiter"], "V (m/s)": [12, 20, 15],
+                        "Thrust (N)": [25, 12, 10], "Duration (s)": [60, 900, 600]}
+            Performance().mission(segments, top_k=10)
+
+        INPUTS
+            segments = mission segments (see Mission.mission_profile)
+            top_k = optional number of ranked propellers returned
+            details = also return the per segment (n_segments, n_props) arrays (see Mission.mission_energy)
+            n_speeds = points of the common airspeed grid of the solver
+        """
+        from Objects.Summary import Summary
+        solver = self.operating_point_solver(n_speeds)
+        with stage("perf.mission"):
+            segments, results = mission_energy(solver, segments, Summary().rpm_bounds(solver.prop_ids))
+            ranked = rank_mission(solver.prop_ids, segments, results, top_k)
+        if details:
+            return ranked, (segments, results)
+        return ranked
+
+    def model(self, prop, n_speeds=300):
+        """
+        Interpolated (RPM, V) model of a propeller (see PropellerModel), kept in an LRU cache by prop id.
+            model = Performance().model("20x10E")
+            model.thrust(rpm=[4000, 5000], v=20)  # V in mph
+
+        INPUTS
+            prop = propeller name/code. Example "20x10E".
+            n_speeds = points of the V grid
+        """
+        return get_model(prop, self, n_speeds)
+
+    def surrogate(self):
+        """
+        Chebyshev Ct(J, RPM) and Cp(J, RPM) fits of every propeller (see Surrogate.SurrogateCatalog), built once
+        from the PER3 files into the user cache directory (~0.5 MB) and rebuilt when the APC files change.
+            surrogate = Performance().surrogate()
+            surrogate.evaluate("20x10E", rpm=[4000, 5000], v=20)  # Thrust (N), PWR (W), Pe, Ct, Cp; V in mph
+        """
+        return get_catalog(self.perfomance_path, self._parse_file, build=True, store=SurrogateCatalog)
+
+    def findProp_power(self, Power, number, V=0.0):
+        """
+        Finds the propellers with the biggest thrust for the given power.
+        Returns a dataframe (rank, prop_id, RPM, Thrust (N), PWR (W), Pe), from highest to lowest thrust.
+
+        INPUTS
+            Power = float [W]
+            number = size of the output list of greatest propellers
+            V = airspeed [m/s] (default: static thrust)
+        """
+        ranked = self.operating_point_solver().best(V, power=Power, number=number)
+        return ranked.drop(columns="target")
+
+    def _parse_file(self, perf_DataPath, engine="fast"):
+        """ Parses a PER3 file with the given engine ("fast" or "python"). """
+        if engine == "fast":
+            perf_df = self._read_data_fast(perf_DataPath)
+            if perf_df is not None:
+                return perf_df
+            # - file is not in the fixed-width APC layout: fall back to the line parser
+        elif engine != "python":
+            raise ValueError(f"Invalid engine '{engine}'. Use 'auto', 'cache', 'fast' or 'python'.")
+
+        return self._read_data_python(perf_DataPath)
+
+    def _parse_arrays(self, perf_DataPath, engine="fast"):
+        """ (rpm, values) arrays of a PER3 file, without building a dataframe: values in PERF_COLUMNS order. """
+        if engine == "fast":
+            arrays = self._read_arrays_fast(perf_DataPath)
+            if arrays is not None:
+                return arrays
+        elif engine != "python":
+            raise ValueError(f"Invalid engine '{engine}'. Use 'fast' or 'python'.")
+
+        perf_df = self._read_data_python(perf_DataPath)
+        return perf_df["RPM"].to_numpy(dtype=np.int64), perf_df[PERF_COLUMNS].to_numpy(dtype=np.float64)
+
+    @timed("perf.parse_python")
+    def _read_data_python(self, perf_DataPath):
+        """ Line by line parser of a PER3 file. """
         with open(perf_DataPath, 'r') as file:
             lines = file.readlines()
+        if is_enabled():
+            add_bytes("perf", sum(map(len, lines)))
 
         data_start = None  # Linha onde começam os dados
         columns = None  # Lista de nomes das colunas
@@ -66,10 +326,7 @@ class Performance(APC_propeller):
 
             # Identifica a linha do cabeçalho da tabela
             elif re.match(r'\s*V\s+J\s+Pe\s+Ct', line):
-                columns = ["V (mph)", "J (Adv_Ratio)", "Pe", "Ct", "Cp", 
-                           "PWR (Hp)", "Torque (In-Lbf)", "Thrust (Lbf)", 
-                           "PWR (W)", "Torque (N-m)", "Thrust (N)", 
-                           "THR/PWR (g/W)", "Mach", "Reyn", "FOM"]  # Define os nomes das colunas sem "RPM"
+                columns = PERF_COLUMNS  # Define os nomes das colunas sem "RPM"
                 data_start = i + 2  # Pula a linha das unidades
 
             # Lê os dados numéricos após encontrar o cabeçalho
@@ -87,6 +344,65 @@ class Performance(APC_propeller):
         perf_df = pd.DataFrame(data, columns=["RPM"] + columns)
 
         return perf_df
+
+    def _read_data_fast(self, perf_DataPath):
+        """ Bulk parser of a PER3 file (see _read_arrays_fast). Returns None if the file does not follow the APC layout. """
+        arrays = self._read_arrays_fast(perf_DataPath)
+        if arrays is None:
+            return None
+        rpm, values = arrays
+
+        # Criar DataFrame
+        with stage("perf.dataframe"):
+            perf_df = pd.DataFrame(values, columns=PERF_COLUMNS)
+            perf_df.insert(0, "RPM", rpm)
+
+        return perf_df
+
+    @timed("perf.parse")
+    def _read_arrays_fast(self, perf_DataPath):
+        """
+        Bulk parser of a PER3 file, returning the (rpm, values) arrays. APC writes every line with the same length, so the file is
+        viewed as a (lines x chars) byte matrix: the RPM blocks and table headers are located in
+        one regex pass, the table rows are selected with array operations and all of them are
+        handed to np.loadtxt at once.
+        Returns None if the file does not follow this layout.
+        """
+        with open(perf_DataPath, 'rb') as file:
+            raw = file.read()
+        add_bytes("perf", len(raw))
+
+        # - fixed-width line matrix (each row keeps its '\n')
+        width = raw.find(b'\n') + 1
+        if width <= 1 or len(raw) % width:
+            return None
+        lines = np.frombuffer(raw, dtype=np.uint8).reshape(-1, width)
+        if not (lines[:, -1] == ord('\n')).all():
+            return None
+
+        # - block offsets: line numbers of each "PROP RPM =" and table header
+        rpm_hits = [(m.start() // width, int(m.group(1))) for m in _RPM_PATTERN.finditer(raw)]
+        header_rows = np.array([m.start() // width for m in _HEADER_PATTERN.finditer(raw)
+                                if not raw[m.start() - m.start() % width:m.start()].strip()], dtype=np.int64)
+        if not rpm_hits or header_rows.size == 0:
+            raise ValueError("Error in finding data.")
+        rpm_rows = np.array([row for row, _ in rpm_hits], dtype=np.int64)
+        rpm_values = np.array([rpm for _, rpm in rpm_hits], dtype=np.int64)
+
+        # - a data row comes 2 lines after the header of its RPM block and has all the columns
+        row = np.arange(lines.shape[0])
+        block = np.searchsorted(rpm_rows, row, side='right') - 1
+        header = np.searchsorted(header_rows, row, side='right') - 1
+        last_header = np.where(header >= 0, header_rows[header], -1)
+        not_blank = lines > ord(' ')
+        n_values = not_blank[:, 0] + (not_blank[:, 1:] & ~not_blank[:, :-1]).sum(axis=1)
+        is_data = ((block >= 0) & (last_header > rpm_rows[block]) & (row >= last_header + 2)
+                   & (n_values == len(PERF_COLUMNS)))
+        if not is_data.any():
+            raise ValueError("Error in finding data.")
+
+        values = np.loadtxt(io.BytesIO(lines[is_data].tobytes()), dtype=np.float64, ndmin=2)
+        return rpm_values[block[is_data]], values
     
     def plot(self, df_prop, RPM:int, key:int = 1):
         """
@@ -107,6 +423,7 @@ class Performance(APC_propeller):
             raise ValueError("RPM not present in data range. \n " \
             f"The available RPM for this prop are: {df_prop["RPM"].unique()}")
 
+        plt = _pyplot()
         plt.style.use(['science', 'grid', 'notebook'])
 
         if key == 1:
@@ -139,6 +456,8 @@ class Performance(APC_propeller):
             plt.show()
         
         elif key == 3:
+            import matplotlib.cm as cm
+            import matplotlib.colors as mcolors
             unique_rpm_values = df_prop["RPM"].unique()
             cmap = cm.plasma
             norm = mcolors.Normalize(
@@ -175,7 +494,7 @@ class Performance(APC_propeller):
             raise ValueError("Invalid key input. Check value.")
 
 
-    def performance_map(self, df_prop, rpm_min = None, rpm_max = None, eta_range = []):
+    def performance_map(self, df_prop, rpm_min = None, rpm_max = None, eta_range = [], plot = True):
         """
         Plot propeller performance map.
 
@@ -184,10 +503,10 @@ class Performance(APC_propeller):
             rpm_min = minimum RPM value for plot
             rpm_max = maximum RPM value for plot
             eta_range = list of efficiency values to plot iso-lines
+            plot = if False, nothing is plotted (matplotlib is not imported) and the
+                   (RPM, V, Thrust, Power, efficiency) grid arrays are returned
         """
     
-        plt.style.use(['science', 'grid', 'notebook'])
-        
         # --- Pre-processing ---
         df = df_prop.copy()
 
@@ -199,40 +518,23 @@ class Performance(APC_propeller):
         if df.empty:
             raise ValueError("No data left after RPM filtering.")
 
-        rpm_vals = np.sort(df["RPM"].unique())
-        vel = np.linspace(df["V (mph)"].min(),
-                        df["V (mph)"].max(), 300)
-        
-        # --- Regrid Thrust, Power and Efficiency in (RPM, V) space ---
-        T = np.zeros((len(rpm_vals), len(vel)))
-        P = np.zeros_like(T)
-        ETA = np.zeros_like(T)
-        for i, rpm in enumerate(rpm_vals):
-            s = df[df["RPM"] == rpm].sort_values("V (mph)")
-            T[i] = np.interp(vel, s["V (mph)"], s["Thrust (N)"])
-            P[i] = np.interp(vel, s["V (mph)"], s["PWR (W)"])
-            ETA[i] = np.interp(vel, s["V (mph)"], s["Pe"])
-
-        # --- Interpolators ---
-        T_fun = RegularGridInterpolator((rpm_vals, vel), T,
-                                        bounds_error=False)
-        P_fun = RegularGridInterpolator((rpm_vals, vel), P,
-                                        bounds_error=False)
-        ETA_fun = RegularGridInterpolator((rpm_vals, vel), ETA,
-                                        bounds_error=False)
-        
+        # --- Thrust, Power and Efficiency interpolants in (RPM, V) space ---
+        model = PropellerModel(df)
+        rpm_vals, vel = model.rpm, model.speeds
+
         # --- Dense evaluation grid ---
         RPMg, Vg = np.meshgrid(
             np.linspace(rpm_vals.min(), rpm_vals.max(), 250),
             vel,
             indexing="ij"
         )
-        pts = np.c_[RPMg.ravel(), Vg.ravel()]
-        Tg = T_fun(pts).reshape(RPMg.shape)
-        Pg = P_fun(pts).reshape(RPMg.shape)
-        ETAg = ETA_fun(pts).reshape(RPMg.shape)
+        Tg, Pg, ETAg = np.moveaxis(model.evaluate(RPMg, Vg)[..., :3], -1, 0)
+        if not plot:
+            return RPMg, Vg, Tg, Pg, ETAg
         
         # --- Plot ---
+        plt = _pyplot()
+        plt.style.use(['science', 'grid', 'notebook'])
         fig, ax = plt.subplots(figsize=(14, 8))
         # --- RPM colormap in (T, P) space ---
         cf = ax.contourf(
@@ -286,94 +588,3 @@ class Performance(APC_propeller):
         cbar.set_label("RPM")
         plt.tight_layout()
         plt.show()
-
-
-
-
-
-# --- TO UPDATE
-    """
-    def find_StaticThurst_for_Power(self, dataframe, power):
-        """
-        #Find max thurst for the given power, in an interval of [power - 50, power + 50]
-    """
-        # Filtrar os valores dentro da faixa de potência desejada
-        #df_filtrado = dataframe[(dataframe["PWR (W)"] > (power - 50)) & (dataframe["PWR (W)"] < (power + 50)) & (dataframe["V (mph)"] == 0)]
-        df_filtrado = dataframe[(dataframe["V (mph)"] == 0)]
-        df_filtrado = df_filtrado.iloc[(df_filtrado["PWR (W)"] - power).abs().argsort()[:1] ] #acha duas linhas com valores mais proximos de power
-        
-        #filtra qual é a que tem maior tração estática
-        #df_filtrado = df_filtrado.loc[df_filtrado["Thrust (N)"].idxmax()]
-
-        # Se não houver valores na faixa, retornar None
-        if df_filtrado.empty:
-            return None  
-
-        # Encontrar a linha com maior Thrust (N)
-        #max_thrust_row = df_filtrado.loc[df_filtrado["Thrust (N)"].idxmax()]
-        
-        return df_filtrado
-    """
-    """
-    def findProp_power(self, Power, number, type=None):
-        """
-        #Finds the propellers, closest to the power given, that have the biggest static thrust.
-        #Inputs:
-        #    Power = float[W]
-        #    number = size of the output list of greatest propellers
-    """
-        StaticThrust = []
-        PowerStatic = []
-        archives = os.listdir(self.perfomance_path) #contain all file names
-        for archive in archives:
-        #    print(archive[5:], "E" in archive[5:]) DANDO ERRADO NO OUTPUT! (até entregando valores errados)
-        #     # Garante que "type" seja string, evita erro se None
-        #    if isinstance(type, str) and type.lower() in ("e", "eletric"):
-                # Verifica se a string tem pelo menos 5 caracteres antes de fatiar
-        #        if "E" in archive[5:]:
-         #           continue
-
-            perfomance = self.read_data(prop=archive)
-            df = self.find_StaticThurst_for_Power(perfomance, Power)
-
-            StaticThrust.append(df["Thrust (N)"].values[0])
-            PowerStatic.append(df["PWR (W)"].values[0])
-
-        #print(StaticThrust)
-
-        Biggest = np.argsort(StaticThrust)[-number:][::-1] #5 maiores, do maior pro menos
-
-        print(f" --- Propellers with highest thrust for {Power}W are: --- ")
-        print(" --- (from highest to lowest)")
-        for i in range(len(Biggest)):
-            print(f"{i+1}) {archives[Biggest[i]]} \t Power: {PowerStatic[Biggest[i]]}W Thrust: {StaticThrust[Biggest[i]]}N")
-
-        return Biggest #return position in archives
-    """
-    """
-    def linreg(self, Vair, Thrust):
-        # Converte para arrays NumPy e garante que as dimensões estejam corretas
-        Vair = np.array(Vair).reshape(-1, 1)
-        Thrust = np.array(Thrust).reshape(-1, 1)
-
-        # Cria os termos polinomiais
-        poly = PolynomialFeatures(degree=3)
-        Vair_poly = poly.fit_transform(Vair)
-
-        # Ajusta a regressão linear
-        lin = LinearRegression()
-        lin.fit(Vair_poly, Thrust)
-        
-        # Retorna os coeficientes do polinômio de terceiro grau
-        a, b, c = lin.coef_[0][3], lin.coef_[0][2], lin.coef_[0][1]
-        d = lin.intercept_[0]
-
-        return a, b, c, d
-
-    def polinomio_3oGrau(self, a, b, c, d, v):
-        return a*np.power(v, 3) + b*np.power(v, 2) + c*v + d
-    """
-    
-
-
-
@@ -0,0 +1,159 @@
+import os
+import numpy as np
+from collections import OrderedDict
+from Objects.ClassAPC import _normalize_code
+from Objects.Instrumentation import cache_hit, cache_miss
+from Objects.OperatingPoint import regrid_blocks
+
+""" --- Interpolated propeller model ---
+        PropellerModel regrids a read_data dataframe once in (RPM, V) space, as performance_map does,
+        and evaluates Thrust, Power, efficiency, Ct and Cp at arbitrary (RPM, V) point arrays with
+        bilinear interpolation (NaN outside the RPM and V range, as RegularGridInterpolator(bounds_error=False)).
+
+        get_model keeps the models of the last MODEL_CACHE_SIZE propellers in an LRU cache keyed by prop id,
+        with the mtime and size of the source file: a model whose file was edited is built again.
+"""
+
+MODEL_QUANTITIES = ["Thrust (N)", "PWR (W)", "Pe", "Ct", "Cp"]
+MODEL_CACHE_SIZE = 64
+
+# --- Cached models: {(normalized prop id, n_speeds): ((mtime_ns, size) of the file, PropellerModel)},
+#     least recently used first
+_MODELS = OrderedDict()
+
+
+class PropellerModel():
+    """
+    (RPM, V) -> Thrust (N), PWR (W), Pe, Ct, Cp interpolants of one propeller.
+    V is the airspeed in mph, as the "V (mph)" column of read_data.
+
+        model = PropellerModel(Performance().read_data("20x10E"))
+        model.thrust(rpm, v)           # arrays of any (broadcastable) shape
+        model.evaluate(rpm, v)         # (..., 5) array in MODEL_QUANTITIES order
+    """
+
+    def __init__(self, df_prop, n_speeds=300, prop_id=None):
+        """
+        INPUTS
+            df_prop = propeller dataframe (read_data), possibly filtered by RPM
+            n_speeds = points of the regular V grid (from the lowest to the highest V of the table), at least 2
+            prop_id = optional propeller name, kept for reference
+        """
+        if n_speeds < 2:
+            raise ValueError(f"n_speeds must be at least 2 (got {n_speeds}): the airspeed grid needs two points.")
+        if df_prop.empty:
+            raise ValueError("No data left after RPM filtering.")
+        self.prop_id = prop_id
+
+        # - tables sorted by (RPM, V): one block per RPM
+        df = df_prop.sort_values(["RPM", "V (mph)"], kind="stable")
+        rpm = df["RPM"].to_numpy()
+        starts = np.flatnonzero(np.concatenate([[True], np.diff(rpm) != 0]))
+        offsets = np.concatenate([starts, [len(rpm)]])
+
+        self.rpm = rpm[starts].astype(np.float64)
+        self.speeds = np.linspace(df["V (mph)"].min(), df["V (mph)"].max(), n_speeds)
+        # - tables extended with their edge values, as np.interp in performance_map
+        grid = regrid_blocks(offsets, df["V (mph)"].to_numpy(dtype=np.float64),
+                             df[MODEL_QUANTITIES].to_numpy(dtype=np.float64), self.speeds, clamp=True)
+        self.planes = np.ascontiguousarray(grid.transpose(2, 0, 1))  # (quantity, RPM, V)
+
+    def evaluate(self, rpm, v, quantities=None):
+        """
+        Bilinear interpolation at the points (rpm, v).
+        Returns an array of shape broadcast(rpm, v).shape + (n_quantities,), NaN outside the RPM or V range.
+
+        INPUTS
+            rpm, v = arrays (or scalars) of RPM and airspeed [mph]
+            quantities = list of MODEL_QUANTITIES names (default: all, in MODEL_QUANTITIES order)
+        """
+        rpm, v = np.broadcast_arrays(np.asarray(rpm, dtype=np.float64), np.asarray(v, dtype=np.float64))
+        shape = rpm.shape
+        rpm, v = rpm.ravel(), v.ravel()
+        planes = self.planes if quantities is None else \
+            self.planes[[MODEL_QUANTITIES.index(name) for name in quantities]]
+
+        # - RPM cell (irregular grid) and V cell (regular grid)
+        last_rpm, last_v = len(self.rpm) - 1, len(self.speeds) - 1
+        i = np.clip(np.searchsorted(self.rpm, rpm, side='right') - 1, 0, max(last_rpm - 1, 0))
+        i1 = np.minimum(i + 1, last_rpm)
+        d_rpm = self.rpm[i1] - self.rpm[i]
+        t_rpm = np.divide(rpm - self.rpm[i], d_rpm, out=np.zeros_like(rpm), where=d_rpm != 0)
+
+        step = self.speeds[-1] - self.speeds[0]
+        position = (v - self.speeds[0]) / step * last_v if step > 0 else np.zeros_like(v)
+        j = np.clip(np.floor(position).astype(np.int64), 0, max(last_v - 1, 0))
+        j1 = np.minimum(j + 1, last_v)
+        t_v = position - j
+
+        # - corners gathered from the flattened (quantity, RPM x V) planes
+        n_v = last_v + 1
+        flat = planes.reshape(len(planes), -1)
+        low = flat[:, i * n_v + j] * (1 - t_v) + flat[:, i * n_v + j1] * t_v
+        high = flat[:, i1 * n_v + j] * (1 - t_v) + flat[:, i1 * n_v + j1] * t_v
+        out = low * (1 - t_rpm) + high * t_rpm
+
+        outside = ((rpm < self.rpm[0]) | (rpm > self.rpm[-1]) | np.isnan(rpm)
+                   | (v < self.speeds[0]) | (v > self.speeds[-1]) | np.isnan(v))
+        out[:, outside] = np.nan
+        return out.T.reshape(shape + (len(planes),))
+
+    def _quantity(self, name, rpm, v):
+        return self.evaluate(rpm, v, [name])[..., 0]
+
+    def thrust(self, rpm, v):
+        """ Thrust [N] at (rpm, v [mph]). """
+        return self._quantity("Thrust (N)", rpm, v)
+
+    def power(self, rpm, v):
+        """ Power [W] at (rpm, v [mph]). """
+        return self._quantity("PWR (W)", rpm, v)
+
+    def efficiency(self, rpm, v):
+        """ Propeller efficiency Pe at (rpm, v [mph]). """
+        return self._quantity("Pe", rpm, v)
+
+    def ct(self, rpm, v):
+        """ Thrust coefficient at (rpm, v [mph]). """
+        return self._quantity("Ct", rpm, v)
+
+    def cp(self, rpm, v):
+        """ Power coefficient at (rpm, v [mph]). """
+        return self._quantity("Cp", rpm, v)
+
+
+def get_model(prop, performance, n_speeds=300):
+    """
+    Model of a propeller from the LRU cache, built with performance.read_data on a miss.
+    At most MODEL_CACHE_SIZE models are kept; the least recently used one is dropped first.
+
+    INPUTS
+        prop = propeller name/code. Example "20x10E".
+        performance = Performance instance used to read the data
+        n_speeds = points of the V grid
+    """
+    key = (_normalize_code(prop), n_speeds)
+    path = performance.searchPropeller(propeller=prop, label='perf')
+    if path is None:
+        raise ValueError("Error: perfomance data path not found.")
+    st = os.stat(path)
+    source = (st.st_mtime_ns, st.st_size)
+
+    cached = _MODELS.get(key)
+    if cached is not None and cached[0] == source:
+        cache_hit("model")
+        _MODELS.move_to_end(key)
+        return cached[1]
+    cache_miss("model")
+
+    model = PropellerModel(performance.read_data(prop), n_speeds=n_speeds, prop_id=prop)
+    _MODELS[key] = (source, model)
+    _MODELS.move_to_end(key)
+    while len(_MODELS) > MODEL_CACHE_SIZE:
+        _MODELS.popitem(last=False)
+    return model
+
+
+def clear_model_cache():
+    """ Drops every cached model (ex: after the APC files were updated). """
+    _MODELS.clear()
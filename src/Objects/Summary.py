@@ -0,0 +1,295 @@
+import os
+import re
+import io
+import numpy as np
+import pandas as pd
+from Objects.ClassAPC import *
+from Objects.ClassAPC import _normalize_code
+from Objects.Instrumentation import cache_hit, cache_miss
+
+""" --- Catalog summaries (PER2_*.DAT) ---
+        APC ships catalog-wide tables next to PERFILES2. Each one is parsed into a SummaryTable:
+        a typed dataframe sorted by (prop_id, RPM) plus a prop id -> rows index.
+            STATIC-2  static Thrust, Power, Torque, Cp, Ct and FOM for every prop and RPM
+            STATIC-1  the same without FOM, sorted by maximum thrust in the file
+            MAXPE     airspeed of peak efficiency for every prop and RPM
+            RPMRANGE  minimum and maximum RPM of every prop
+            N100      RPM that draws 100 W under static conditions
+            TITLEDAT  PER3 file name and APC title of every prop
+
+        Screening on these tables (ex: static thrust at a given power) reads one file instead of 435.
+"""
+
+LBF_TO_N = 4.4482216
+HP_TO_W = 745.69987
+INLBF_TO_NM = 0.11298483
+
+SUMMARY_FILES = {"STATIC-1": "PER2_STATIC-1.DAT", "STATIC-2": "PER2_STATIC-2.DAT",
+                 "MAXPE": "PER2_MAXPE.DAT", "RPMRANGE": "PER2_RPMRANGE.DAT",
+                 "N100": "PER2_N100.DAT", "TITLEDAT": "PER2_TITLEDAT.DAT"}
+
+STATIC_COLUMNS = ["RPM", "Thrust (Lbf)", "PWR (Hp)", "Torque (In-Lbf)", "Cp", "Ct", "FOM"]
+MAXPE_COLUMNS = ["RPM", "V (mph)", "Pe", "PWR (Hp)"]
+
+# --- Parser patterns
+_NUMBER = r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[Ee][-+]?\d+)?'
+_NUMERIC_ROW = {n: re.compile(r'^[ \t]*' + r'[ \t]+'.join([_NUMBER] * n) + r'[ \t]*$', re.M) for n in (4, 6, 7)}
+_STATIC1_ROW = re.compile(r'^[ \t]*((?:' + _NUMBER + r'[ \t]+){6})(\S+)\.dat[ \t]*$', re.M)
+_STATIC2_PROP = re.compile(r'^[ \t]+(\S+)\.dat[ \t]*$', re.M)
+_MAXPE_PROP = re.compile(r'^[ \t]*=+ (\S+) =+[ \t]*$', re.M)
+_RPMRANGE_ROW = re.compile(r'^(\S+)[ \t]+(\d+)[ \t]+(\d+)[ \t]*$', re.M)
+_N100_ROW = re.compile(r'^[ \t]+(\S+)[ \t]+(\d+)[ \t]*$', re.M)
+_TITLE_ROW = re.compile(r'^[ \t]+(PER3_\S+\.dat)[ \t]+(\S+)[ \t]*$', re.M)
+
+# --- Parsed tables: {file path: (mtime_ns, SummaryTable)}
+_TABLES = {}
+
+
+class RPMOutOfRangeError(ValueError):
+    """
+    Raised when a RPM is outside the PER2_RPMRANGE.DAT range of a propeller
+    (prop None: outside the range of every propeller).
+    """
+
+    def __init__(self, prop, rpm, rpm_min, rpm_max):
+        self.prop = prop
+        self.rpm_min = rpm_min
+        self.rpm_max = rpm_max
+        if prop is None:
+            super().__init__(f"RPM {rpm} is outside the RPM range of every propeller ({rpm_min} to {rpm_max}).")
+        else:
+            super().__init__(f"RPM {rpm} not present in data range of '{prop}'. "
+                             f"The available RPM range for this prop is {rpm_min} to {rpm_max}.")
+
+
+class SummaryTable():
+    """
+    Summary table sorted by (prop_id, RPM): "df" holds the typed columns, rows(prop) the slice of a propeller.
+    Props are looked up by normalized code, so "10.5x4.5", "105x45" and "PER3_105x45.dat" are the same prop;
+    "aliases" maps other normalized names (APC titles) to normalized codes.
+    """
+
+    def __init__(self, df, aliases=None):
+        sort = ["prop_id", "RPM"] if "RPM" in df.columns else ["prop_id"]
+        self.df = df.sort_values(sort, kind="stable").reset_index(drop=True)
+        prop_ids = self.df["prop_id"].to_numpy(dtype=str)
+        starts = np.flatnonzero(np.concatenate([[True], prop_ids[1:] != prop_ids[:-1]])) if len(prop_ids) \
+            else np.zeros(0, dtype=np.int64)
+        stops = np.concatenate([starts[1:], [len(prop_ids)]])
+        self.index = {_normalize_code(prop_ids[a]): (a, b) for a, b in zip(starts, stops)}
+        self.df["prop_id"] = self.df["prop_id"].astype("category")
+        self.aliases = aliases or {}
+
+    def find(self, prop):
+        """ (start, stop) rows of a propeller, or None if it is not in the table. """
+        key = _normalize_code(prop)
+        return self.index.get(key, self.index.get(self.aliases.get(key)))
+
+    def rows(self, prop):
+        """ (start, stop) rows of a propeller. """
+        rows = self.find(prop)
+        if rows is None:
+            raise PropellerNotFoundError(prop)
+        return rows
+
+    def prop(self, prop):
+        """ Rows of a propeller. Example prop("20x10E") """
+        start, stop = self.rows(prop)
+        return self.df.iloc[start:stop]
+
+    def screen(self, constraints, sort_by=None, top_k=None):
+        """
+        Rows with every column inside its (min, max) bound (None = open bound),
+        sorted by "sort_by" in descending order.
+            Summary().read_data("STATIC-2").screen({"PWR (W)": (None, 300)}, sort_by="Thrust (N)", top_k=5)
+
+        INPUTS
+            constraints = {column: (min, max)}
+            sort_by = column name, or None to keep the table order
+            top_k = maximum number of rows returned
+        """
+        mask = np.ones(len(self.df), dtype=bool)
+        for col, (c_min, c_max) in constraints.items():
+            if col not in self.df.columns:
+                raise ValueError(f"Invalid constraint '{col}'. Use one of {list(self.df.columns)}.")
+            values = self.df[col].to_numpy(dtype=np.float64)
+            if c_min is not None:
+                mask &= values >= c_min
+            if c_max is not None:
+                mask &= values <= c_max
+
+        rows = np.flatnonzero(mask)
+        if sort_by is not None:
+            rows = rows[np.argsort(-self.df[sort_by].to_numpy(dtype=np.float64)[rows], kind='stable')]
+        if top_k is not None:
+            rows = rows[:top_k]
+        return self.df.iloc[rows]
+
+
+def _numeric_rows(text, n_values):
+    """ (line start offsets, (rows, n_values) float array) of every line made of exactly n_values numbers. """
+    matches = list(_NUMERIC_ROW[n_values].finditer(text))
+    if not matches:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, n_values))
+    starts = np.array([m.start() for m in matches], dtype=np.int64)
+    values = np.loadtxt(io.StringIO("\n".join(m.group(0) for m in matches)), dtype=np.float64, ndmin=2)
+    return starts, values
+
+
+def _owners(starts, header_matches):
+    """ Prop id of the last header above each row offset, and a mask of the rows below a header. """
+    header_starts = np.array([m.start() for m in header_matches], dtype=np.int64)
+    names = np.array([m.group(1) for m in header_matches], dtype=object)
+    position = np.searchsorted(header_starts, starts, side='right') - 1
+    return names[np.maximum(position, 0)], position >= 0
+
+
+def _with_si(df):
+    """ Adds Thrust (N), PWR (W) and Torque (N-m) next to the imperial columns present. """
+    for imperial, si, factor in (("Thrust (Lbf)", "Thrust (N)", LBF_TO_N),
+                                 ("PWR (Hp)", "PWR (W)", HP_TO_W),
+                                 ("Torque (In-Lbf)", "Torque (N-m)", INLBF_TO_NM)):
+        if imperial in df.columns:
+            df[si] = df[imperial] * factor
+    return df
+
+
+def _parse_static_1(text):
+    matches = list(_STATIC1_ROW.finditer(text))
+    values = np.loadtxt(io.StringIO("\n".join(m.group(1) for m in matches)), dtype=np.float64, ndmin=2) \
+        if matches else np.zeros((0, 6))
+    df = pd.DataFrame(values, columns=STATIC_COLUMNS[:-1])
+    df.insert(0, "prop_id", [m.group(2) for m in matches])
+    return df
+
+
+def _parse_static_2(text):
+    starts, values = _numeric_rows(text, 7)
+    props, found = _owners(starts, list(_STATIC2_PROP.finditer(text)))
+    df = pd.DataFrame(values[found], columns=STATIC_COLUMNS)
+    df.insert(0, "prop_id", props[found])
+    return df
+
+
+def _parse_maxpe(text):
+    starts, values = _numeric_rows(text, 4)
+    props, found = _owners(starts, list(_MAXPE_PROP.finditer(text)))
+    df = pd.DataFrame(values[found], columns=MAXPE_COLUMNS)
+    df.insert(0, "prop_id", props[found])
+    return df
+
+
+def _parse_rpm_range(text):
+    rows = _RPMRANGE_ROW.findall(text)
+    return pd.DataFrame({"prop_id": [r[0] for r in rows],
+                         "RPM min": np.array([r[1] for r in rows], dtype=np.int64),
+                         "RPM max": np.array([r[2] for r in rows], dtype=np.int64)})
+
+
+def _parse_n100(text):
+    rows = _N100_ROW.findall(text)
+    return pd.DataFrame({"prop_id": [r[0] for r in rows],
+                         "N100 (RPM)": np.array([r[1] for r in rows], dtype=np.int64)})
+
+
+def _parse_titles(text):
+    rows = _TITLE_ROW.findall(text)
+    return pd.DataFrame({"prop_id": [r[0][len("PER3_"):-len(".dat")] for r in rows],
+                         "file": [r[0] for r in rows],
+                         "title": [r[1] for r in rows]})
+
+
+_PARSERS = {"STATIC-1": _parse_static_1, "STATIC-2": _parse_static_2, "MAXPE": _parse_maxpe,
+            "RPMRANGE": _parse_rpm_range, "N100": _parse_n100, "TITLEDAT": _parse_titles}
+
+
+class Summary(APC_propeller):
+    """
+    Reader of the PER2_*.DAT catalog summaries. Tables are parsed once per process
+    (and again if the file changes).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.summary_path = self.perfomance_path.parent
+
+    def read_data(self, table):
+        """
+        Parsed summary table (SummaryTable, dataframe in its "df" attribute).
+
+        INPUTS
+            table = "STATIC-1", "STATIC-2", "MAXPE", "RPMRANGE", "N100" or "TITLEDAT"
+        """
+        if table not in SUMMARY_FILES:
+            raise ValueError(f"Invalid table '{table}'. Use one of {list(SUMMARY_FILES)}.")
+        path = self.summary_path / SUMMARY_FILES[table]
+        mtime = os.stat(path).st_mtime_ns
+        cached = _TABLES.get(str(path))
+        if cached is not None and cached[0] == mtime:
+            cache_hit("summary")
+            return cached[1]
+        cache_miss("summary")
+
+        with open(path, 'r') as file:
+            df = _PARSERS[table](file.read())
+        if df.empty:
+            raise ValueError(f"Error in finding data in {path.name}.")
+        if "RPM" in df.columns:
+            df["RPM"] = df["RPM"].astype(np.int64)
+        if table == "TITLEDAT":
+            # - APC titles may differ from the dotless file code. Example: "8x3.7SFR" -> 8x37SFR-PC
+            aliases = {_normalize_code(title): _normalize_code(code) for code, title in zip(df["prop_id"], df["title"])}
+        else:
+            aliases = self.read_data("TITLEDAT").aliases if (self.summary_path / SUMMARY_FILES["TITLEDAT"]).exists() \
+                else {}
+        summary = SummaryTable(_with_si(df), aliases)
+        _TABLES[str(path)] = (mtime, summary)
+        return summary
+
+    def rpm_range(self, prop):
+        """ (minimum, maximum) RPM of a propeller. Example rpm_range("20x10E") """
+        table = self.read_data("RPMRANGE")
+        start, _ = table.rows(prop)
+        row = table.df.iloc[start]
+        return int(row["RPM min"]), int(row["RPM max"])
+
+    def catalog_rpm_range(self):
+        """ (lowest minimum, highest maximum) RPM over every propeller of PER2_RPMRANGE.DAT. """
+        table = self.read_data("RPMRANGE")
+        if not hasattr(table, "rpm_extent"):  # - computed once per parsed table
+            table.rpm_extent = (int(table.df["RPM min"].min()), int(table.df["RPM max"].max()))
+        return table.rpm_extent
+
+    def check_rpm(self, prop, rpm):
+        """
+        Raises RPMOutOfRangeError if any of the RPM values is outside the range of the propeller.
+        Only the summary table is read, so bad queries are rejected before opening any PER3 file.
+
+        INPUTS
+            prop = propeller name/code. Example "20x10E".
+            rpm = RPM value or array
+        """
+        rpm_min, rpm_max = self.rpm_range(prop)
+        rpm = np.asarray(rpm)
+        outside = (rpm < rpm_min) | (rpm > rpm_max)
+        if outside.any():
+            raise RPMOutOfRangeError(prop, rpm[outside].ravel()[0], rpm_min, rpm_max)
+
+    def rpm_bounds(self, props):
+        """
+        (rpm_min, rpm_max) float arrays with the shape of props (NaN for props not in PER2_RPMRANGE.DAT).
+        Each distinct prop is looked up once.
+        """
+        table = self.read_data("RPMRANGE")
+        props = np.asarray(props, dtype=object)
+        unique, inverse = np.unique(props.ravel().astype(str), return_inverse=True)
+        rows = np.array([(table.find(p) or (-1,))[0] for p in unique.tolist()], dtype=np.int64)[inverse]
+        rpm_min = np.where(rows >= 0, table.df["RPM min"].to_numpy(dtype=np.float64)[rows], np.nan)
+        rpm_max = np.where(rows >= 0, table.df["RPM max"].to_numpy(dtype=np.float64)[rows], np.nan)
+        return rpm_min.reshape(props.shape), rpm_max.reshape(props.shape)
+
+    def in_rpm_range(self, props, rpm):
+        """ Boolean array: True where rpm[i] is inside the RPM range of props[i] (unknown props are False). """
+        props, rpm = np.broadcast_arrays(np.asarray(props, dtype=object), np.asarray(rpm, dtype=np.float64))
+        rpm_min, rpm_max = self.rpm_bounds(props)
+        return (rpm >= rpm_min) & (rpm <= rpm_max)
@@ -0,0 +1,198 @@
+import difflib
+import numpy as np
+import pandas as pd
+from numpy.polynomial import chebyshev
+from Objects.Catalog import _ArrayStore
+from Objects.ClassAPC import PropellerNotFoundError, _code_from_filename, _normalize_code
+
+""" --- Surrogate performance models ---
+        Ct(J, RPM) and Cp(J, RPM) of every PER3 file are fitted (least squares) with a 2-D Chebyshev series
+        on the J and RPM range of the propeller, and stored in one small .npz in the user cache directory:
+            coefficients    (n_props, 2, SURROGATE_DEGREE[0] + 1, SURROGATE_DEGREE[1] + 1) float32, Ct and Cp
+            domain          (n_props, 4) J min, J max, RPM min, RPM max of the fit
+            diameter        (n_props,) [m], from the tables (J = V / (n D))
+            max_error       (n_props, 2) highest |fit - table| of Ct and Cp over the source table
+            block_*         RPM of each table block and its highest J, to return NaN outside the tabulated range
+
+        Thrust, power and efficiency follow from the coefficients (APC tables use rho = 1.225 kg/m^3):
+            T = Ct rho n^2 D^4,  P = Cp rho n^3 D^5,  Pe = J Ct / Cp   (n in rev/s)
+        The whole catalog takes ~0.5 MB and evaluates any mix of (prop, RPM, V) points in one vectorized call.
+"""
+
+RHO = 1.225                   # air density of the APC tables [kg/m^3]
+MPH_TO_MS = 0.44704
+SURROGATE_DEGREE = (8, 10)    # Chebyshev degree in J and in RPM (lowered for props with few points)
+SURROGATE_QUANTITIES = ["Thrust (N)", "PWR (W)", "Pe", "Ct", "Cp"]
+J_TOLERANCE = 5e-3            # J range margin (fraction of the J range) kept inside the fit domain
+
+
+class SurrogateCatalog(_ArrayStore):
+    """
+    Chebyshev surrogates of the whole PERFILES2 catalog (see Performance.surrogate).
+
+        surrogate = Performance().surrogate()
+        surrogate.evaluate("20x10E", rpm, v)                  # (..., 5) array in SURROGATE_QUANTITIES order
+        surrogate.evaluate(["20x10E", "9x6E"], 6000, 20)      # props broadcast with the points
+        surrogate.errors()                                    # max fit error per prop
+    """
+
+    ARRAYS = ("files", "manifest", "coefficients", "domain", "diameter", "max_error",
+              "block_offsets", "block_rpm", "block_j_max")
+    KIND = "surrogate"
+    LABEL = "perf"
+
+    def __init__(self, files, manifest, coefficients, domain, diameter, max_error,
+                 block_offsets, block_rpm, block_j_max):
+        self.files = np.asarray(files, dtype=str)
+        self.manifest = manifest
+        self.coefficients = coefficients
+        self.domain = domain
+        self.diameter = diameter
+        self.max_error = max_error
+        self.block_offsets = block_offsets
+        self.block_rpm = block_rpm
+        self.block_j_max = block_j_max
+        self.prop_ids = np.array([_code_from_filename(name, "perf") for name in self.files.tolist()])
+        self.index = {_normalize_code(code): i for i, code in enumerate(self.prop_ids.tolist())}
+        self.source_token = None
+
+        # - (prop, RPM) blocks on one sorted key, for the per-point J range lookup
+        self._span = block_rpm.max() + 1.0 if block_rpm.size else 1.0
+        self._block_key = np.repeat(np.arange(len(self.files)), np.diff(block_offsets)) * self._span + block_rpm
+
+    @classmethod
+    def build(cls, paths, manifest, parser):
+        """ Parses every file with "parser" (path -> read_data dataframe) and fits its surrogate. """
+        d_j, d_rpm = SURROGATE_DEGREE
+        n_props = len(paths)
+        coefficients = np.full((n_props, 2, d_j + 1, d_rpm + 1), np.nan, dtype=np.float32)
+        domain = np.full((n_props, 4), np.nan)
+        diameter = np.full(n_props, np.nan)
+        max_error = np.full((n_props, 2), np.nan, dtype=np.float32)
+        block_rpm, block_j_max, counts = [], [], []
+
+        for i, path in enumerate(paths):
+            try:
+                perf_df = parser(path)
+            except ValueError:
+                counts.append(0)
+                continue  # - file without data: NaN surrogate
+
+            rpm = perf_df["RPM"].to_numpy(dtype=np.float64)
+            j = perf_df["J (Adv_Ratio)"].to_numpy(dtype=np.float64)
+            y = perf_df[["Ct", "Cp"]].to_numpy(dtype=np.float64)
+            grouped = perf_df.groupby("RPM", sort=True)["J (Adv_Ratio)"].max()
+            block_rpm.append(grouped.index.to_numpy(dtype=np.float64))
+            block_j_max.append(grouped.to_numpy(dtype=np.float64))
+            counts.append(len(grouped))
+
+            # - diameter from the advance ratio definition J = V / (n D)
+            moving = j > 0
+            v = perf_df["V (mph)"].to_numpy(dtype=np.float64) * MPH_TO_MS
+            diameter[i] = np.median(v[moving] / (rpm[moving] / 60 * j[moving])) if moving.any() else np.nan
+
+            domain[i] = j.min(), j.max(), rpm.min(), rpm.max()
+            x_j, x_rpm = _scaled(j, domain[i, 0], domain[i, 1]), _scaled(rpm, domain[i, 2], domain[i, 3])
+            degree = (min(d_j, perf_df.groupby("RPM").size().min() - 1), min(d_rpm, len(grouped) - 1))
+            basis = chebyshev.chebvander2d(x_j, x_rpm, degree)
+            fit = np.linalg.lstsq(basis, y, rcond=None)[0].astype(np.float32)   # ((dj+1)*(drpm+1), 2)
+
+            coefficients[i] = 0.0
+            coefficients[i, :, :degree[0] + 1, :degree[1] + 1] = fit.T.reshape(2, degree[0] + 1, degree[1] + 1)
+            max_error[i] = np.abs(basis @ fit.astype(np.float64) - y).max(axis=0)
+
+        block_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        block_rpm = np.concatenate(block_rpm) if block_rpm else np.zeros(0)
+        block_j_max = np.concatenate(block_j_max).astype(np.float32) if block_j_max else np.zeros(0, np.float32)
+        return cls([path.name for path in paths], manifest, coefficients, domain, diameter, max_error,
+                   block_offsets, block_rpm, block_j_max)
+
+    def prop_index(self, props):
+        """
+        Positions of propeller codes (str or array of str) in the catalog arrays.
+        Raises PropellerNotFoundError (with the closest codes) for the first unknown code.
+        """
+        codes = np.asarray(props)
+        unique, inverse = np.unique(codes, return_inverse=True)
+        index = np.array([self.index.get(_normalize_code(code), -1) for code in unique.tolist()],
+                         dtype=np.int64)[inverse].reshape(codes.shape)
+        if (index < 0).any():
+            code = str(codes[index < 0].ravel()[0])
+            close = difflib.get_close_matches(_normalize_code(code), list(self.index), n=5, cutoff=0.6)
+            raise PropellerNotFoundError(code, [self.prop_ids[self.index[key]] for key in close])
+        return index
+
+    def _j_max(self, prop, rpm):
+        """ Highest tabulated J of each (prop, rpm) point, interpolated between the RPM blocks of the prop. """
+        starts, stops = self.block_offsets[prop], self.block_offsets[prop + 1]
+        lower = np.clip(np.searchsorted(self._block_key, prop * self._span + rpm, side='right') - 1, starts,
+                        np.maximum(stops - 2, starts))
+        upper = np.minimum(lower + 1, stops - 1)
+        d_rpm = self.block_rpm[upper] - self.block_rpm[lower]
+        t = np.divide(rpm - self.block_rpm[lower], d_rpm, out=np.zeros_like(rpm), where=d_rpm != 0)
+        return self.block_j_max[lower] + t * (self.block_j_max[upper] - self.block_j_max[lower])
+
+    def evaluate(self, props, rpm, v, chunk_size=32768):
+        """
+        Thrust (N), PWR (W), Pe, Ct and Cp at the points (props, rpm, v), all broadcast together.
+        Returns an array of shape broadcast(props, rpm, v).shape + (5,), NaN outside the tabulated
+        RPM range or advance ratio range of the propeller.
+
+        INPUTS
+            props = propeller code or array of codes. Example "20x10E"
+            rpm = RPM array (or scalar)
+            v = airspeed array [mph] (as the "V (mph)" column of read_data)
+        """
+        props, rpm, v = np.broadcast_arrays(np.asarray(props), np.asarray(rpm, dtype=np.float64),
+                                            np.asarray(v, dtype=np.float64))
+        shape = rpm.shape
+        prop, rpm, v = self.prop_index(props.ravel()), rpm.ravel(), v.ravel()
+
+        n = rpm / 60
+        diameter = self.diameter[prop]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            j = v * MPH_TO_MS / (n * diameter)
+        j_min, j_max, rpm_min, rpm_max = self.domain[prop].T
+
+        # - Chebyshev series of every point with its own coefficients (in chunks of points)
+        d_j, d_rpm = self.coefficients.shape[2:]
+        x_j, x_rpm = _scaled(j, j_min, j_max), _scaled(rpm, rpm_min, rpm_max)
+        ct, cp = np.empty(rpm.size), np.empty(rpm.size)
+        for p0 in range(0, rpm.size, chunk_size):
+            p1 = min(p0 + chunk_size, rpm.size)
+            t_j = chebyshev.chebvander(x_j[p0:p1], d_j - 1)
+            t_rpm = chebyshev.chebvander(x_rpm[p0:p1], d_rpm - 1)
+            ct[p0:p1], cp[p0:p1] = np.einsum('pqij,pi,pj->qp', self.coefficients[prop[p0:p1]], t_j, t_rpm,
+                                             optimize=True)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out = np.stack([ct * RHO * n ** 2 * diameter ** 4,
+                            cp * RHO * n ** 3 * diameter ** 5,
+                            j * ct / cp,
+                            ct, cp], axis=-1)
+        # - J from the rounded "V (mph)" column differs from the tabulated J by up to ~0.2 % of the J range
+        tolerance = J_TOLERANCE * (j_max - j_min)
+        outside = ((rpm < rpm_min) | (rpm > rpm_max) | (j < j_min - tolerance)
+                   | ~(j <= self._j_max(prop, rpm) + tolerance))
+        out[outside] = np.nan
+        return out.reshape(shape + (len(SURROGATE_QUANTITIES),))
+
+    def errors(self):
+        """ Dataframe of the fit domain and the max |fit - table| of Ct and Cp of every propeller. """
+        return pd.DataFrame({"prop_id": self.prop_ids,
+                             "D (m)": self.diameter,
+                             "J min": self.domain[:, 0], "J max": self.domain[:, 1],
+                             "RPM min": self.domain[:, 2], "RPM max": self.domain[:, 3],
+                             "max error Ct": self.max_error[:, 0],
+                             "max error Cp": self.max_error[:, 1]})
+
+    @property
+    def nbytes(self):
+        """ Size of the stored arrays [bytes]. """
+        return sum(getattr(self, name).nbytes for name in self.ARRAYS if name not in ("files", "manifest"))
+
+
+def _scaled(x, low, high):
+    """ x mapped from [low, high] to the Chebyshev interval [-1, 1] (0 if low == high). """
+    width = np.where(high > low, high - low, 1.0)
+    return np.where(high > low, 2 * (x - low) / width - 1, 0.0)
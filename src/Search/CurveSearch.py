@@ -0,0 +1,131 @@
+import time
+import numpy as np
+from Objects.OperatingPoint import regrid_blocks
+
+""" Curve-shape similarity search: the Ct, Cp and Pe vs J curves of every (prop, RPM) row of the search index
+    are resampled once on a common J grid and kept as one dense float32 matrix. A query curve is compared
+    with every row at once with matrix products (exact brute-force search, no pairwise dataframe work). """
+
+CURVE_QUANTITIES = ["Ct", "Cp", "Pe"]
+
+
+class CurveIndex():
+    """
+    Dense curve matrix built once from the PropellerSearchTree dataframe (J_array, Ct_array, Cp_array, Pe_array).
+
+        values  (rows, n_quantities * n_points) float32, curves divided by the scale of each quantity
+        valid   same shape, 1 where the grid point is inside the tabulated J range of the row, else 0
+
+    The distance between two curves is the RMS difference of the scaled values over the grid points
+    where both are tabulated (and the quantities compared). Rows covering less than min_overlap of the
+    query points are not returned.
+    """
+
+    def __init__(self, df, n_points=64, j_max=None):
+        """
+        INPUTS
+            df = search index dataframe (PropellerSearchTree().df)
+            n_points = points of the common J grid
+            j_max = end of the J grid (default: highest tabulated J); the grid starts at J = 0
+        """
+        lengths = np.array([len(curve) for curve in df["J_array"]], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        j = np.concatenate(df["J_array"].tolist()).astype(np.float64)
+        ys = np.column_stack([np.concatenate(df[f"{q}_array"].tolist()) for q in CURVE_QUANTITIES])
+
+        self.n_rows = len(df)
+        self.grid = np.linspace(0.0, j.max() if j_max is None else j_max, n_points)
+        curves = regrid_blocks(offsets, j, ys, self.grid)                  # (rows, n_points, quantities), NaN outside
+        curves = curves.transpose(0, 2, 1).reshape(self.n_rows, -1)        # quantity-major columns
+
+        valid = ~np.isnan(curves)
+        self.scale = np.array([np.std(ys[:, i]) or 1.0 for i in range(len(CURVE_QUANTITIES))])
+        curves = np.where(valid, curves / np.repeat(self.scale, n_points), 0.0)
+
+        self.values = curves.astype(np.float32)
+        self.valid = valid.astype(np.float32)
+        self.squares = self.values * self.values
+        self.last_query_us = None
+
+    def resample(self, J, curves):
+        """
+        (vector, weight) of a measured curve on the grid: weight is 0 outside the measured J range and
+        for the quantities not given.
+
+        INPUTS
+            J = advance ratio array (increasing)
+            curves = dictionary {quantity: array}, quantities among CURVE_QUANTITIES. Example {"Ct": ct, "Pe": pe}
+        """
+        unknown = set(curves) - set(CURVE_QUANTITIES)
+        if unknown or not curves:
+            raise ValueError(f"Invalid curves {sorted(unknown)}. Give at least one of {CURVE_QUANTITIES}.")
+        J = np.asarray(J, dtype=np.float64)
+        order = np.argsort(J, kind='stable')
+        n_points = len(self.grid)
+
+        vector = np.zeros((len(CURVE_QUANTITIES), n_points))
+        weight = np.zeros((len(CURVE_QUANTITIES), n_points))
+        inside = (self.grid >= J[order[0]]) & (self.grid <= J[order[-1]])
+        for i, quantity in enumerate(CURVE_QUANTITIES):
+            if quantity in curves:
+                y = np.asarray(curves[quantity], dtype=np.float64)[order]
+                vector[i, inside] = np.interp(self.grid[inside], J[order], y) / self.scale[i]
+                weight[i, inside] = 1.0
+        return vector.ravel(), weight.ravel()
+
+    def row_vector(self, row, quantities=None):
+        """ (vector, weight) of an index row, restricted to some quantities (default: all). """
+        weight = self.valid[row].astype(np.float64)
+        if quantities is not None:
+            unknown = set(quantities) - set(CURVE_QUANTITIES)
+            if unknown:
+                raise ValueError(f"Invalid quantities {sorted(unknown)}. Use {CURVE_QUANTITIES}.")
+            keep = np.repeat([q in quantities for q in CURVE_QUANTITIES], len(self.grid))
+            weight = weight * keep
+        return self.values[row].astype(np.float64), weight
+
+    def query(self, vectors, weights, k=5, min_overlap=0.8, exclude=None, chunk_size=256):
+        """
+        k most similar rows of each query curve.
+        Returns (distances, rows) arrays of shape (n_queries, k), sorted by distance; missing neighbours
+        (less than k rows with enough overlap) have distance inf and row -1.
+        The elapsed time is stored in last_query_us (microseconds).
+
+        INPUTS
+            vectors, weights = (n_queries, n_columns) arrays, as returned by resample / row_vector
+            k = neighbours per query
+            min_overlap = minimum fraction of the query points a row must cover
+            exclude = optional list (one per query) of row arrays that must not be returned
+        """
+        start = time.perf_counter_ns()
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        weights = np.atleast_2d(np.asarray(weights, dtype=np.float32))
+        n_queries = len(vectors)
+        k_rows = min(k, self.n_rows)
+
+        distances = np.full((n_queries, k), np.inf)
+        rows = np.full((n_queries, k), -1, dtype=np.int64)
+        for q0 in range(0, n_queries, chunk_size):
+            q1 = min(q0 + chunk_size, n_queries)
+            w, wq = weights[q0:q1], weights[q0:q1] * vectors[q0:q1]
+
+            # - sum over the common points of (x - q)^2 = x^2.w - 2 x.(w q) + valid.(w q^2)
+            squared = self.squares @ w.T - 2 * (self.values @ wq.T) + self.valid @ (wq * vectors[q0:q1]).T
+            overlap = self.valid @ w.T                                       # (rows, queries)
+            enough = overlap >= min_overlap * w.sum(axis=1) - 1e-3
+            d = np.where(enough & (overlap > 0),
+                         np.sqrt(np.maximum(squared, 0) / np.maximum(overlap, 1)), np.inf).T
+            if exclude is not None:
+                for i, excluded in enumerate(exclude[q0:q1]):
+                    d[i, excluded] = np.inf
+
+            best = np.argpartition(d, k_rows - 1, axis=1)[:, :k_rows] if k_rows < self.n_rows \
+                else np.tile(np.arange(self.n_rows), (q1 - q0, 1))
+            best = np.take_along_axis(best, np.argsort(np.take_along_axis(d, best, axis=1), axis=1, kind='stable'),
+                                      axis=1)
+            best_d = np.take_along_axis(d, best, axis=1)
+            distances[q0:q1, :k_rows] = best_d
+            rows[q0:q1, :k_rows] = np.where(np.isfinite(best_d), best, -1)
+
+        self.last_query_us = (time.perf_counter_ns() - start) / 1000
+        return distances, rows
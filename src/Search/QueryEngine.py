@@ -0,0 +1,187 @@
+import time
+import numpy as np
+
+""" Compiled range queries over the search index: every column is kept pre-sorted, so a (min, max)
+    constraint is two binary searches; text columns (ex: prop_type) are kept as categorical codes. """
+
+
+class RangeQueryEngine():
+    """
+    Query engine built once from the PropellerSearchTree dataframe.
+
+    Numeric column: values, row order sorted by value and the sorted values.
+    Text column: integer codes, category -> code and rows sorted by code (one contiguous run per category).
+    A query takes the rows of its most selective constraint and checks the others only on those rows.
+    """
+
+    def __init__(self, df):
+        self.n_rows = len(df)
+        self.numeric = {}
+        self.text = {}
+
+        for col in df.columns:
+            values = df[col].to_numpy()
+            if values.dtype == object and len(values) and isinstance(values[0], np.ndarray):
+                continue  # curve arrays are not searchable
+            if np.issubdtype(values.dtype, np.number):
+                values = values.astype(np.float64)
+                order = np.argsort(values, kind='stable')
+                self.numeric[col] = (values, order, values[order])
+            else:
+                categories, codes = np.unique(values.astype(str), return_inverse=True)
+                order = np.argsort(codes, kind='stable')
+                bounds = np.searchsorted(codes[order], np.arange(len(categories) + 1))
+                self.text[col] = (codes, {c: i for i, c in enumerate(categories.tolist())}, order, bounds)
+
+        self.last_query_us = None
+
+    def _candidates(self, col, val):
+        """ (number of rows, rows array, row test) of one constraint. """
+        if col in self.text:
+            codes, lookup, order, bounds = self.text[col]
+            wanted = sorted({lookup[v] for v in (val if isinstance(val, (list, tuple, set)) else [val]) if v in lookup})
+            rows = np.concatenate([order[bounds[c]:bounds[c + 1]] for c in wanted]) if wanted \
+                else np.zeros(0, dtype=np.int64)
+            wanted = np.array(wanted, dtype=codes.dtype)
+            return len(rows), rows, lambda r: np.isin(codes[r], wanted)
+
+        if col in self.numeric:
+            values, order, sorted_values = self.numeric[col]
+            c_min, c_max = val
+            lo = 0 if c_min is None else np.searchsorted(sorted_values, c_min, side='left')
+            hi = self.n_rows if c_max is None else np.searchsorted(sorted_values, c_max, side='right')
+            hi = max(lo, hi)
+            lower = -np.inf if c_min is None else c_min
+            upper = np.inf if c_max is None else c_max
+            return hi - lo, order[lo:hi], lambda r: (values[r] >= lower) & (values[r] <= upper)
+
+        raise ValueError(f"Invalid constraint '{col}'. Use one of {list(self.text) + list(self.numeric)}.")
+
+    def query(self, constraints, sort_by=None, top_k=None):
+        """
+        Row positions matching all constraints, sorted by "sort_by" in descending order
+        (ties keep the table order). With top_k only the best top_k rows are selected and sorted.
+        The elapsed time is stored in last_query_us (microseconds).
+
+        INPUTS
+            constraints = {numeric column: (min, max)} (None = open bound) or {text column: value or list}
+            sort_by = numeric column name, or None to keep the table order
+            top_k = maximum number of rows returned
+        """
+        start = time.perf_counter_ns()
+
+        # - plan: most selective constraint first, the others are checked on its rows only
+        plans = sorted((self._candidates(col, val) for col, val in constraints.items()), key=lambda p: p[0])
+        if plans:
+            rows = plans[0][1]
+            for _, _, test in plans[1:]:
+                if rows.size == 0:
+                    break
+                rows = rows[test(rows)]
+            rows = np.sort(rows)
+        else:
+            rows = np.arange(self.n_rows)
+
+        if sort_by is not None and rows.size:
+            if sort_by not in self.numeric:
+                raise ValueError(f"Invalid sort_by '{sort_by}'. Use one of {list(self.numeric)}.")
+            score = -self.numeric[sort_by][0][rows]
+            if top_k is not None and top_k < rows.size:
+                # - partial selection of the k-th best score; rows tied with it are taken in table order,
+                #   as the full stable sort would
+                kth = np.partition(score, top_k - 1)[top_k - 1]
+                better = np.flatnonzero(score < kth)
+                tied = np.flatnonzero(score == kth)[:top_k - better.size]
+                best = np.concatenate([better, tied])
+                rows = rows[best][np.lexsort((rows[best], score[best]))]
+            else:
+                rows = rows[np.argsort(score, kind='stable')]
+        if top_k is not None:
+            rows = rows[:top_k]
+
+        self.last_query_us = (time.perf_counter_ns() - start) / 1000
+        return rows
+
+    def _rank_bounds(self, col, bounds):
+        """ Rank intervals [lo, hi) in the sorted column for a list of (min, max) bounds (None = open). """
+        sorted_values = self.numeric[col][2]
+        c_min = np.array([np.nan if b is None or b[0] is None else b[0] for b in bounds], dtype=np.float64)
+        c_max = np.array([np.nan if b is None or b[1] is None else b[1] for b in bounds], dtype=np.float64)
+        lo = np.where(np.isnan(c_min), 0, np.searchsorted(sorted_values, c_min, side='left'))
+        hi = np.where(np.isnan(c_max), self.n_rows, np.searchsorted(sorted_values, c_max, side='right'))
+        return lo, np.maximum(hi - lo, 0)
+
+    def query_batch(self, constraints_list, sort_by=None, top_k=None, chunk_size=256):
+        """
+        Vectorized query() for many constraint sets at once.
+        Returns one (rows, scores) pair of arrays per query, rows in query() order and scores the
+        sort_by values (None if sort_by is None). The elapsed time is stored in last_query_us.
+
+        Each chunk of queries is evaluated as a (queries x rows) boolean matrix, with the rows laid out in
+        sort_by order: numeric constraints become rank intervals of the pre-sorted columns and the
+        first top_k True entries of each line are the answer.
+        """
+        start = time.perf_counter_ns()
+        n_queries = len(constraints_list)
+
+        # - row layout in result order
+        if sort_by is not None:
+            if sort_by not in self.numeric:
+                raise ValueError(f"Invalid sort_by '{sort_by}'. Use one of {list(self.numeric)}.")
+            layout = np.argsort(-self.numeric[sort_by][0], kind='stable')
+        else:
+            layout = np.arange(self.n_rows)
+
+        # - compile constraints: rank intervals per numeric column, allowed categories per text column
+        #   (ranks in the smallest integer type, compared through its unsigned view)
+        rank_type, unsigned_type = (np.int16, np.uint16) if self.n_rows < 2 ** 15 else (np.int32, np.uint32)
+        used = {col for constraints in constraints_list for col in constraints}
+        numeric, text = [], []
+        for col in used:
+            if col in self.numeric:
+                lo, width = self._rank_bounds(col, [c.get(col) for c in constraints_list])
+                rank = np.empty(self.n_rows, dtype=rank_type)
+                rank[self.numeric[col][1]] = np.arange(self.n_rows)
+                numeric.append((rank[layout], lo.astype(rank_type), width.astype(unsigned_type)))
+            elif col in self.text:
+                codes, lookup, _, _ = self.text[col]
+                allowed = np.ones((n_queries, len(lookup)), dtype=bool)
+                for q, constraints in enumerate(constraints_list):
+                    if col in constraints:
+                        val = constraints[col]
+                        allowed[q] = False
+                        allowed[q, [lookup[v] for v in (val if isinstance(val, (list, tuple, set)) else [val])
+                                    if v in lookup]] = True
+                text.append((codes[layout], allowed))
+            else:
+                raise ValueError(f"Invalid constraint '{col}'. Use one of {list(self.text) + list(self.numeric)}.")
+
+        results = []
+        for q0 in range(0, n_queries, chunk_size):
+            q1 = min(q0 + chunk_size, n_queries)
+            mask = np.ones((q1 - q0, self.n_rows), dtype=bool)
+            for rank, lo, width in numeric:
+                if (width[q0:q1] < self.n_rows).any():
+                    # - lo <= rank < lo + width, as a single unsigned comparison
+                    mask &= (rank[None, :] - lo[q0:q1, None]).view(unsigned_type) < width[q0:q1, None]
+            for codes, allowed in text:
+                if not allowed[q0:q1].all():
+                    mask &= allowed[q0:q1][:, codes]
+
+            # - first top_k matches of each query (np.nonzero is row-major, so already in result order)
+            query, position = np.nonzero(mask)
+            counts = np.bincount(query, minlength=q1 - q0)
+            if top_k is not None:
+                first = np.concatenate([[0], np.cumsum(counts)[:-1]])
+                keep = np.arange(query.size) - first[query] < top_k
+                position = position[keep]
+                counts = np.minimum(counts, top_k)
+
+            rows = layout[position]
+            scores = self.numeric[sort_by][0][rows] if sort_by is not None else None
+            splits = np.cumsum(counts)[:-1]
+            results.extend(zip(np.split(rows, splits),
+                               np.split(scores, splits) if scores is not None else [None] * (q1 - q0)))
+
+        self.last_query_us = (time.perf_counter_ns() - start) / 1000
+        return results
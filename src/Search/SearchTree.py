@@ -1,118 +1,337 @@
 from Objects.Performance import *
+from Objects.Catalog import catalog_cache_path, catalog_fingerprint, catalog_manifest, file_digests, temp_path, \
+    source_token
+from Search.QueryEngine import RangeQueryEngine
+from Search.CurveSearch import CurveIndex
+from Objects.ClassAPC import _normalize_code
+from Objects.Instrumentation import timed, stage, cache_hit, cache_miss
 
-import joblib
-from scipy.spatial import KDTree
+from concurrent.futures import ProcessPoolExecutor
 
 """ Definition of the search tree, pre-processing and functions to find propellers based on performance data. """
 
+METADATA_COLUMNS = ['prop_id', 'prop_type', 'filepath', 'D (in)', 'RPM',
+                    'maxThrust (N)', 'maxPower (W)', 'maxTorque (Nm)', 'maxFoM', 'max THR/PWR (g/W)',
+                    'J_array', 'Ct_array', 'Cp_array', 'Pe_array']
+
+
+def _prop_metadata(path):
+    """
+    Metadata rows (one per RPM) of a PER3 file, as lists in METADATA_COLUMNS order.
+    Module level function so it can run in worker processes. The file is parsed from its path,
+    so an index can be built from any PERFILES2 directory (see PropellerSearchTree.perfomance_path).
+    """
+    archive = os.path.basename(path)
+    perfomance_df = Performance()._parse_file(path, engine="fast")
+
+    # - extract propeller id info
+    prop_id, diameter, prop_type = PropellerSearchTree.get_prop_id(archive)
+
+    # - one groupby for all RPM maxima, keeping the file order of the RPM blocks
+    grouped = perfomance_df.groupby("RPM", sort=False)
+    maxima = grouped[["Thrust (N)", "PWR (W)", "Torque (N-m)", "FOM", "THR/PWR (g/W)"]].max()
+    curves = perfomance_df[["J (Adv_Ratio)", "Ct", "Cp", "Pe"]].to_numpy()
+    positions = grouped.indices
+
+    records = []
+    for rpm, (thrust, power, torque, fom, thr_pwr) in zip(maxima.index, maxima.to_numpy()):
+        curve = curves[positions[rpm]]
+        records.append([prop_id, prop_type, archive, diameter, rpm,
+                        thrust, power, torque, fom, thr_pwr,
+                        curve[:, 0], curve[:, 1], curve[:, 2], curve[:, 3]])
+    return records
+
+
+# --- Binary index format (.npz): text columns as codes + unique values, scalar columns as typed arrays,
+#     curves as ragged arrays (one flat array per curve column + row offsets)
+TEXT_COLUMNS = ['prop_id', 'prop_type', 'filepath']
+SCALAR_COLUMNS = ['D (in)', 'RPM', 'maxThrust (N)', 'maxPower (W)', 'maxTorque (Nm)', 'maxFoM', 'max THR/PWR (g/W)']
+CURVE_COLUMNS = ['J_array', 'Ct_array', 'Cp_array', 'Pe_array']
+SEARCH_FEATURES = ['RPM', 'maxThrust (N)', 'maxPower (W)', 
+                   'maxTorque (Nm)', 'maxFoM', 'max THR/PWR (g/W)']
+
+
+INDEX_VERSION = 2  # bump when the index layout or its content changes
+
+# --- Source file manifest stored in the index: file names, (mtime_ns, size) and content hash of each PER3 file
+MANIFEST_ARRAYS = ['manifest_files', 'manifest_stat', 'manifest_hash']
+
+# --- Loaded search engines, shared by every PropellerSearchTree: {index path: engine}
+_ENGINES = {}
+
+
+def save_index(path, tree_df, **extra):
+    """ Writes the metadata dataframe (and extra arrays, ex: f_min) to a .npz file, atomically. """
+    arrays = {}
+    for col in TEXT_COLUMNS:
+        arrays[col + ' values'], arrays[col + ' codes'] = np.unique(tree_df[col].to_numpy(dtype=str), return_inverse=True)
+    arrays.update({col: tree_df[col].to_numpy(dtype=np.float64) for col in SCALAR_COLUMNS})
+    lengths = [len(curve) for curve in tree_df[CURVE_COLUMNS[0]]]
+    arrays['curve_offsets'] = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+    for col in CURVE_COLUMNS:
+        curves = tree_df[col].tolist()
+        arrays[col] = np.concatenate(curves).astype(np.float64) if curves else np.zeros(0)
+    arrays.update(extra)
+
+    tmp_path = temp_path(path)
+    with open(tmp_path, 'wb') as file:
+        np.savez(file, **arrays)
+    os.replace(tmp_path, path)
+
+
+def load_index(path):
+    """ Reads a .npz written by save_index. Returns the metadata dataframe and the remaining arrays. """
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {name: data[name] for name in data.files}
+
+    columns = {col: arrays.pop(col + ' values')[arrays.pop(col + ' codes')] for col in TEXT_COLUMNS}
+    columns.update({col: arrays.pop(col) for col in SCALAR_COLUMNS})
+    columns['RPM'] = columns['RPM'].astype(np.int64)
+
+    # - each row holds a view of the flat curve array
+    offsets = arrays.pop('curve_offsets').tolist()
+    for col in CURVE_COLUMNS:
+        flat = arrays.pop(col)
+        curves = np.empty(len(offsets) - 1, dtype=object)
+        curves[:] = [flat[start:stop] for start, stop in zip(offsets[:-1], offsets[1:])]
+        columns[col] = curves
+
+    tree_df = pd.DataFrame(columns)
+    return tree_df[METADATA_COLUMNS], arrays
+
 
 class PropellerSearchTree(Performance):
 
-    def __init__(self, pkl_filename="propeller_search_tree.pkl"):
+    def __init__(self, index_path=None, workers=None):
+        """
+        The search index is loaded on first use (df, tree or engine access) and shared by every
+        instance of the process. It lives in the user cache directory and is rebuilt automatically
+        when missing, written by another INDEX_VERSION or built from different APC files.
+
+        INPUTS
+            index_path = custom location of the index file (default: user cache directory)
+            workers = processes used if the index has to be built (see preprocess)
+        """
         super().__init__()
 
-        # - file path
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        pkl_path = os.path.join(script_dir, pkl_filename)
+        # - file paths
+        self.metadata_path = catalog_cache_path(self.perfomance_path, "search_metadata")
+        self.index_path = Path(index_path) if index_path is not None else \
+            catalog_cache_path(self.perfomance_path, "search_index")
+        self.workers = workers
+        self.last_query_us = None
+        self._summary = None
+
+    @property
+    def engine(self):
+        """ Search engine dictionary: 'df', 'f_min', 'f_range', 'features', 'scaled' and 'tree' (built by the tree property). """
+        key = str(self.index_path)
+        engine = _ENGINES.get(key)
+        token = source_token(self.perfomance_path)
+        if engine is None or engine['source_token'] != token:
+            cache_miss("search.engine")
+            engine = self._load_or_build_engine()
+            engine['source_token'] = source_token(self.perfomance_path, force=True)
+            _ENGINES[key] = engine
+        else:
+            cache_hit("search.engine")
+        return engine
+
+    @property
+    def df(self):
+        return self.engine['df']
+
+    @property
+    def tree(self):
+        """ KDTree over the scaled SEARCH_FEATURES, built on first use (scipy is only imported here). """
+        engine = self.engine
+        if engine['tree'] is None:
+            from scipy.spatial import KDTree
+            with stage("search.kdtree"):
+                engine['tree'] = KDTree(engine['scaled'])
+        return engine['tree']
+
+    def _load_or_build_engine(self):
+        fingerprint = catalog_fingerprint(self.perfomance_path)
+        if os.path.exists(self.index_path):
+            engine = self.load_engine(self.index_path)
+            if engine['version'] == INDEX_VERSION:
+                if engine['fingerprint'] == fingerprint:
+                    return engine
+                # - APC files changed: re-parse only the added or edited ones
+                return self._patch_engine(engine)[0]
+
+        # - missing or outdated index
+        return self._rebuild_engine()[0]
+
+    @staticmethod
+    @timed("search.load_engine")
+    def load_engine(index_path):
+        """ Loads the index written by create_KDTree; the KDTree is rebuilt from the stored scaling on first use. """
+        df, arrays = load_index(index_path)
+        return PropellerSearchTree._make_engine(df, arrays)
+
+    @staticmethod
+    def _make_engine(df, arrays):
+        features = arrays['features'].tolist()
+        scaled_matrix = (df[features].to_numpy(dtype=np.float64) - arrays['f_min']) / arrays['f_range']
+        return {
+            'tree': None,
+            'scaled': scaled_matrix,
+            'df': df,
+            'f_min': arrays['f_min'],
+            'f_range': arrays['f_range'],
+            'features': features,
+            'version': int(arrays['version']) if 'version' in arrays else None,
+            'fingerprint': str(arrays['fingerprint']) if 'fingerprint' in arrays else None,
+            'manifest': {name: arrays[name] for name in MANIFEST_ARRAYS} if 'manifest_files' in arrays else None
+        }
 
-        # - after first pre-processing 
-        self.engine = joblib.load(pkl_path)
-        self.df = self.engine['df']
-        self.tree = self.engine['tree']
+    @timed("search.update_index")
+    def update_index(self):
+        """
+        Incremental update of the search index after APC files were added, edited or removed.
+        Only those files are parsed again: their metadata rows are replaced in the index, the feature
+        scaling is recomputed and the KDTree rebuilt. Files whose mtime or size changed but whose content
+        hash did not (ex: copied again) are not parsed.
+        Without an index (or with one from another INDEX_VERSION) the index is built from scratch.
+        Outputs a dictionary with the 'added', 'changed' and 'deleted' file names.
+        """
+        key = str(self.index_path)
+        engine = _ENGINES.get(key)
+        if engine is None and os.path.exists(self.index_path):
+            engine = self.load_engine(self.index_path)
 
-    def get_prop_id(self, archive_filename):
+        if engine is None or engine['version'] != INDEX_VERSION:
+            engine, changes = self._rebuild_engine()
+        else:
+            engine, changes = self._patch_engine(engine)
+
+        engine['source_token'] = source_token(self.perfomance_path, force=True)
+        _ENGINES[key] = engine
+        return changes
+
+    def _rebuild_engine(self):
+        """ (engine, changes) of an index built from scratch: every file is reported as added. """
+        self.preprocess(workers=self.workers)
+        self.create_KDTree()
+        engine = self.load_engine(self.index_path)
+        return engine, {'added': engine['manifest']['manifest_files'].tolist(), 'changed': [], 'deleted': []}
+
+    def _patch_engine(self, engine):
+        """ (engine, changes) after re-parsing the files that differ from the index manifest (see update_index). """
+        manifest = engine['manifest']
+        if manifest is None:
+            return self._rebuild_engine()
+
+        # - compare (mtime, size) first; hash only the files where it differs
+        names, paths, stat = catalog_manifest(self.perfomance_path)
+        stored = {name: i for i, name in enumerate(manifest['manifest_files'].tolist())}
+        digests = np.empty(len(names), dtype='<U32')
+        added, changed = [], []
+        for i, name in enumerate(names):
+            j = stored.get(name)
+            if j is None:
+                added.append(name)
+                digests[i] = file_digests([paths[i]])[0]
+            elif (manifest['manifest_stat'][j] == stat[i]).all():
+                digests[i] = manifest['manifest_hash'][j]
+            else:
+                digests[i] = file_digests([paths[i]])[0]
+                if digests[i] != manifest['manifest_hash'][j]:
+                    changed.append(name)
+        deleted = sorted(set(stored) - set(names))
+        changes = {'added': added, 'changed': changed, 'deleted': deleted}
+
+        # - replace the rows of the stale files, keeping the preprocess order (file name, then RPM block)
+        df = engine['df']
+        if added or changed or deleted:
+            stale = np.isin(df['filepath'].to_numpy(), changed + deleted)
+            new = pd.DataFrame([row for archive in added + changed
+                                for row in _prop_metadata(os.path.join(self.perfomance_path, archive))],
+                               columns=METADATA_COLUMNS)
+            new = new.astype({col: np.float64 for col in SCALAR_COLUMNS} | {'RPM': np.int64})
+            df = pd.concat([df[~stale], new], ignore_index=True)
+            df = df.iloc[np.argsort(df['filepath'].to_numpy(), kind='stable')].reset_index(drop=True)
+
+        manifest = {'manifest_files': np.array(names), 'manifest_stat': stat, 'manifest_hash': digests}
+        fingerprint = np.array(catalog_fingerprint(self.perfomance_path))
+        engine = self._make_engine(df, self._save_search_index(df, fingerprint, manifest))
+        # - the preprocess output is stale now: create_KDTree reads the patched index instead
+        if os.path.exists(self.metadata_path):
+            os.remove(self.metadata_path)
+
+        from scipy.spatial import KDTree
+        with stage("search.kdtree"):
+            engine['tree'] = KDTree(engine['scaled'])
+        return engine, changes
+
+    @staticmethod
+    def get_prop_id(archive_filename):
         # Pattern to capture: [Diameter] x [Pitch] [Type]
         # Example: 27x13E -> Group 1: 27, Group 2: 13.5, Group 3: E
-        pattern = r"PER3_((\d+\.?\d*)x(\d+\.?\d*)(.*?))\.dat"
+        return parse_prop_id(archive_filename)
 
-        match = re.search(pattern, archive_filename)
-        if match:
-            prop_id = match.group(1)   # Full ID
-            diameter = match.group(2)  # Number before 'x'
-            pitch = match.group(3)     # Number after 'x'
-            prop_type = match.group(4) if match.group(4) else "Standard"
-            return prop_id, diameter, prop_type
-        else: 
-            raise ValueError(f"ERROR in finding ID pattern. File error = {archive_filename}")
+    @timed("search.preprocess")
+    def preprocess(self, workers=None):
+        """ Create the metadata index (.npz) used to generate a KDTree 
 
-    def preprocess(self):
-        """ Create the .csv file to generate a KDTree 
-        
+        INPUTS
+            workers = number of processes reading the files (default: number of CPUs; 1 = no process pool)
         """
 
-        tree_df = pd.DataFrame()
-
         # --- Open each prop file and extract the characteristics
-        archives = os.listdir(self.perfomance_path)
-        for archive in archives:
-            perfomance_df = self.read_data(prop=archive)
-
-            # - extract propeller id info
-            prop_id, diameter, prop_type = self.get_prop_id(archive)
-
-            # - for each unique RPM, extract the data
-            rpms = perfomance_df["RPM"].unique()
-            for rpm in rpms:
-                df_unique_rpm = perfomance_df.copy()
-                df_unique_rpm = df_unique_rpm[df_unique_rpm["RPM"] == rpm] # filter rpm
-
-                prop_metadata = {
-                    'prop_id':  prop_id,
-                    'prop_type': prop_type, #E, MR, W, ...
-                    'filepath': archive,
-                    'D (in)': diameter,
-                    'RPM': rpm,
-                    'maxThrust (N)': df_unique_rpm["Thrust (N)"].max(),
-                    'maxPower (W)': df_unique_rpm["PWR (W)"].max(),
-                    'maxTorque (Nm)': df_unique_rpm["Torque (N-m)"].max(),
-                    'maxFoM': df_unique_rpm["FOM"].max(), #static
-                    'max THR/PWR (g/W)': df_unique_rpm["THR/PWR (g/W)"].max(),
-                    'J_array': df_unique_rpm["J (Adv_Ratio)"].to_numpy(),
-                    'Ct_array': df_unique_rpm["Ct"].to_numpy(),
-                    'Cp_array': df_unique_rpm["Cp"].to_numpy(), 
-                    'Pe_array': df_unique_rpm["Pe"].to_numpy(), 
-                }
-
-                # - Add to pandas dataframe
-                index_df = pd.DataFrame([prop_metadata])
-                tree_df = pd.concat([tree_df, index_df], ignore_index=True)
-        
-        # - turn dataframe into csv
-        tree_df.to_csv("APC_propeller_metadata.csv")
+        fingerprint = catalog_fingerprint(self.perfomance_path)
+        archives, paths, stat = catalog_manifest(self.perfomance_path)
+        rows = []
+        if workers == 1:
+            for path in paths:
+                rows.extend(_prop_metadata(path))
+        else:
+            workers = workers or os.cpu_count() or 1
+            chunksize = max(1, len(archives) // (4 * workers))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for records in executor.map(_prop_metadata, paths, chunksize=chunksize):
+                    rows.extend(records)
+
+        # - build the dataframe once
+        tree_df = pd.DataFrame(rows, columns=METADATA_COLUMNS)
 
+        # - save scalar columns and curve arrays in binary form, with the manifest used by update_index
+        save_index(self.metadata_path, tree_df, fingerprint=np.array(fingerprint),
+                   manifest_files=np.array(archives), manifest_stat=stat, manifest_hash=file_digests(paths))
+
+    @timed("search.create_KDTree")
     def create_KDTree(self):
-        """ Create a .pkg job to represent the KDTree """
+        """ Create the search index (.npz) used to represent the KDTree """
+
+        df, arrays = load_index(self.metadata_path if os.path.exists(self.metadata_path) else self.index_path)
+        self._save_search_index(df, arrays['fingerprint'],
+                                {name: arrays[name] for name in MANIFEST_ARRAYS if name in arrays})
+        _ENGINES.pop(str(self.index_path), None)
 
-        df = pd.read_csv("APC_propeller_metadata.csv")
+        print('APC propeller search tree created. ')
+
+    def _save_search_index(self, df, fingerprint, manifest):
+        """ Writes the search index of a metadata dataframe and returns its arrays (see load_index). """
 
         # - define spatial search parameters
-        search_features = [
-            'RPM', 'maxThrust (N)', 'maxPower (W)', 
-            'maxTorque (Nm)', 'maxFoM', 'max THR/PWR (g/W)'
-        ]
+        search_features = SEARCH_FEATURES
 
         # - create and scale the matrix used to define the search tree
-        matrix = df[search_features].to_numpy()
+        matrix = df[search_features].to_numpy(dtype=np.float64)
         f_min = matrix.min(axis=0)
         f_max = matrix.max(axis=0)
         f_range = np.where((f_max - f_min) == 0, 1, f_max - f_min) # avoid division by zero if a column is constant
-        scaled_matrix = (matrix - f_min) / f_range
 
-        # - create and define the job
-        tree = KDTree(scaled_matrix)
+        # - save the metadata with the scaling; the KDTree is rebuilt from it when loading
+        arrays = dict(f_min=f_min, f_range=f_range, features=np.array(search_features),
+                      version=np.array(INDEX_VERSION), fingerprint=fingerprint, **manifest)
+        save_index(self.index_path, df, **arrays)
+        return arrays
 
-        search_engine = {
-            'tree': tree,
-            'df': df,
-            'f_min': f_min,
-            'f_range': f_range,
-            'features': search_features
-        }
-        joblib.dump(search_engine, "propeller_search_tree.pkl")
-
-        print('APC propeller search tree created. ')
-
-    def search_by_range(self, constraints, sort_by):
+    @timed("search.range")
+    def search_by_range(self, constraints, sort_by, top_k=None):
         """
         Search fittest propeller based on the given range input parameters. 
         Outputs a dataframe with the propellers sorted by the given condition.
@@ -120,6 +339,7 @@ class PropellerSearchTree(Performance):
         INPUTS
             constraints = dictionary containing constraint name and range (min, max)
             sort_by = name of the parameter to sort in descending manner
+            top_k = optional maximum number of propellers returned (best ones by sort_by)
         ---
         Parameters for input
 
@@ -133,37 +353,274 @@ class PropellerSearchTree(Performance):
             Maximum Figure of Merit: 'maxFoM'
             Maximum Thrust/Power: 'max THR/PWR (g/W)'
 
+        The query runs on pre-sorted columns (see QueryEngine.RangeQueryEngine);
+        its latency in microseconds is stored in self.last_query_us.
         """
-        query_df = self.df.copy()
-        
-        for col, val in constraints.items():
-            # check if filtering by prop_type (string/categorical)
-            if col == 'prop_type':
-                if isinstance(val, list):
-                    # filter by a list of types: ['E', 'EPN']
-                    query_df = query_df[query_df[col].isin(val)]
-                else:
-                    # filter by a single type string: 'E'
-                    query_df = query_df[query_df[col] == val]
-            
-            # numeric range filtering
-            else:
-                c_min, c_max = val
-                if c_min is not None:
-                    query_df = query_df[query_df[col] >= c_min]
-                if c_max is not None:
-                    query_df = query_df[query_df[col] <= c_max]
-                    
-        if query_df.empty:
+        if constraints.get('RPM') is not None:
+            self._check_rpm_constraint(constraints['RPM'])
+        query = self.query_engine
+        rows = query.query(constraints, sort_by=sort_by, top_k=top_k)
+        self.last_query_us = query.last_query_us
+
+        if rows.size == 0:
             raise ValueError("No propeller match the constraints.")
         else:
-            return query_df.sort_values(by=sort_by, ascending=False)
+            return self.df.iloc[rows]
+
+    @timed("search.range_batch")
+    def search_by_range_batch(self, list_of_constraints, sort_by=None, top_k=None):
+        """
+        Run many search_by_range queries in one vectorized call (ex: one per mission profile).
+        Outputs a list with one (rows, scores) pair per query: rows are positions in self.df
+        (self.df.iloc[rows]) in search_by_range order and scores are their sort_by values.
+        Queries without matches get empty arrays. The total latency is stored in self.last_query_us.
+
+        INPUTS
+            list_of_constraints = list of constraint dictionaries, as in search_by_range
+            sort_by = name of the parameter to sort in descending manner (None keeps the table order)
+            top_k = optional maximum number of propellers per query
+        """
+        query = self.query_engine
+        results = query.query_batch(list_of_constraints, sort_by=sort_by, top_k=top_k)
+        self.last_query_us = query.last_query_us
+        return results
+
+    @property
+    def summary(self):
+        """ Summary reader of the PER2_*.DAT tables (RPM range checks), created on first use. """
+        if self._summary is None:
+            from Objects.Summary import Summary
+            self._summary = Summary()
+        return self._summary
+
+    def _check_rpm_constraint(self, bounds):
+        """
+        Raises RPMOutOfRangeError if a (min, max) RPM constraint is outside the RPM range of every propeller.
+        Only PER2_RPMRANGE.DAT is read, so the query is rejected before the index is loaded (or built from
+        the PER3 files). Without that file the index answers alone.
+        """
+        from Objects.Summary import RPMOutOfRangeError
+        try:
+            rpm_min, rpm_max = self.summary.catalog_rpm_range()
+        except OSError:
+            return
+        low, high = bounds
+        if low is not None and low > rpm_max:
+            raise RPMOutOfRangeError(None, low, rpm_min, rpm_max)
+        if high is not None and high < rpm_min:
+            raise RPMOutOfRangeError(None, high, rpm_min, rpm_max)
+
+    def _check_prop_rpm(self, prop, rpm):
+        """ Summary.check_rpm for propellers listed in PER2_RPMRANGE.DAT (others are left to the index). """
+        try:
+            listed = self.summary.read_data("RPMRANGE").find(prop) is not None
+        except OSError:
+            return
+        if listed:
+            self.summary.check_rpm(prop, rpm)
+
+    @property
+    def query_engine(self):
+        """ RangeQueryEngine of the loaded index, compiled on first use. """
+        engine = self.engine
+        if 'query' not in engine:
+            engine['query'] = RangeQueryEngine(engine['df'])
+        return engine['query']
+
+    @property
+    def curve_index(self):
+        """ CurveIndex (Ct, Cp, Pe vs J on a common grid) of the loaded index, built on first use. """
+        engine = self.engine
+        if 'curves' not in engine:
+            with stage("search.curve_index"):
+                engine['curves'] = CurveIndex(engine['df'])
+        return engine['curves']
+
+    def _prop_rows(self, prop):
+        """ Row positions of a propeller in self.df (any code accepted by searchPropeller). """
+        engine = self.engine
+        if 'prop_rows' not in engine:
+            keys = np.array([_normalize_code(p) for p in engine['df']['prop_id']])
+            engine['prop_rows'] = {key: np.flatnonzero(keys == key) for key in np.unique(keys)}
+        rows = engine['prop_rows'].get(_normalize_code(prop))
+        if rows is None:
+            raise ValueError(f"Propeller '{prop}' not found in the search index.")
+        return rows
+
+    def _curve_result(self, distances, rows):
+        found = rows >= 0
+        result = self.df.iloc[rows[found]].copy()
+        result['distance'] = distances[found]
+        return result
+
+    @timed("search.similar_curves")
+    def search_similar_curves(self, prop, rpm=None, k=5, quantities=None, exclude_prop=True, min_overlap=0.8):
+        """
+        Find the k propeller/RPM rows whose Ct, Cp and Pe vs J curves look most like those of a propeller
+        (ex: substitutes for a propeller). Outputs a dataframe sorted by "distance", the RMS difference of the
+        curves (each quantity divided by its catalog standard deviation) where both are tabulated.
+        The query latency in microseconds is stored in self.last_query_us.
+
+        INPUTS
+            prop = reference propeller. Example "20x10E"
+            rpm = reference RPM (nearest tabulated RPM; default: middle RPM of the propeller). An RPM outside
+                  the PER2_RPMRANGE.DAT range of the propeller raises RPMOutOfRangeError before the index is read.
+            k = number of rows returned
+            quantities = list of curves compared (default: "Ct", "Cp" and "Pe")
+            exclude_prop = leave out every RPM of the reference propeller
+            min_overlap = minimum fraction of the reference J range a row must cover
+        """
+        if rpm is not None:
+            self._check_prop_rpm(prop, rpm)
+        rows = self._prop_rows(prop)
+        rpms = self.df['RPM'].to_numpy()[rows]
+        row = rows[np.argmin(np.abs(rpms - rpm))] if rpm is not None else rows[len(rows) // 2]
+
+        index = self.curve_index
+        vector, weight = index.row_vector(row, quantities)
+        distances, found = index.query(vector, weight, k=k, min_overlap=min_overlap,
+                                       exclude=[rows if exclude_prop else np.array([row])])
+        self.last_query_us = index.last_query_us
+        return self._curve_result(distances[0], found[0])
+
+    @timed("search.curve")
+    def search_curve(self, J, k=5, min_overlap=0.8, **curves):
+        """
+        Find the k propeller/RPM rows whose curves are closest to a measured (or designed) curve.
+        Only the given curves and the measured J range are compared. Outputs a dataframe sorted by "distance".
+
+        INPUTS
+            J = advance ratio array
+            k = number of rows returned
+            min_overlap = minimum fraction of the measured J range a row must cover
+            Ct, Cp, Pe = arrays of the curves, same length as J. Example search_curve(J, Ct=ct, Pe=pe)
 
+        For many curves at once use self.curve_index.resample and self.curve_index.query (batched).
+        """
+        index = self.curve_index
+        vector, weight = index.resample(J, curves)
+        distances, found = index.query(vector, weight, k=k, min_overlap=min_overlap)
+        self.last_query_us = index.last_query_us
+        return self._curve_result(distances[0], found[0])
+
+    @timed("search.mission")
+    def search_mission(self, segments, constraints=None, top_k=10, feasible_only=True):
+        """
+        Propellers ranked by the energy of a mission profile (see Performance.mission), optionally restricted
+        to the propellers with at least one index row inside the range constraints (as search_by_range).
+        Outputs a dataframe sorted by increasing energy, with the prop_type and D (in) of the index.
+
+        INPUTS
+            segments = mission segments. Example {"V (m/s)": [12, 20], "Thrust (N)": [25, 12], "Duration (s)": [60, 900]}
+            constraints = optional dictionary {parameter: (min, max)}. Example {'D (in)': (None, 12)}
+            top_k = maximum number of propellers returned
+            feasible_only = drop the propellers with segments outside their tables or RPM range
+        """
+        ranked = self.mission(segments)
+        if constraints:
+            rows = self.query_engine.query(constraints)
+            ranked = ranked[np.isin(ranked['prop_id'].to_numpy(dtype=str),
+                                    self.df['prop_id'].iloc[rows].to_numpy(dtype=str))]
+        if feasible_only:
+            ranked = ranked[ranked['Feasible'].to_numpy()]
+        if ranked.empty:
+            raise ValueError("No propeller flies the mission within the constraints.")
+
+        info = self.df.drop_duplicates('prop_id').set_index('prop_id')[['prop_type', 'D (in)']]
+        ranked = ranked.head(top_k).join(info, on='prop_id')
+        ranked['rank'] = np.arange(1, len(ranked) + 1)
+        return ranked.reset_index(drop=True)
+
+    def _query_space(self, given, weights):
+        """
+        KDTree used for a query on the "given" features with optional weights.
+        Features left out of the target are dropped, and so is a feature with weight 0 (it does not
+        contribute to the distance at all). Weights must not be negative. Any weighting other than all 1
+        gets its own tree over the weighted scaled matrix, kept in the engine for the next queries.
+        """
+        features = self.engine['features']
+        unknown = set(given) - set(features)
+        if unknown:
+            raise ValueError(f"Invalid features {sorted(unknown)}. Use {features}.")
+        weights = weights or {}
+        negative = sorted(f for f, value in weights.items() if not float(value) >= 0)
+        if negative:
+            raise ValueError(f"Weights must be >= 0 (0 drops the feature). Invalid weights for {negative}.")
+        w = np.array([float(weights.get(f, 1.0)) if f in given else 0.0 for f in features])
+        dims = np.flatnonzero(w > 0)
+        if dims.size == 0:
+            raise ValueError("No feature to search: give at least one target value with a positive weight.")
+
+        trees = self.engine.setdefault('weighted_trees', {})
+        key = tuple(w)
+        if key not in trees:
+            from scipy.spatial import KDTree
+            if len(trees) >= 32:
+                trees.clear()
+            trees[key] = self.tree if (w == 1).all() else KDTree(self.engine['scaled'][:, dims] * w[dims])
+        return trees[key], dims, w
+
+    def _scale_targets(self, targets, dims, w):
+        """ Scales a (n, features) target matrix with the stored f_min and f_range. """
+        scaled = (targets - self.engine['f_min']) / self.engine['f_range']
+        return scaled[:, dims] * w[dims]
+
+    @timed("search.nearest")
+    def search_nearest(self, target, k=5, weights=None):
+        """
+        Find the k propeller/RPM rows closest to a target point (KDTree query, logarithmic cost).
+        Outputs a dataframe sorted by distance, with the "distance" in scaled feature space.
+
+        INPUTS
+            target = dictionary with feature values. Example {'maxThrust (N)': 40, 'maxPower (W)': 600}
+                     Features not given are ignored.
+            k = number of propellers returned
+            weights = optional dictionary of feature weights (default 1, must be >= 0; 0 drops the feature).
+                      Example {'maxPower (W)': 2}
+
+        Features: 'RPM', 'maxThrust (N)', 'maxPower (W)', 'maxTorque (Nm)', 'maxFoM', 'max THR/PWR (g/W)'
+        """
+        features = self.engine['features']
+        tree, dims, w = self._query_space(list(target), weights)
+        point = np.array([[float(target.get(f, 0.0)) for f in features]])
+
+        distance, index = tree.query(self._scale_targets(point, dims, w)[0], k=k)
+        distance, index = np.atleast_1d(distance), np.atleast_1d(index)
+        found = index < len(self.df)  # k larger than the catalog
+
+        result = self.df.iloc[index[found]].copy()
+        result['distance'] = distance[found]
+        return result
+
+    @timed("search.nearest_batch")
+    def search_nearest_batch(self, targets, k=1, weights=None):
+        """
+        Vectorized search_nearest for many design targets in one KDTree query.
+        Outputs (distances, indices) arrays of shape (n_targets, k); indices are row positions in self.df
+        (self.df.iloc[indices[i]]). Missing neighbours (k larger than the catalog) have index len(self.df).
+
+        INPUTS
+            targets = dictionary or dataframe of equal-length arrays, one per feature.
+                      Example {'maxThrust (N)': [20, 40], 'maxPower (W)': [300, 600]}
+            k = number of neighbours per target
+            weights = optional dictionary of feature weights (default 1, must be >= 0; 0 drops the feature)
+        """
+        features = self.engine['features']
+        given = [f for f in features if f in targets]
+        tree, dims, w = self._query_space(list(targets.keys()), weights)
 
+        n_targets = len(np.atleast_1d(targets[given[0]]))
+        points = np.zeros((n_targets, len(features)))
+        for j, f in enumerate(features):
+            if f in targets:
+                points[:, j] = np.asarray(targets[f], dtype=np.float64)
 
+        distances, indices = tree.query(self._scale_targets(points, dims, w), k=k, workers=-1)
+        return distances.reshape(n_targets, k), indices.reshape(n_targets, k)
 
-# === One-time tree initialization
 
+# === Tree initialization
+# The index is built on first use (PropellerSearchTree().df); to force a rebuild:
 #initialize_tree = PropellerSearchTree()
 #initialize_tree.preprocess()
 #initialize_tree.create_KDTree()
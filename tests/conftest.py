@@ -0,0 +1,12 @@
+import pytest
+
+
+@pytest.fixture(scope="session", autouse=True)
+def cache_dir(tmp_path_factory):
+    """ Every store built by the tests goes to a temporary cache directory, never the user one. """
+    path = tmp_path_factory.mktemp("apc_cache")
+    patch = pytest.MonkeyPatch()
+    patch.setenv("APC_CACHE_DIR", str(path))
+    patch.setenv("MPLBACKEND", "Agg")
+    yield path
+    patch.undo()
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from Objects.Geometry import Geometry
+from Objects.Performance import Performance
+from Objects.BEMT import BladeGeometry, compare_tables
+
+# --- Median BEMT / PER3 table ratios of the points with Ct > 0.02 (AIRFOIL section model)
+REFERENCE = {"10x7E": (0.98, 0.97),     # (Ct, Cp)
+             "20x10E": (1.00, 1.01),
+             "9x6E": (0.98, 0.98)}
+TOLERANCE = 0.03
+MIN_CT = 0.02
+
+
+@pytest.fixture(scope="module")
+def geometry_catalog():
+    return Geometry().build_catalog()
+
+
+@pytest.mark.parametrize("prop", sorted(REFERENCE))
+def test_bemt_matches_tables(geometry_catalog, prop):
+    geometry = BladeGeometry.from_catalog(geometry_catalog, [prop])
+    df = compare_tables(geometry, Performance().read_data(prop, engine="fast"))
+    loaded = df["Ct"] > MIN_CT
+    assert loaded.sum() > 50
+
+    for name, reference in zip(("Ct", "Cp"), REFERENCE[prop]):
+        ratio = np.median(df.loc[loaded, f"{name} BEMT"] / df.loc[loaded, name])
+        assert abs(ratio - reference) < TOLERANCE, f"{prop}: median {name} BEMT / table = {ratio:.3f}"
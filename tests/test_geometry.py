@@ -0,0 +1,28 @@
+import os
+
+import pandas as pd
+import pytest
+
+from Objects.Geometry import Geometry
+from Objects.ClassAPC import _code_from_filename
+
+GEO = Geometry()
+SAMPLE_STEP = 10   # every 10th PE0 file
+CODES = sorted(filter(None, (_code_from_filename(name, "geo") for name in os.listdir(GEO.geometry_path))))
+PROPS = CODES[::SAMPLE_STEP]
+
+
+@pytest.mark.parametrize("prop", PROPS)
+def test_fast_engine_matches_python(prop):
+    fast = GEO.read_data(prop, engine="fast")
+    python = GEO.read_data(prop, engine="python")
+    assert len(fast) == len(python) == 2
+    for fast_df, python_df in zip(fast, python):   # station table, scalar data
+        pd.testing.assert_frame_equal(fast_df, python_df)
+
+
+@pytest.mark.parametrize("prop", PROPS)
+def test_catalog_matches_read_data(prop):
+    GEO.build_catalog()
+    for cached_df, parsed_df in zip(GEO.read_data(prop, engine="cache"), GEO.read_data(prop, engine="fast")):
+        pd.testing.assert_frame_equal(cached_df, parsed_df)
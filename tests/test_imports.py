@@ -0,0 +1,35 @@
+import os
+import sys
+import json
+import subprocess
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+
+# --- The headless import path must not load the plotting / interpolation stack
+HEAVY_MODULES = ["matplotlib", "scipy", "scienceplots"]
+IMPORT_BUDGET_S = float(os.environ.get("APC_IMPORT_BUDGET", "1.0"))  # numpy + pandas take ~0.6 s; with
+                                                                    # matplotlib and scipy it is ~1.5 s
+
+
+def _import_in_subprocess(module):
+    """ (import time in seconds, heavy modules loaded) of a module imported in a fresh interpreter. """
+    code = (f"import sys, time, json; start = time.perf_counter(); import {module}; "
+            f"elapsed = time.perf_counter() - start; "
+            f"print(json.dumps([elapsed, [m for m in {HEAVY_MODULES!r} if m in sys.modules]]))")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(SRC_DIR), os.environ.get("PYTHONPATH", "")]))
+    output = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout)
+
+
+def test_search_tree_import_is_light():
+    runs = [_import_in_subprocess("Search.SearchTree") for _ in range(3)]
+    assert runs[0][1] == [], f"heavy modules imported by Search.SearchTree: {runs[0][1]}"
+
+    best = min(elapsed for elapsed, _ in runs)
+    assert best < IMPORT_BUDGET_S, f"import Search.SearchTree took {best:.3f} s (budget {IMPORT_BUDGET_S} s)"
+
+
+def test_performance_import_is_light():
+    elapsed, loaded = _import_in_subprocess("Objects.Performance")
+    assert loaded == [], f"heavy modules imported by Objects.Performance: {loaded}"
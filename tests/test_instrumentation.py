@@ -0,0 +1,100 @@
+import logging
+import os
+
+import pytest
+
+from Objects import Instrumentation
+from Objects.Instrumentation import MemorySink, LoggingSink, PrometheusSink, instrumented
+from Objects.Performance import Performance
+
+PROP = "20x10E"
+
+
+@pytest.fixture
+def perf():
+    """ Performance reader with the catalog cache built, so engine="auto" reads from it. """
+    perf = Performance()
+    perf.build_catalog()
+    yield perf
+    Instrumentation.disable()
+
+
+def _read(perf):
+    """ Two parses of the PER3 file and one read from the catalog. """
+    perf.read_data(PROP, engine="fast")
+    perf.read_data(PROP, engine="fast")
+    perf.read_data(PROP)
+
+
+def test_memory_sink_counters(perf):
+    size = os.path.getsize(perf.searchPropeller(propeller=PROP, label="perf"))
+    sink = Instrumentation.enable()
+    _read(perf)
+
+    assert sink.times["perf.read_data"][0] == 3
+    assert sink.times["perf.parse"][0] == 2
+    assert sink.times["searchPropeller"][0] == 3
+    assert sink.bytes == {"perf": 2 * size}
+    assert sink.caches["perf.catalog"] == [1, 0]
+    assert sink.caches["file_index"][0] == 3
+
+    summary = sink.summary()
+    assert list(summary.columns) == ["stage", "calls", "total (s)", "mean (ms)", "max (ms)"]
+    assert set(summary["stage"]) == set(sink.times)
+    assert summary["total (s)"].is_monotonic_decreasing
+    row = summary.set_index("stage").loc["perf.read_data"]
+    assert row["calls"] == 3
+    assert row["mean (ms)"] == pytest.approx(row["total (s)"] / 3 * 1e3)
+
+
+def test_nothing_recorded_after_disable(perf):
+    sink = Instrumentation.enable()
+    perf.read_data(PROP, engine="fast")
+    assert Instrumentation.disable() is sink
+    assert not Instrumentation.is_enabled()
+
+    before = sink.snapshot()
+    _read(perf)
+    assert sink.snapshot() == before
+
+
+def test_instrumented_restores_previous_sink(perf):
+    outer = Instrumentation.enable()
+    with instrumented() as inner:
+        assert Instrumentation.get_sink() is inner
+        _read(perf)
+    assert Instrumentation.get_sink() is outer
+    assert inner.times["perf.read_data"][0] == 3
+    assert outer.snapshot()["time"] == {}
+
+    Instrumentation.disable()
+    with instrumented(MemorySink()):
+        pass
+    assert Instrumentation.get_sink() is None
+
+
+def test_prometheus_dump(perf, tmp_path):
+    size = os.path.getsize(perf.searchPropeller(propeller=PROP, label="perf"))
+    with instrumented(PrometheusSink(prefix="test")) as sink:
+        _read(perf)
+    path = tmp_path / "metrics.prom"
+    text = sink.dump(path)
+
+    assert path.read_text() == text
+    lines = text.splitlines()
+    assert f'test_bytes_read_total{{source="perf"}} {2 * size}' in lines
+    assert 'test_stage_calls_total{stage="perf.read_data"} 3' in lines
+    assert 'test_cache_hits_total{cache="perf.catalog"} 1' in lines
+    assert "# TYPE test_stage_max_seconds gauge" in lines
+    assert "# TYPE test_events_total counter" not in lines      # - no events recorded
+
+
+def test_logging_sink(perf, caplog):
+    size = os.path.getsize(perf.searchPropeller(propeller=PROP, label="perf"))
+    with caplog.at_level(logging.DEBUG, logger="apc_propeller_finder"):
+        with instrumented(LoggingSink()):
+            perf.read_data(PROP, engine="fast")
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert f"bytes perf {size}" in messages
+    assert any(message.startswith("stage perf.read_data took") for message in messages)
@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+
+from Objects.Loader import load_many
+from Objects.Performance import Performance
+from Objects.Geometry import Geometry
+from Objects.ClassAPC import PropellerNotFoundError
+
+PROPS = ["9x6E", "20x10E", "10x7E", "12x6E"]   # not in file order
+UNKNOWN = "99x99ZZ"
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_load_many_mapping_and_errors(backend):
+    data, errors = load_many(PROPS[:2] + [UNKNOWN] + PROPS[2:], kind="perf", workers=2, backend=backend)
+    assert list(data) == PROPS
+    for prop, df in data.items():
+        pd.testing.assert_frame_equal(df, Performance().read_data(prop, engine="fast"))
+    assert list(errors) == [UNKNOWN]
+    assert isinstance(errors[UNKNOWN], PropellerNotFoundError)
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_load_many_concat(backend):
+    frame, errors = load_many(PROPS + [UNKNOWN], kind="perf", workers=2, backend=backend, concat=True)
+    assert list(errors) == [UNKNOWN]
+    assert frame.columns[0] == "prop_id"
+    assert list(frame["prop_id"].unique()) == PROPS
+    expected = pd.concat([Performance().read_data(prop, engine="fast") for prop in PROPS], ignore_index=True)
+    pd.testing.assert_frame_equal(frame.drop(columns="prop_id"), expected)
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_load_many_geometry_concat(backend):
+    (stations, scalars), errors = load_many(PROPS, kind="geo", workers=2, backend=backend, concat=True,
+                                            engine="cache")
+    assert errors == {}
+    for prop in PROPS:
+        expected_stations, expected_scalars = Geometry().read_data(prop, engine="fast")
+        pd.testing.assert_frame_equal(stations[stations["prop_id"] == prop].drop(columns="prop_id")
+                                      .reset_index(drop=True), expected_stations)
+        assert (scalars["prop_id"] == prop).sum() == len(expected_scalars)
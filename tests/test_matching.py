@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from Objects.Performance import Performance
+from Objects.OperatingPoint import MPH_TO_MS
+
+PERF = Performance()
+PROPS = ["10x7E", "20x10E", "9x6E", "12x6E", "8x4"]
+MOTORS = {"motor": ["small", "large"], "Kv (RPM/V)": [1400, 500], "Rm (Ohm)": [0.06, 0.05],
+          "I0 (A)": [0.8, 1.2], "Voltage (V)": [11.1, 22.2], "I max (A)": [40, 60]}
+SPEEDS = [0.0, 9.0]   # m/s (9 m/s is between two points of the solver airspeed grid)
+
+
+def _brute_force(prop, kv, rm, i0, voltage, speed):
+    """ (RPM, thrust) of the first crossing of the motor and prop powers, scanning the RPM range by 1 RPM. """
+    df = PERF.read_data(prop, engine="fast")
+    rpm, power, thrust = [], [], []
+    for block_rpm, block in df.groupby("RPM"):
+        v = block["V (mph)"].to_numpy() * MPH_TO_MS
+        if v[0] <= speed <= v[-1]:
+            rpm.append(block_rpm)
+            power.append(np.interp(speed, v, block["PWR (W)"]))
+            thrust.append(np.interp(speed, v, block["Thrust (N)"]))
+    n = np.arange(rpm[0], rpm[-1] + 1.0)
+    excess = ((voltage - n / kv) / rm - i0) * n / kv - np.interp(n, rpm, power)
+    cross = np.flatnonzero((excess[:-1] > 0) & (excess[1:] <= 0))
+    if cross.size == 0:
+        return np.nan, np.nan
+    return n[cross[0]], np.interp(n[cross[0]], rpm, thrust)
+
+
+@pytest.fixture(scope="module")
+def matched():
+    matcher = PERF.motor_matcher()
+    motors, results = matcher.solve(MOTORS, speed=SPEEDS)
+    return {prop: i for i, prop in enumerate(matcher.prop_ids)}, motors, results
+
+
+@pytest.mark.parametrize("prop", PROPS)
+def test_matcher_matches_rpm_scan(matched, prop):
+    index, motors, results = matched
+    for q, speed in enumerate(SPEEDS):
+        for m, (kv, rm, i0, voltage) in enumerate(motors[["Kv (RPM/V)", "Rm (Ohm)", "I0 (A)", "Voltage (V)"]]
+                                                  .to_numpy()):
+            rpm, thrust = _brute_force(prop, kv, rm, i0, voltage, speed)
+            solved_rpm = results["RPM"][q, index[prop], m]
+            solved_thrust = results["Thrust (N)"][q, index[prop], m]
+            if np.isnan(rpm):
+                assert np.isnan(solved_rpm)
+                continue
+            assert abs(solved_rpm - rpm) <= 2.0, (speed, motors["motor"][m], solved_rpm, rpm)
+            assert solved_thrust == pytest.approx(thrust, rel=1e-2, abs=1e-2)
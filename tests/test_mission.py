@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from Objects.Performance import Performance
+from Objects.Summary import Summary
+from Objects.Mission import mission_profile, mission_energy, rank_mission
+from Objects.OperatingPoint import MPH_TO_MS
+
+PERF = Performance()
+SEGMENTS = {"segment": ["climb", "cruise", "loiter"], "V (m/s)": [12, 20, 15],
+            "Thrust (N)": [25, 12, 10], "Duration (s)": [60, 900, 600]}
+RPM_PROP = "20x10E"
+
+
+@pytest.fixture(scope="module")
+def mission():
+    ranked, (segments, results) = PERF.mission(SEGMENTS, details=True)
+    return ranked.set_index("prop_id"), segments, results
+
+
+def test_energy_is_the_sum_of_segment_energies(mission):
+    ranked, segments, results = mission
+    solver = PERF.operating_point_solver()
+    solved = solver.solve(SEGMENTS["V (m/s)"], thrust=SEGMENTS["Thrust (N)"])
+    # - NaN for the props with a segment outside their tables
+    energy = (solved["PWR (W)"] * np.array(SEGMENTS["Duration (s)"])[:, None]).sum(axis=0)
+    expected = dict(zip(solver.prop_ids, energy))
+    for prop, row in ranked.iterrows():
+        if np.isnan(expected[prop]):
+            assert np.isnan(row["Energy (J)"]) and row["Segments outside envelope"] > 0
+        else:
+            assert row["Energy (J)"] == pytest.approx(expected[prop], rel=1e-9)
+            assert row["Energy (Wh)"] == pytest.approx(expected[prop] / 3600, rel=1e-9)
+
+
+def test_feasible_props_come_first_by_energy(mission):
+    ranked, _, _ = mission
+    feasible = ranked["Feasible"].to_numpy()
+    assert feasible.any() and not feasible.all()
+    assert not feasible[np.argmin(feasible):].any()   # no feasible prop after the first infeasible one
+    assert np.all(np.diff(ranked["Energy (J)"].to_numpy()[feasible]) >= 0)
+
+
+def test_rpm_range_flags():
+    solver = PERF.operating_point_solver()
+    prop = np.flatnonzero(solver.prop_ids == RPM_PROP)[0]
+    rpm_min, rpm_max = Summary().rpm_bounds(solver.prop_ids)
+    assert (rpm_min[prop], rpm_max[prop]) == (1000, 12000)     # - PER2_RPMRANGE.DAT
+
+    # - one segment the prop flies at 11000 RPM, inside its tables
+    speed = 10
+    thrust = float(PERF.model(RPM_PROP).thrust(11000, speed / MPH_TO_MS))
+    segment = {"V (m/s)": [speed], "Thrust (N)": [thrust], "Duration (s)": [60]}
+
+    segments, results = mission_energy(solver, segment, (rpm_min, rpm_max))
+    assert results["RPM"][0, prop] == pytest.approx(11000, rel=1e-3)
+    assert not results["Outside RPM range"].any()
+
+    # - the bundled RPM ranges all end at the last tabulated RPM: a 10000 RPM limit pushes the segment past it
+    capped = rpm_max.copy()
+    capped[prop] = 10000
+    segments, results = mission_energy(solver, segment, (rpm_min, capped))
+    assert results["Outside RPM range"][0, prop] and results["Outside RPM range"].sum() == 1
+
+    ranked = rank_mission(solver.prop_ids, segments, results)
+    feasible = ranked["Feasible"].to_numpy()
+    position = np.flatnonzero(ranked["prop_id"].to_numpy() == RPM_PROP)[0]
+    assert ranked["Segments outside RPM range"].iloc[position] == 1 and not feasible[position]
+    assert feasible.sum() > 0 and feasible[:position].all()
+
+
+@pytest.mark.parametrize("segments", [{"V (m/s)": [10], "Thrust (N)": [5]},
+                                      {"V (m/s)": [10], "Thrust (N)": [-5], "Duration (s)": [60]},
+                                      {"V (m/s)": [], "Thrust (N)": [], "Duration (s)": []}])
+def test_invalid_missions(segments):
+    with pytest.raises(ValueError):
+        mission_profile(segments)
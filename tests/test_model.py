@@ -0,0 +1,90 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+import Objects.PropellerModel as propeller_model
+from Objects.Performance import Performance
+from Objects.PropellerModel import MODEL_QUANTITIES, PropellerModel, get_model, clear_model_cache
+
+PROPS = ["10x7E", "20x10E", "9x6E"]
+
+
+@pytest.fixture
+def empty_cache():
+    clear_model_cache()
+    yield
+    clear_model_cache()
+
+
+def _max_error(model, df):
+    """ Largest |model - table| / max |table| of each quantity at the tabulated (RPM, V) points. """
+    out = model.evaluate(df["RPM"].to_numpy(), df["V (mph)"].to_numpy())
+    assert not np.isnan(out).any()
+    table = df[MODEL_QUANTITIES].to_numpy()
+    return np.abs(out - table).max(axis=0) / np.abs(table).max(axis=0)
+
+
+@pytest.mark.parametrize("prop", PROPS)
+def test_model_matches_tables(prop):
+    df = Performance().read_data(prop, engine="fast")
+    # - thrust and power are smooth in V: the default grid is enough
+    error = _max_error(PropellerModel(df), df)
+    assert error[:2].max() < 2e-3
+    # - efficiency and the coefficients bend at the highest speeds: a finer grid brings them to the tables
+    assert _max_error(PropellerModel(df, n_speeds=5000), df).max() < 1e-2
+
+
+def test_model_nan_outside_tables():
+    df = Performance().read_data("20x10E", engine="fast")
+    model = PropellerModel(df)
+    rpm_min, rpm_max = df["RPM"].min(), df["RPM"].max()
+    v_min, v_max = df["V (mph)"].min(), df["V (mph)"].max()
+
+    rpm = np.array([rpm_min - 1, rpm_max + 1, rpm_min, rpm_min, np.nan, rpm_max])
+    v = np.array([v_min, v_min, v_min - 1, v_max + 1, v_min, v_max])
+    out = model.evaluate(rpm, v)
+    assert out.shape == (6, len(MODEL_QUANTITIES))
+    assert np.isnan(out[:5]).all()
+    assert not np.isnan(out[5]).any()
+    assert np.isnan(model.thrust(rpm_max + 1, v_min))
+
+
+def test_model_cache_evicts_least_recently_used(empty_cache, monkeypatch):
+    monkeypatch.setattr(propeller_model, "MODEL_CACHE_SIZE", 2)
+    performance = Performance()
+
+    first = get_model("10x7E", performance)
+    assert get_model("10x7E", performance) is first
+    second = get_model("20x10E", performance)
+    get_model("10x7E", performance)                 # - 20x10E is now the least recently used
+    get_model("9x6E", performance)
+
+    assert len(propeller_model._MODELS) == 2
+    assert get_model("10x7E", performance) is first
+    assert get_model("20x10E", performance) is not second
+
+
+def test_model_rebuilt_after_file_edit(empty_cache, tmp_path):
+    performance = Performance()
+    source = performance.searchPropeller(propeller="20x10E", label="perf")
+    shutil.copy(source, tmp_path)
+    performance.perfomance_path = str(tmp_path)
+    path = os.path.join(tmp_path, os.path.basename(source))
+
+    model = get_model("20x10E", performance)
+    assert get_model("20x10E", performance) is model
+
+    # - keep the tables up to the 10000 RPM block: the file gets smaller and newer
+    with open(path) as f:
+        text = f.read()
+    with open(path, "w") as f:
+        f.write(text[:text.rindex("\n", 0, text.index("PROP RPM =      11000")) + 1])
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    edited = get_model("20x10E", performance)
+    assert edited is not model
+    assert edited.rpm[-1] == 10000
+    assert model.rpm[-1] == 12000
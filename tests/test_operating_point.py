@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from Objects.Performance import Performance
+from Objects.OperatingPoint import MPH_TO_MS
+
+PERF = Performance()
+PROPS = ["10x7E", "20x10E", "9x6E", "12x6E", "8x4"]
+TARGETS = [(0.0, 5.0), (9.0, 5.0), (15.0, 10.0)]   # (m/s, N)
+
+
+def _scan(prop, speed, thrust):
+    """ (RPM, power) where the thrust first reaches the target, scanning the RPM range by 1 RPM. """
+    df = PERF.read_data(prop, engine="fast")
+    rpm, thrusts, powers = [], [], []
+    for block_rpm, block in df.groupby("RPM"):
+        v = block["V (mph)"].to_numpy() * MPH_TO_MS
+        if v[0] <= speed <= v[-1]:
+            rpm.append(block_rpm)
+            thrusts.append(np.interp(speed, v, block["Thrust (N)"]))
+            powers.append(np.interp(speed, v, block["PWR (W)"]))
+    n = np.arange(rpm[0], rpm[-1] + 1.0)
+    reached = np.flatnonzero(np.interp(n, rpm, thrusts) >= thrust)
+    if reached.size == 0 or reached[0] == 0:
+        return np.nan, np.nan
+    return n[reached[0]], np.interp(n[reached[0]], rpm, powers)
+
+
+@pytest.fixture(scope="module")
+def solved():
+    solver = PERF.operating_point_solver()
+    speed, thrust = np.array(TARGETS).T
+    return {prop: i for i, prop in enumerate(solver.prop_ids)}, solver.solve(speed, thrust=thrust)
+
+
+@pytest.mark.parametrize("prop", PROPS)
+def test_solver_matches_rpm_scan(solved, prop):
+    index, results = solved
+    for q, (speed, thrust) in enumerate(TARGETS):
+        rpm, power = _scan(prop, speed, thrust)
+        assert not np.isnan(rpm)
+        assert abs(results["RPM"][q, index[prop]] - rpm) <= 2.0, (speed, thrust)
+        assert results["PWR (W)"][q, index[prop]] == pytest.approx(power, rel=1e-2)
+        assert results["Thrust (N)"][q, index[prop]] == thrust
+
+
+def test_solver_flags_unreachable_targets():
+    results = PERF.operating_point_solver().solve([0.0, 9.0], thrust=1e6)
+    assert np.isnan(results["RPM"]).all() and np.isnan(results["PWR (W)"]).all()
+
+
+@pytest.mark.parametrize("n_speeds", [0, 1])
+def test_solver_needs_two_speeds(n_speeds):
+    with pytest.raises(ValueError):
+        PERF.operating_point_solver(n_speeds=n_speeds)
+    with pytest.raises(ValueError):
+        PERF.motor_matcher(n_speeds=n_speeds)
+    with pytest.raises(ValueError):
+        PERF.mission({"V (m/s)": 10, "Thrust (N)": 5, "Duration (s)": 60}, n_speeds=n_speeds)
+    with pytest.raises(ValueError):
+        PERF.model("10x7E", n_speeds=n_speeds)
@@ -0,0 +1,85 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Objects.Performance import Performance, PERF_COLUMNS, parse_prop_id
+from Objects.ClassAPC import _code_from_filename, _normalize_code
+
+PERF = Performance()
+SAMPLE_STEP = 10   # every 10th PER3 file (~45 props, all prop types and sizes)
+CODES = sorted(filter(None, (_code_from_filename(name, "perf") for name in os.listdir(PERF.perfomance_path))))
+PROPS = CODES[::SAMPLE_STEP]
+
+
+@pytest.mark.parametrize("prop", PROPS)
+def test_fast_engine_matches_python(prop):
+    fast = PERF.read_data(prop, engine="fast")
+    python = PERF.read_data(prop, engine="python")
+    pd.testing.assert_frame_equal(fast, python)
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return PERF.build_catalog()
+
+
+def test_catalog_holds_every_file(catalog):
+    assert sorted(_code_from_filename(name, "perf") for name in catalog.files.tolist()) == CODES
+
+
+@pytest.mark.parametrize("prop", PROPS)
+def test_catalog_matches_read_data(catalog, prop):
+    pd.testing.assert_frame_equal(PERF.read_data(prop, engine="cache"), PERF.read_data(prop, engine="fast"))
+
+
+@pytest.mark.parametrize("prop", PROPS)
+def test_tensor_view_matches_read_data(prop):
+    tensor = PERF.open_tensor()
+    df = PERF.read_data(prop, engine="fast")
+    expected = df.drop(columns="RPM").to_numpy(dtype=np.float32)
+    np.testing.assert_array_equal(tensor.view(prop), expected)
+    np.testing.assert_array_equal(tensor.rpms(prop), df["RPM"].unique())
+
+    rpm = df["RPM"].iloc[-1]
+    np.testing.assert_array_equal(tensor.view(prop, rpm=rpm), expected[(df["RPM"] == rpm).to_numpy()])
+
+
+def _scanned(where, columns=None):
+    """ {normalized prop id: (RPM column, stacked blocks)} of an iter_catalog scan. """
+    scanned = {}
+    for prop_id, rpm, block in PERF.iter_catalog(where=where, columns=columns):
+        rpms, blocks = scanned.setdefault(_normalize_code(prop_id), ([], []))
+        rpms.append(np.full(len(block), rpm))
+        blocks.append(block)
+    return {prop: (np.concatenate(rpms), np.vstack(blocks)) for prop, (rpms, blocks) in scanned.items()}
+
+
+@pytest.mark.parametrize("columns", [None, ["J (Adv_Ratio)", "Ct", "Thrust (N)"]])
+def test_iter_catalog_matches_read_data(columns):
+    scanned = _scanned({"prop_id": PROPS[:10]}, columns)
+    assert sorted(scanned) == sorted(_normalize_code(prop) for prop in PROPS[:10])
+    for prop in PROPS[:10]:
+        df = PERF.read_data(prop, engine="fast")
+        rpm, values = scanned[_normalize_code(prop)]
+        np.testing.assert_array_equal(rpm, df["RPM"].to_numpy())
+        np.testing.assert_array_equal(values, df[columns or PERF_COLUMNS].to_numpy())
+
+
+def test_iter_catalog_where():
+    selected = set()
+    for name in os.listdir(PERF.perfomance_path):
+        try:
+            prop_id, diameter, prop_type = parse_prop_id(name)
+        except ValueError:
+            continue
+        if prop_type == "E" and 9 <= float(diameter) <= 11:
+            selected.add(_normalize_code(prop_id))
+
+    assert len(selected) > 5
+    assert set(_scanned({"prop_type": "E", "D (in)": (9, 11)}, ["Ct"])) == selected
+    assert set(_scanned(lambda prop_id, diameter, prop_type: prop_type == "E" and 9 <= float(diameter) <= 11,
+                        ["Ct"])) == selected
+    with pytest.raises(ValueError):
+        next(PERF.iter_catalog(where={"pitch": 6}))
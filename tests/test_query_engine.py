@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from Search.SearchTree import PropellerSearchTree, SCALAR_COLUMNS
+from Search.QueryEngine import RangeQueryEngine
+
+N_QUERIES = 600
+SORT_COLUMNS = ['maxThrust (N)', 'maxPower (W)', 'max THR/PWR (g/W)', 'D (in)']
+
+
+@pytest.fixture(scope="module")
+def tree():
+    return PropellerSearchTree()
+
+
+def _pandas_filter(df, constraints, sort_by, top_k=None):
+    """ search_by_range before the query engine (stable sort: ties keep the table order). """
+    query_df = df
+    for col, val in constraints.items():
+        if col == 'prop_type':
+            query_df = query_df[query_df[col].isin(val)] if isinstance(val, list) else query_df[query_df[col] == val]
+        else:
+            c_min, c_max = val
+            if c_min is not None:
+                query_df = query_df[query_df[col] >= c_min]
+            if c_max is not None:
+                query_df = query_df[query_df[col] <= c_max]
+    if sort_by is not None:
+        query_df = query_df.sort_values(by=sort_by, ascending=False, kind='stable')
+    return query_df if top_k is None else query_df.head(top_k)
+
+
+def random_queries(df, n_queries, seed=0):
+    """ Constraint sets mixing open, closed and equal bounds on 1-3 columns, prop_type as a string or a list. """
+    rng = np.random.default_rng(seed)
+    types = df['prop_type'].unique().tolist()
+    queries = []
+    for _ in range(n_queries):
+        constraints = {}
+        for col in rng.choice(SCALAR_COLUMNS, size=rng.integers(1, 4), replace=False):
+            low, high = np.sort(rng.choice(df[col].to_numpy(), size=2))
+            kind = rng.integers(5)
+            constraints[col] = [(low, high), (None, high), (low, None), (low, low), (None, None)][kind]
+        if rng.random() < 0.4:
+            chosen = rng.choice(types, size=rng.integers(1, 4), replace=False).tolist()
+            constraints['prop_type'] = chosen[0] if rng.random() < 0.5 else chosen + ['unknown type']
+        queries.append(constraints)
+    return queries
+
+
+@pytest.mark.parametrize("top_k", [None, 1, 10])
+def test_query_engine_matches_pandas_filter(tree, top_k):
+    df = tree.df
+    engine = RangeQueryEngine(df)
+    rng = np.random.default_rng(1)
+    empty = 0
+    for constraints in random_queries(df, N_QUERIES):
+        sort_by = SORT_COLUMNS[rng.integers(len(SORT_COLUMNS))]
+        expected = _pandas_filter(df, constraints, sort_by, top_k)
+        rows = engine.query(constraints, sort_by=sort_by, top_k=top_k)
+        np.testing.assert_array_equal(rows, df.index.get_indexer(expected.index), err_msg=str(constraints))
+        empty += expected.empty
+    assert 0 < empty < N_QUERIES   # both empty and non-empty answers are covered
+
+
+def test_search_by_range_matches_pandas_filter(tree):
+    df = tree.df
+    for constraints in random_queries(df, 100, seed=2):
+        expected = _pandas_filter(df, constraints, 'maxThrust (N)')
+        if expected.empty:
+            with pytest.raises(ValueError):
+                tree.search_by_range(constraints, sort_by='maxThrust (N)')
+        else:
+            pd.testing.assert_index_equal(tree.search_by_range(constraints, sort_by='maxThrust (N)').index,
+                                          expected.index)
+
+
+@pytest.mark.parametrize("sort_by", [None, 'maxThrust (N)', 'max THR/PWR (g/W)'])
+@pytest.mark.parametrize("top_k", [None, 5])
+def test_batch_matches_search_by_range(tree, sort_by, top_k):
+    queries = random_queries(tree.df, 300, seed=3)
+    queries.append({'maxThrust (N)': (1e9, None)})   # no match
+    results = tree.search_by_range_batch(queries, sort_by=sort_by, top_k=top_k)
+    assert len(results) == len(queries)
+
+    empty = 0
+    for constraints, (rows, scores) in zip(queries, results):
+        try:
+            expected = tree.search_by_range(constraints, sort_by=sort_by, top_k=top_k)
+        except ValueError:
+            expected = tree.df.iloc[:0]
+        np.testing.assert_array_equal(rows, tree.df.index.get_indexer(expected.index), err_msg=str(constraints))
+        if sort_by is None:
+            assert scores is None
+        else:
+            np.testing.assert_array_equal(scores, expected[sort_by].to_numpy(dtype=np.float64))
+        empty += rows.size == 0
+    assert rows.size == 0 and 1 < empty < len(queries)
+
+
+def test_batch_wide_ranks(tree):
+    # - more than 2**15 rows: ranks no longer fit int16 and the int32/uint32 path is taken
+    df = pd.concat([tree.df[SCALAR_COLUMNS + ['prop_type']]] * 4, ignore_index=True)
+    engine = RangeQueryEngine(df)
+    queries = random_queries(df, 50, seed=4)
+    for constraints, (rows, _) in zip(queries, engine.query_batch(queries, sort_by='maxPower (W)', top_k=20)):
+        np.testing.assert_array_equal(rows, engine.query(constraints, sort_by='maxPower (W)', top_k=20))
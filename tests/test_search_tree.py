@@ -0,0 +1,89 @@
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Search.SearchTree import PropellerSearchTree, SCALAR_COLUMNS, TEXT_COLUMNS, CURVE_COLUMNS
+
+EDITED = "PER3_9x6E.dat"
+
+
+@pytest.fixture
+def data_copy(tmp_path):
+    """ Copy of the bundled PERFILES2 directory: the tests edit it, never the repository data. """
+    return Path(shutil.copytree(PropellerSearchTree().perfomance_path, tmp_path / "PERFILES2"))
+
+
+def _tree_on(directory, index_path):
+    """ PropellerSearchTree indexing another PERFILES2 directory, with its own index files. """
+    tree = PropellerSearchTree(index_path=index_path, workers=1)
+    tree.perfomance_path = directory
+    tree.metadata_path = index_path.with_name(f"{index_path.stem}_metadata.npz")
+    return tree
+
+
+def _assert_same_engine(engine, expected):
+    df, expected_df = engine['df'], expected['df']
+    pd.testing.assert_frame_equal(df[TEXT_COLUMNS + SCALAR_COLUMNS], expected_df[TEXT_COLUMNS + SCALAR_COLUMNS])
+    for col in CURVE_COLUMNS:
+        np.testing.assert_array_equal(np.concatenate(df[col].tolist()), np.concatenate(expected_df[col].tolist()))
+    for key in ('f_min', 'f_range', 'scaled'):
+        np.testing.assert_array_equal(engine[key], expected[key])
+
+
+def test_update_index_matches_full_rebuild(tmp_path, data_copy):
+    path = data_copy / EDITED
+    tree = _tree_on(data_copy, tmp_path / "incremental.npz")
+    assert len(tree.update_index()['added']) == len(tree.engine['manifest']['manifest_files'])
+    blocks = (tree.df['filepath'] == EDITED).sum()
+
+    # - new mtime, same content: nothing is parsed again
+    os.utime(path)
+    assert tree.update_index() == {'added': [], 'changed': [], 'deleted': []}
+
+    content = path.read_bytes()
+    path.write_bytes(content[:content.rindex(b"PROP RPM")])   # - drop the last RPM block
+    assert tree.update_index() == {'added': [], 'changed': [EDITED], 'deleted': []}
+
+    full = _tree_on(data_copy, tmp_path / "full.npz")
+    _assert_same_engine(tree.engine, full._rebuild_engine()[0])
+    assert (tree.df['filepath'] == EDITED).sum() == blocks - 1
+
+
+def test_search_nearest_weights():
+    tree = PropellerSearchTree(workers=1)
+    target = {'maxThrust (N)': 40, 'maxPower (W)': 600}
+    with pytest.raises(ValueError):
+        tree.search_nearest(target, weights={'maxPower (W)': -1})
+
+    # - a zero weight drops the feature: same neighbours as a target without it
+    dropped = tree.search_nearest(target, k=5, weights={'maxPower (W)': 0})
+    thrust_only = tree.search_nearest({'maxThrust (N)': 40}, k=5)
+    pd.testing.assert_frame_equal(dropped, thrust_only)
+
+
+def test_search_curve_finds_own_curve():
+    tree = PropellerSearchTree(workers=1)
+    row = tree.df[(tree.df['prop_id'] == "20x10E") & (tree.df['RPM'] == 6000)].iloc[0]
+    found = tree.search_curve(row['J_array'], k=5, Ct=row['Ct_array'], Cp=row['Cp_array'], Pe=row['Pe_array'])
+
+    assert (found['prop_id'].iloc[0], found['RPM'].iloc[0]) == ("20x10E", 6000)
+    assert found['distance'].iloc[0] == pytest.approx(0, abs=1e-5)
+    assert found['distance'].is_monotonic_increasing
+
+
+def test_search_similar_curves_exclude_prop():
+    tree = PropellerSearchTree(workers=1)
+    kept = tree.search_similar_curves("20x10E", rpm=6000, k=20, exclude_prop=False)
+    excluded = tree.search_similar_curves("20x10E", rpm=6000, k=20)
+
+    # - the reference row itself is never returned; exclude_prop drops the other RPMs of the propeller too
+    own = kept[kept['prop_id'] == "20x10E"]
+    assert len(own) > 0 and 6000 not in own['RPM'].to_numpy()
+    assert (excluded['prop_id'] != "20x10E").all()
+    assert len(excluded) == 20
+    others = kept[kept['prop_id'] != "20x10E"]
+    pd.testing.assert_frame_equal(excluded.head(len(others)), others)
@@ -0,0 +1,45 @@
+import pytest
+
+from Objects.Summary import Summary, RPMOutOfRangeError
+from Objects.ClassAPC import PropellerNotFoundError
+from Search.SearchTree import PropellerSearchTree
+
+SUMMARY = Summary()
+ROWS = {"STATIC-1": 9450, "STATIC-2": 9461, "MAXPE": 9461, "RPMRANGE": 435, "N100": 435, "TITLEDAT": 435}
+
+
+@pytest.mark.parametrize("table", sorted(ROWS))
+def test_row_counts(table):
+    df = SUMMARY.read_data(table).df
+    assert len(df) == ROWS[table]
+    assert df.notna().all().all()
+
+
+def test_alias_lookup():
+    static = SUMMARY.read_data("STATIC-2")
+    # - APC title with a dot, file code without it and with the -PC suffix
+    assert static.find("8x3.7SFR") == static.find("8x37SFR-PC") is not None
+    assert static.find("10.5x4.5") == static.find("PER3_105x45.dat") is not None
+    assert set(static.prop("20x10E")["prop_id"]) == {"20x10E"}
+    with pytest.raises(PropellerNotFoundError):
+        static.rows("99x99ZZ")
+
+
+def test_check_rpm():
+    assert SUMMARY.rpm_range("20x10E") == (1000, 12000)
+    SUMMARY.check_rpm("20x10E", [1000, 5000, 12000])
+    with pytest.raises(RPMOutOfRangeError) as error:
+        SUMMARY.check_rpm("20x10E", [5000, 13000])
+    assert (error.value.prop, error.value.rpm_min, error.value.rpm_max) == ("20x10E", 1000, 12000)
+
+
+def test_searches_reject_out_of_range_rpm(tmp_path):
+    # - rejected before the index is loaded: a tree without index does not build it
+    tree = PropellerSearchTree(index_path=tmp_path / "index.npz")
+    with pytest.raises(RPMOutOfRangeError):
+        tree.search_by_range({"RPM": (60000, None)}, sort_by="maxThrust (N)")
+    with pytest.raises(RPMOutOfRangeError):
+        tree.search_similar_curves("20x10E", rpm=13000)
+    assert not (tmp_path / "index.npz").exists()
+
+    assert len(PropellerSearchTree().search_by_range({"RPM": (None, 45000)}, sort_by="maxThrust (N)", top_k=3)) == 3
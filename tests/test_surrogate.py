@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from Objects.Performance import Performance
+from Objects.ClassAPC import PropellerNotFoundError
+
+PERF = Performance()
+PROPS = ["10x7E", "20x10E", "9x6E", "8x4", "105x45"]
+V_ROUNDING = 1e-4   # J from the rounded "V (mph)" column adds up to ~1e-4 to the Ct / Cp error
+
+
+@pytest.fixture(scope="module")
+def surrogate():
+    return PERF.surrogate()
+
+
+def test_max_error_bound(surrogate):
+    errors = surrogate.errors()
+    assert len(errors) == 435
+    assert np.isfinite(errors[["max error Ct", "max error Cp"]].to_numpy()).all()
+    assert errors["max error Ct"].max() < 1e-3 and errors["max error Cp"].max() < 2e-3
+
+
+@pytest.mark.parametrize("prop", PROPS)
+def test_evaluate_reproduces_tables(surrogate, prop):
+    df = PERF.read_data(prop, engine="fast")
+    out = surrogate.evaluate(prop, df["RPM"].to_numpy(), df["V (mph)"].to_numpy())
+    assert out.shape == (len(df), 5) and not np.isnan(out).any()
+
+    max_error = surrogate.max_error[surrogate.prop_index(prop)]
+    assert np.abs(out[:, 3] - df["Ct"]).max() <= max_error[0] + V_ROUNDING
+    assert np.abs(out[:, 4] - df["Cp"]).max() <= max_error[1] + V_ROUNDING
+    assert np.abs(out[:, 0] - df["Thrust (N)"]).max() <= 5e-3 * df["Thrust (N)"].max()
+    assert np.abs(out[:, 1] - df["PWR (W)"]).max() <= 5e-3 * df["PWR (W)"].max()
+
+
+def test_evaluate_outside_tables(surrogate):
+    df = PERF.read_data("20x10E", engine="fast")
+    rpm_min, rpm_max = df["RPM"].min(), df["RPM"].max()
+    v_max = df.loc[df["RPM"] == rpm_min, "V (mph)"].max()
+    out = surrogate.evaluate("20x10E", [rpm_min - 100, rpm_max + 100, rpm_min, rpm_min], [10, 10, v_max * 1.5, 0])
+    assert np.isnan(out[:3]).all()       # RPM below / above the tables, J above the tables
+    assert not np.isnan(out[3]).any()    # static point inside the tables
+
+
+def test_unknown_prop(surrogate):
+    with pytest.raises(PropellerNotFoundError) as error:
+        surrogate.evaluate(["20x10E", "20x10EE"], 5000, 10)
+    assert error.value.code == "20x10EE" and "20x10E" in error.value.suggestions